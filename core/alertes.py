@@ -0,0 +1,140 @@
+# core/alertes.py
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AlerteAbsence, Cours, PointReprise, Presence, Seance
+
+
+TRAITEMENT = "alertes_absence"
+
+ORDRE_ALERTES = ('taux_presence', 'id')
+
+
+def seuils():
+    """
+    Seuils d'alerte (settings) : taux de présence minimal (%), nombre
+    d'absences consécutives, fenêtre glissante des dernières séances
+    appelées pour le taux (0 : toutes) et nombre minimal de séances
+    appelées avant de juger un taux.
+    """
+    return {
+        "taux": getattr(settings, "ALERTES_SEUIL_TAUX", 75),
+        "absences_consecutives": getattr(settings, "ALERTES_ABSENCES_CONSECUTIVES", 3),
+        "fenetre": getattr(settings, "ALERTES_FENETRE", 0),
+        "seances_min": getattr(settings, "ALERTES_SEANCES_MIN", 3),
+    }
+
+
+# -------------------
+# ANALYSE
+# -------------------
+
+def cours_modifies(depuis):
+    """Ids des cours dont les présences, séances, étudiants ou le cours lui-même ont changé depuis ``depuis``"""
+    ids = set(
+        Presence.objects.filter(updated_at__gt=depuis).order_by()
+        .values_list('seance__cours_id', flat=True).distinct()
+    )
+    ids.update(Seance.objects.filter(updated_at__gt=depuis).order_by().values_list('cours_id', flat=True))
+    ids.update(Cours.objects.filter(updated_at__gt=depuis).order_by().values_list('id', flat=True))
+    ids.update(
+        Cours.objects.filter(classe__etudiants__updated_at__gt=depuis).order_by().values_list('id', flat=True)
+    )
+    return ids
+
+
+def alertes_cours(cours, seuils_alerte):
+    """Alertes (non enregistrées) des étudiants d'un cours, calculées sur sa matrice de présences"""
+    import numpy as np
+
+    from .matrice import MatricePresences
+
+    matrice = MatricePresences.charger(cours)
+    serie_en_cours, _ = matrice.series_absences()
+    fenetre = matrice.derniers_appels(seuils_alerte["fenetre"]) if seuils_alerte["fenetre"] else matrice
+    appels = fenetre.appels_par_etudiant()
+    taux = fenetre.taux_par_etudiant()
+
+    taux_insuffisant = (appels >= seuils_alerte["seances_min"]) & (taux < seuils_alerte["taux"])
+    serie = serie_en_cours >= seuils_alerte["absences_consecutives"]
+    return [
+        AlerteAbsence(
+            cours=cours,
+            etudiant_id=matrice.etudiant_ids[i],
+            taux_presence=round(float(taux[i]), 1),
+            seances_appelees=int(appels[i]),
+            absences_consecutives=int(serie_en_cours[i]),
+            taux_insuffisant=bool(taux_insuffisant[i]),
+            serie_absences=bool(serie[i]),
+        )
+        for i in np.flatnonzero(taux_insuffisant | serie)
+    ]
+
+
+def analyser_absences(complet=False):
+    """
+    Met à jour la table des alertes. Seuls les cours modifiés depuis le
+    dernier passage (point de reprise sur ``updated_at``) sont réanalysés,
+    sauf au premier passage ou avec ``complet`` (nécessaire après un
+    changement de seuils ou des suppressions, qui ne laissent pas de trace
+    datée). Retourne un compte rendu.
+    """
+    maintenant = timezone.now()
+    point = PointReprise.objects.filter(nom=TRAITEMENT).first()
+    if complet or point is None:
+        cours_ids = set(Cours.objects.values_list('id', flat=True))
+    else:
+        # Relu avant le point de reprise : une transaction validée pendant
+        # l'analyse précédente, avec un updated_at antérieur, n'est pas perdue
+        chevauchement = datetime.timedelta(seconds=getattr(settings, "CHEVAUCHEMENT_INCREMENTAL", 5))
+        cours_ids = cours_modifies(point.horodatage - chevauchement)
+
+    seuils_alerte = seuils()
+    nb_alertes = 0
+    for cours in Cours.objects.filter(pk__in=cours_ids).only('id', 'classe_id').iterator(chunk_size=200):
+        alertes = alertes_cours(cours, seuils_alerte)
+        nb_alertes += len(alertes)
+        with transaction.atomic():
+            AlerteAbsence.objects.filter(cours=cours).exclude(
+                etudiant_id__in=[alerte.etudiant_id for alerte in alertes]
+            ).delete()
+            AlerteAbsence.objects.bulk_create(
+                alertes,
+                update_conflicts=True,
+                unique_fields=['cours', 'etudiant'],
+                update_fields=[
+                    'taux_presence', 'seances_appelees', 'absences_consecutives',
+                    'taux_insuffisant', 'serie_absences', 'updated_at',
+                ],
+            )
+
+    # Étudiant changé de classe : ses alertes dans les cours de l'ancienne classe
+    AlerteAbsence.objects.exclude(etudiant__classe_id=F('cours__classe_id')).delete()
+    if point is None:
+        PointReprise.objects.create(nom=TRAITEMENT, horodatage=maintenant)
+    else:
+        PointReprise.objects.filter(pk=point.pk).update(horodatage=maintenant)
+    return {
+        "depuis": None if complet or point is None else point.horodatage.isoformat(),
+        "cours_analyses": len(cours_ids),
+        "alertes_cours_analyses": nb_alertes,
+        "alertes": AlerteAbsence.objects.count(),
+    }
+
+
+# -------------------
+# LECTURE
+# -------------------
+
+def alertes():
+    """Alertes avec l'étudiant, sa classe et le cours, pour l'affichage"""
+    return AlerteAbsence.objects.select_related('etudiant__classe', 'cours__enseignant')
+
+
+def derniere_analyse():
+    return PointReprise.objects.filter(nom=TRAITEMENT).values_list('horodatage', flat=True).first()
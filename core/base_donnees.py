@@ -0,0 +1,34 @@
+# core/base_donnees.py
+
+from django.conf import settings
+
+
+def appliquer_pragmas(connexion):
+    """
+    Applique ``SQLITE_PRAGMAS`` (journal WAL, synchronous, busy_timeout,
+    mmap, cache) à une nouvelle connexion SQLite. Sans effet sur les autres
+    moteurs.
+    """
+    if connexion.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    if not pragmas:
+        return
+    # Curseur brut : pas de wrapper d'exécution ni de journal des requêtes
+    curseur = connexion.connection.cursor()
+    try:
+        for nom, valeur in pragmas.items():
+            curseur.execute(f"PRAGMA {nom} = {valeur}")
+    finally:
+        curseur.close()
+
+
+def pragmas_effectifs(connexion, noms=None):
+    """Valeurs courantes des pragmas SQLite (diagnostic, tests)"""
+    noms = noms or getattr(settings, "SQLITE_PRAGMAS", {}).keys()
+    with connexion.cursor() as curseur:
+        valeurs = {}
+        for nom in noms:
+            curseur.execute(f"PRAGMA {nom}")
+            valeurs[nom] = curseur.fetchone()[0]
+    return valeurs
@@ -0,0 +1,116 @@
+# core/cache.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Clé du compteur de version : l'incrémenter invalide toutes les statistiques
+CLE_VERSION = "stats:version"
+
+
+def _cache():
+    return caches[getattr(settings, 'STATS_CACHE_ALIAS', 'default')]
+
+
+# -------------------
+# VERSION
+# -------------------
+
+def version_stats():
+    cache = _cache()
+    version = cache.get(CLE_VERSION)
+    if version is None:
+        cache.add(CLE_VERSION, 1, timeout=None)
+        version = cache.get(CLE_VERSION, 1)
+    return version
+
+
+def invalider_stats():
+    """Incrémente la version : les entrées existantes deviennent périmées"""
+    cache = _cache()
+    try:
+        cache.incr(CLE_VERSION)
+    except ValueError:
+        cache.add(CLE_VERSION, 2, timeout=None)
+
+
+# -------------------
+# LECTURE AVEC PROTECTION CONTRE L'EMBALLEMENT
+# -------------------
+
+def cache_stats(namespace, calcul, timeout=None):
+    """
+    Retourne le résultat de ``calcul()`` mis en cache sous ``namespace``
+    (par ex. ``"enseignant:42:dashboard"``).
+
+    Une entrée est fraîche si elle a été calculée pour la version courante
+    et avant son expiration. Sinon, un seul worker obtient le verrou et
+    recalcule pendant que les autres servent la valeur périmée.
+    """
+    cache = _cache()
+    if timeout is None:
+        timeout = getattr(settings, 'STATS_CACHE_TIMEOUT', 60)
+    delai_grace = getattr(settings, 'STATS_CACHE_GRACE', 300)
+
+    cle = f"stats:{namespace}"
+    cle_verrou = f"{cle}:verrou"
+    valeurs = cache.get_many([CLE_VERSION, cle])
+    version = valeurs.get(CLE_VERSION) or version_stats()
+    entree = valeurs.get(cle)
+
+    if entree is not None:
+        version_entree, expire_a, valeur = entree
+        if version_entree == version and time.time() < expire_a:
+            return valeur
+
+    verrou = cache.add(cle_verrou, 1, timeout=30)
+    if entree is not None and not verrou:
+        # Un autre worker recalcule déjà : valeur périmée servie
+        return valeur
+
+    try:
+        valeur = calcul()
+        cache.set(cle, (version, time.time() + timeout, valeur), timeout=timeout + delai_grace)
+    finally:
+        if verrou:
+            cache.delete(cle_verrou)
+    return valeur
+
+
+def cache_stats_multiple(cles, namespace, calcul, timeout=None):
+    """
+    Comme ``cache_stats`` pour plusieurs entrées lues en une fois (par ex.
+    les résumés des étudiants d'une classe) : ``namespace(cle)`` donne le
+    namespace de chaque clé et ``calcul(manquantes)`` retourne
+    ``{cle: valeur}`` pour les seules clés absentes ou périmées, en un
+    passage. Sans verrou : deux workers peuvent recalculer le même lot.
+    """
+    cache = _cache()
+    if timeout is None:
+        timeout = getattr(settings, 'STATS_CACHE_TIMEOUT', 60)
+    delai_grace = getattr(settings, 'STATS_CACHE_GRACE', 300)
+
+    noms = {cle: f"stats:{namespace(cle)}" for cle in cles}
+    valeurs = cache.get_many([CLE_VERSION, *noms.values()])
+    version = valeurs.get(CLE_VERSION) or version_stats()
+
+    resultats, manquantes = {}, []
+    maintenant = time.time()
+    for cle, nom in noms.items():
+        entree = valeurs.get(nom)
+        if entree is not None and entree[0] == version and maintenant < entree[1]:
+            resultats[cle] = entree[2]
+        else:
+            manquantes.append(cle)
+
+    if manquantes:
+        calculees = calcul(manquantes)
+        expire_a = time.time() + timeout
+        cache.set_many(
+            {noms[cle]: (version, expire_a, valeur) for cle, valeur in calculees.items()},
+            timeout=timeout + delai_grace,
+        )
+        resultats.update(calculees)
+    return resultats
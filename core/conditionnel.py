@@ -0,0 +1,128 @@
+# core/conditionnel.py
+
+import datetime
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import Cours, Etudiant, Presence, Seance
+
+
+# -------------------
+# VERSION D'UN COURS (lue en base)
+# -------------------
+
+def _dernier_et_nombre(lignes, groupe):
+    """Sous-requêtes (plus récent updated_at, nombre de lignes) de ``lignes``, corrélées au cours"""
+    lignes = lignes.order_by().values(groupe)
+    return (
+        Subquery(lignes.annotate(v=Max('updated_at')).values('v')),
+        Subquery(lignes.annotate(v=Count('id')).values('v')),
+    )
+
+
+def _requete_version(cours_id, enseignant=None):
+    cours = Cours.objects.filter(pk=cours_id)
+    if enseignant is not None:
+        cours = cours.filter(enseignant=enseignant)
+    presences = _dernier_et_nombre(Presence.objects.filter(seance__cours_id=OuterRef('pk')), 'seance__cours_id')
+    seances = _dernier_et_nombre(Seance.objects.filter(cours_id=OuterRef('pk')), 'cours_id')
+    etudiants = _dernier_et_nombre(Etudiant.objects.filter(classe_id=OuterRef('classe_id')), 'classe_id')
+    return cours.values_list(
+        'updated_at', F('classe__updated_at'), F('enseignant__updated_at'), *presences, *seances, *etudiants,
+    )
+
+
+def _version(ligne):
+    if ligne is None:
+        return None
+    version = hashlib.sha1(repr(ligne).encode()).hexdigest()[:16]
+    derniere = max(v for v in ligne if isinstance(v, datetime.datetime))
+    return version, derniere
+
+
+def version_cours(cours_id, enseignant=None):
+    """
+    Version des données d'un cours et date de dernière modification, lues
+    en base en une requête : plus récent ``updated_at`` et nombre de lignes
+    des présences et séances du cours et des étudiants de sa classe, avec
+    le cours, sa classe et son enseignant. Le nombre de lignes couvre les
+    suppressions. Une écriture faite par n'importe quel processus (autre
+    worker, runjobs, commande) change la version. None pour un cours
+    inexistant (ou d'un autre enseignant que ``enseignant``).
+    """
+    return _version(_requete_version(cours_id, enseignant).first())
+
+
+async def aversion_cours(cours_id, enseignant=None):
+    return _version(await _requete_version(cours_id, enseignant).afirst())
+
+
+def _validateurs(nature, cours_id, version):
+    if version is None:
+        return None
+    return f"{nature}-{cours_id}-{version[0]}", version[1]
+
+
+def validateurs_cours(nature, cours_id, enseignant=None):
+    """``(etag, dernière modification)`` d'une réponse qui ne dépend que des données du cours, ou None"""
+    return _validateurs(nature, cours_id, version_cours(cours_id, enseignant))
+
+
+async def avalidateurs_cours(nature, cours_id, enseignant=None):
+    return _validateurs(nature, cours_id, await aversion_cours(cours_id, enseignant))
+
+
+# -------------------
+# DÉCORATEUR
+# -------------------
+
+def _preparer(request, validateurs):
+    if validateurs is None:
+        return None, None, None
+    etag, derniere = validateurs
+    etag = quote_etag(etag)
+    derniere = int(derniere.timestamp())
+    return get_conditional_response(request, etag=etag, last_modified=derniere), etag, derniere
+
+
+def _conclure(request, response, etag, derniere):
+    if etag is not None and request.method in ("GET", "HEAD") and 200 <= response.status_code < 300:
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(derniere))
+    return response
+
+
+def conditionnel(calcul_validateurs):
+    """
+    Comme ``django.views.decorators.http.condition``, mais
+    ``calcul_validateurs`` peut être une coroutine (ORM asynchrone dans une
+    vue ``async def``). Il renvoie ``(etag, dernière modification)``, ou
+    None pour laisser répondre la vue (ressource introuvable ou interdite).
+    Une requête dont ``If-None-Match`` / ``If-Modified-Since`` correspond
+    reçoit un 304 sans exécuter la vue.
+    """
+    def decorateur(vue):
+        if iscoroutinefunction(vue):
+            @functools.wraps(vue)
+            async def envelopper(request, *args, **kwargs):
+                validateurs = calcul_validateurs(request, *args, **kwargs)
+                if iscoroutinefunction(calcul_validateurs):
+                    validateurs = await validateurs
+                response, etag, derniere = _preparer(request, validateurs)
+                if response is None:
+                    response = await vue(request, *args, **kwargs)
+                return _conclure(request, response, etag, derniere)
+        else:
+            @functools.wraps(vue)
+            def envelopper(request, *args, **kwargs):
+                response, etag, derniere = _preparer(request, calcul_validateurs(request, *args, **kwargs))
+                if response is None:
+                    response = vue(request, *args, **kwargs)
+                return _conclure(request, response, etag, derniere)
+        return envelopper
+    return decorateur
@@ -0,0 +1,199 @@
+# core/donnees_fictives.py
+
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalider_stats
+from .models import Classe, Cours, Etudiant, Presence, Seance, User
+from .recherche import indexer_cours, indexer_etudiants
+from .resumes import reconstruire_resumes
+
+
+NOMS = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+    "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier",
+    "Morel", "Girard", "André", "Lefèvre", "Mercier", "Dupont", "Lambert", "Bonnet", "François", "Martinez",
+    "Diallo", "Traoré", "Koné", "Ndiaye", "Mensah", "Okafor", "Benali", "Haddad", "Nguyen", "Rakoto",
+]
+
+PRENOMS = [
+    "Emma", "Louise", "Jade", "Alice", "Chloé", "Lina", "Léa", "Manon", "Inès", "Sarah",
+    "Gabriel", "Louis", "Raphaël", "Jules", "Adam", "Lucas", "Léo", "Hugo", "Arthur", "Nathan",
+    "Aïcha", "Fatou", "Mariam", "Awa", "Koffi", "Moussa", "Yanis", "Karim", "Amine", "Linh",
+]
+
+MATIERES = [
+    "Algorithmique", "Analyse", "Algèbre linéaire", "Probabilités", "Statistiques", "Bases de données",
+    "Réseaux", "Systèmes d'exploitation", "Programmation web", "Compilation", "Génie logiciel",
+    "Intelligence artificielle", "Sécurité", "Anglais", "Communication", "Économie", "Droit",
+    "Gestion de projet", "Physique", "Électronique",
+]
+
+# Créneaux d'une journée de cours (début, fin)
+CRENEAUX = [
+    (datetime.time(8, 0), datetime.time(10, 0)),
+    (datetime.time(10, 15), datetime.time(12, 15)),
+    (datetime.time(13, 30), datetime.time(15, 30)),
+    (datetime.time(15, 45), datetime.time(17, 45)),
+]
+
+TAUX_ANNULATION = 0.03
+TAUX_DECROCHAGE = 0.05
+
+
+# -------------------
+# TIRAGES
+# -------------------
+
+def _profil_assiduite(rng):
+    """Probabilités (absence, retard, motif) d'un étudiant"""
+    if rng.random() < TAUX_DECROCHAGE:
+        absence = rng.betavariate(5, 5)    # ~50 % d'absences
+    else:
+        absence = rng.betavariate(2, 14)   # ~12 % d'absences
+    retard = rng.betavariate(1.5, 15)      # ~9 % de retards
+    motif = rng.betavariate(3, 7)          # ~30 % des absences justifiées
+    return absence, retard, motif
+
+
+def _statut(rng, profil):
+    absence, retard, motif = profil
+    tirage = rng.random()
+    if tirage < absence:
+        return "motif" if rng.random() < motif else "absent"
+    if tirage < absence + retard:
+        return "retard"
+    return "present"
+
+
+# -------------------
+# GÉNÉRATION
+# -------------------
+
+def purger_ecole(prefixe):
+    """Supprime les données d'une génération précédente de même préfixe"""
+    with transaction.atomic():
+        Classe.objects.filter(nom__startswith=f"{prefixe} ").delete()
+        User.objects.filter(username__startswith=f"{prefixe.lower()}_").delete()
+    invalider_stats()
+
+
+def generer_ecole(
+    nb_classes=10,
+    etudiants_par_classe=40,
+    cours_par_classe=6,
+    seances_par_cours=24,
+    nb_enseignants=None,
+    prefixe="FX",
+    graine=None,
+    mot_de_passe="demo1234",
+):
+    """
+    Crée une école fictive : classes, enseignants, cours, séances passées
+    (une par semaine et par cours) et l'appel de chacune, par
+    ``bulk_create``. L'assiduité suit un profil par étudiant (quelques
+    décrocheurs, retards et absences justifiées) ; les séances annulées
+    n'ont pas d'appel.
+
+    Les résumés de présence et l'index de recherche, que ``bulk_create``
+    ne met pas à jour, sont reconstruits pour les objets créés.
+    Retourne le nombre d'objets créés par modèle.
+    """
+    rng = random.Random(graine)
+    if nb_enseignants is None:
+        nb_enseignants = max(1, nb_classes * cours_par_classe // 4)
+    cours_par_classe = min(cours_par_classe, len(MATIERES))
+    niveaux = [code for code, _ in Classe.NIVEAU_CHOICES]
+    debut = timezone.localdate() - datetime.timedelta(weeks=seances_par_cours)
+    bilan = {"classes": 0, "enseignants": 0, "etudiants": 0, "cours": 0, "seances": 0, "presences": 0}
+
+    with transaction.atomic():
+        mot_de_passe = make_password(mot_de_passe)  # haché une seule fois
+        enseignants = User.objects.bulk_create([
+            User(
+                username=f"{prefixe.lower()}_prof{i:04d}",
+                email=f"{prefixe.lower()}_prof{i:04d}@example.com",
+                first_name=rng.choice(PRENOMS),
+                last_name=rng.choice(NOMS),
+                role="enseignant",
+                password=mot_de_passe,
+            )
+            for i in range(nb_enseignants)
+        ])
+        bilan["enseignants"] = len(enseignants)
+
+        classes = Classe.objects.bulk_create([
+            Classe(nom=f"{prefixe} {niveaux[i % len(niveaux)]} G{i:04d}", niveau=niveaux[i % len(niveaux)])
+            for i in range(nb_classes)
+        ])
+        bilan["classes"] = len(classes)
+
+        matricule = 0
+        for c, classe in enumerate(classes):
+            # Effectifs variables autour de la moyenne (écart-type 10 %, au plus +20 %)
+            effectif = max(1, round(rng.gauss(etudiants_par_classe, etudiants_par_classe * 0.1)))
+            effectif = min(effectif, round(etudiants_par_classe * 1.2))
+            etudiants = Etudiant.objects.bulk_create([
+                Etudiant(
+                    matricule=f"{prefixe}{matricule + i:08d}",
+                    nom=rng.choice(NOMS),
+                    prenom=rng.choice(PRENOMS),
+                    sexe=rng.choice("MF"),
+                    classe=classe,
+                )
+                for i in range(effectif)
+            ])
+            matricule += effectif
+            profils = {etudiant.pk: _profil_assiduite(rng) for etudiant in etudiants}
+
+            cours = Cours.objects.bulk_create([
+                Cours(
+                    nom=matiere,
+                    code=f"{prefixe}-{c:04d}-{k:02d}",
+                    classe=classe,
+                    enseignant=rng.choice(enseignants),
+                    type_cours=rng.choice(["cours", "cours", "td", "tp"]),
+                )
+                for k, matiere in enumerate(rng.sample(MATIERES, cours_par_classe))
+            ])
+
+            # Un créneau fixe par cours dans la semaine de la classe
+            seances = Seance.objects.bulk_create([
+                Seance(
+                    cours=un_cours,
+                    date=debut + datetime.timedelta(weeks=semaine, days=k % 5),
+                    heure_debut=CRENEAUX[(k // 5) % len(CRENEAUX)][0],
+                    heure_fin=CRENEAUX[(k // 5) % len(CRENEAUX)][1],
+                    salle=f"S{rng.randint(1, 40):03d}",
+                    is_annulee=rng.random() < TAUX_ANNULATION,
+                )
+                for k, un_cours in enumerate(cours)
+                for semaine in range(seances_par_cours)
+            ])
+
+            presences = Presence.objects.bulk_create(
+                [
+                    Presence(etudiant=etudiant, seance=seance, statut=_statut(rng, profils[etudiant.pk]))
+                    for seance in seances
+                    if not seance.is_annulee
+                    for etudiant in etudiants
+                ],
+                batch_size=5000,
+            )
+
+            bilan["etudiants"] += effectif
+            bilan["cours"] += len(cours)
+            bilan["seances"] += len(seances)
+            bilan["presences"] += len(presences)
+
+        cours_ids = list(Cours.objects.filter(classe__in=classes).values_list('id', flat=True))
+        reconstruire_resumes(cours_ids)
+        indexer_etudiants(Etudiant.objects.filter(classe__in=classes).values_list('id', flat=True))
+        indexer_cours(cours_ids)
+        transaction.on_commit(invalider_stats)
+
+    return bilan
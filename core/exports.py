@@ -0,0 +1,190 @@
+# core/exports.py
+
+import csv
+import datetime
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Presence
+from .routage import lecture_primaire
+
+
+EXCEL_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# -------------------
+# EXPORTS EXCEL ET PDF
+# -------------------
+
+# openpyxl, numpy et reportlab ne sont chargés qu'au premier export
+# (core/exports_excel.py, core/exports_pdf.py) : le démarrage des workers
+# et des commandes manage.py ne paie pas leur import.
+
+def export_excel_presences(cours, fraiche=False):
+    """
+    Génère le classeur Excel des présences d'un cours en mode ``write_only``
+    dans un fichier temporaire, prêt à être streamé. Le fichier est
+    supprimé à sa fermeture. ``fraiche`` recharge la matrice au lieu de
+    lire le cache (qui peut servir une valeur périmée pendant son recalcul).
+    """
+    from .exports_excel import classeur_presences
+    return classeur_presences(cours, fraiche=fraiche)
+
+
+def export_modele_import():
+    """Classeur modèle de l'import d'étudiants, dans un fichier temporaire"""
+    from .exports_excel import classeur_modele_import
+    return classeur_modele_import()
+
+
+def export_pdf_statistiques(resume, date_generation):
+    """
+    Dessine le rapport PDF des statistiques d'un cours (``StatsCours``)
+    directement avec reportlab dans un fichier temporaire prêt à être
+    streamé. Les longues listes d'étudiants sont paginées avec l'en-tête
+    du tableau répété.
+    """
+    from .exports_pdf import rapport_statistiques
+    return rapport_statistiques(resume, date_generation)
+
+
+# -------------------
+# RAPPORTS STOCKÉS
+# -------------------
+
+DOSSIER_RAPPORTS = "rapports"
+
+
+def rapport_stocke(prefixe, version, extension, generer):
+    """
+    Ouvre le rapport ``{prefixe}_{version}{extension}`` du stockage par
+    défaut. S'il n'existe pas encore, ``generer()`` produit le fichier
+    temporaire à stocker, en lisant sur le primaire : un rapport inchangé
+    n'est généré qu'une fois. ``generer`` doit lire des données au moins
+    aussi récentes que ``version`` (pas de cache périmé).
+
+    Deux premiers téléchargements simultanés génèrent chacun le rapport ;
+    le second exemplaire (nom suffixé par le stockage) est supprimé. Les
+    versions précédentes sont purgées une fois le fichier ouvert, sans
+    échec si une requête concurrente les a déjà supprimées.
+    """
+    nom = f"{DOSSIER_RAPPORTS}/{prefixe}_{version}{extension}"
+    try:
+        return default_storage.open(nom, "rb")
+    except FileNotFoundError:
+        pass
+
+    with lecture_primaire(), generer() as fichier:
+        enregistre = default_storage.save(nom, File(fichier))
+    # Ouvert avant toute purge (la nôtre ou celle d'une requête concurrente)
+    rapport = default_storage.open(enregistre, "rb")
+    _, fichiers = default_storage.listdir(DOSSIER_RAPPORTS)
+    version_courante = (f"{prefixe}_{version}{extension}", f"{prefixe}_{version}_")
+    for ancien in fichiers:
+        chemin = f"{DOSSIER_RAPPORTS}/{ancien}"
+        if not ancien.startswith(f"{prefixe}_") or chemin == nom:
+            continue
+        # Autre version, ou notre exemplaire en double de la version courante
+        if chemin == enregistre or not ancien.startswith(version_courante):
+            try:
+                default_storage.delete(chemin)
+            except OSError:
+                pass
+    return rapport
+
+
+# -------------------
+# DUMP EN FLUX (NDJSON / CSV)
+# -------------------
+
+# (nom de colonne, chemin ORM) des lignes du dump
+COLONNES_DUMP = [
+    ("id", "id"),
+    ("statut", "statut"),
+    ("heure_arrivee", "heure_arrivee"),
+    ("updated_at", "updated_at"),
+    ("seance_id", "seance_id"),
+    ("date", "seance__date"),
+    ("heure_debut", "seance__heure_debut"),
+    ("heure_fin", "seance__heure_fin"),
+    ("cours_id", "seance__cours_id"),
+    ("cours_code", "seance__cours__code"),
+    ("cours", "seance__cours__nom"),
+    ("classe_id", "seance__cours__classe_id"),
+    ("classe", "seance__cours__classe__nom"),
+    ("etudiant_id", "etudiant_id"),
+    ("matricule", "etudiant__matricule"),
+    ("nom", "etudiant__nom"),
+    ("prenom", "etudiant__prenom"),
+]
+
+DUMP_CHUNK = 2000
+
+
+def presences_dump(du=None, au=None, classe_id=None, cours_id=None, depuis=None):
+    """
+    Lignes (tuples, dans l'ordre de ``COLONNES_DUMP``) des présences
+    filtrées, triées par (updated_at, id) : la dernière ligne reçue donne
+    le ``depuis`` du dump incrémental suivant. Les lignes depuis
+    ``depuis`` moins ``CHEVAUCHEMENT_INCREMENTAL`` (settings) sont
+    renvoyées : une transaction validée après le dump précédent avec un
+    updated_at antérieur n'est pas perdue (sauf si elle a duré plus que le
+    chevauchement). Des lignes peuvent donc revenir d'un dump à l'autre ;
+    le client dédoublonne par ``id``.
+    """
+    presences = Presence.objects.all()
+    if du:
+        presences = presences.filter(seance__date__gte=du)
+    if au:
+        presences = presences.filter(seance__date__lte=au)
+    if classe_id:
+        presences = presences.filter(seance__cours__classe_id=classe_id)
+    if cours_id:
+        presences = presences.filter(seance__cours_id=cours_id)
+    if depuis:
+        chevauchement = datetime.timedelta(seconds=getattr(settings, "CHEVAUCHEMENT_INCREMENTAL", 5))
+        presences = presences.filter(updated_at__gte=depuis - chevauchement)
+    return (
+        presences.order_by('updated_at', 'id')
+        .values_list(*(chemin for _, chemin in COLONNES_DUMP))
+        .iterator(chunk_size=DUMP_CHUNK)
+    )
+
+
+def _par_blocs(lignes_texte):
+    """Regroupe les lignes produites : un envoi par bloc plutôt que par ligne"""
+    bloc = []
+    for ligne in lignes_texte:
+        bloc.append(ligne)
+        if len(bloc) == DUMP_CHUNK:
+            yield "".join(bloc)
+            bloc = []
+    if bloc:
+        yield "".join(bloc)
+
+
+def flux_ndjson(lignes):
+    noms = [nom for nom, _ in COLONNES_DUMP]
+    encodeur = DjangoJSONEncoder(ensure_ascii=False)
+    return _par_blocs(encodeur.encode(dict(zip(noms, ligne))) + "\n" for ligne in lignes)
+
+
+class _Tampon:
+    """Pseudo-fichier pour csv.writer : ``write`` retourne la ligne formatée"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def flux_csv(lignes):
+    writer = csv.writer(_Tampon())
+
+    def lignes_csv():
+        yield writer.writerow([nom for nom, _ in COLONNES_DUMP])
+        for ligne in lignes:
+            yield writer.writerow([v.isoformat() if hasattr(v, 'isoformat') else v for v in ligne])
+
+    return _par_blocs(lignes_csv())
@@ -0,0 +1,83 @@
+# core/exports_excel.py
+#
+# Classeurs Excel. Module chargé au premier export (voir core/exports.py) :
+# openpyxl et numpy ne sont pas importés au démarrage des workers.
+
+import tempfile
+
+import numpy as np
+import openpyxl
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from .matrice import CODES_PRESENTS, MatricePresences, matrice_cours
+from .stats import STATUTS
+
+
+# Libellé Excel de chaque code de la matrice (0 : pas d'appel, affiché absent)
+LIBELLES = np.array(["absent", *STATUTS], dtype=object)
+
+
+def classeur_presences(cours, fraiche=False):
+    """
+    Génère le classeur Excel des présences d'un cours en mode ``write_only``
+    dans un fichier temporaire, prêt à être streamé. Le fichier est
+    supprimé à sa fermeture. ``fraiche`` : matrice rechargée, sans cache.
+    """
+    matrice = MatricePresences.charger(cours) if fraiche else matrice_cours(cours)
+    etudiants = {
+        pk: (matricule, nom, prenom)
+        for pk, matricule, nom, prenom in cours.classe.etudiants.order_by().values_list('id', 'matricule', 'nom', 'prenom')
+    }
+    nb_seances = len(matrice.seance_ids)
+
+    # Totaux vectorisés
+    total_present = np.isin(matrice.codes, CODES_PRESENTS).sum(axis=1)
+    total_absent = nb_seances - total_present
+    if nb_seances:
+        taux = total_present / nb_seances * 100
+    else:
+        taux = np.zeros(len(matrice.etudiant_ids))
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=f"Présences {cours.nom}"[:31])
+
+    headers = ["Matricule", "Nom", "Prénom"] + [d.strftime("%d/%m/%Y") for d in matrice.dates] + ["Total Présent", "Total Absent", "Taux Présence"]
+    for col in range(1, len(headers) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 15
+    ws.append(headers)
+
+    for i, etudiant_id in enumerate(matrice.etudiant_ids):
+        if etudiant_id not in etudiants:
+            # Matrice en cache antérieure à la suppression ou au changement de classe
+            continue
+        matricule, nom, prenom = etudiants[etudiant_id]
+        ws.append(
+            [matricule, nom, prenom or ""]
+            + LIBELLES[matrice.codes[i]].tolist()
+            + [int(total_present[i]), int(total_absent[i]), f"{taux[i]:.1f}%"]
+        )
+
+    fichier = tempfile.TemporaryFile(suffix=".xlsx")
+    wb.save(fichier)
+    fichier.seek(0)
+    return fichier
+
+
+def classeur_modele_import():
+    """Classeur modèle pour l'import d'étudiants : en-têtes et une ligne d'exemple"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Modèle Import"
+    ws.append(["Matricule", "Nom", "Prénom"])
+    ws.append(["RK001", "KULE", "Robert"])
+    for cell in ws[1]:
+        cell.font = Font(bold=True)
+    ws.column_dimensions['A'].width = 15
+    ws.column_dimensions['B'].width = 20
+    ws.column_dimensions['C'].width = 20
+
+    fichier = tempfile.TemporaryFile(suffix=".xlsx")
+    wb.save(fichier)
+    fichier.seek(0)
+    return fichier
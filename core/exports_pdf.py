@@ -0,0 +1,124 @@
+# core/exports_pdf.py
+#
+# Rapports PDF dessinés avec reportlab. Module chargé au premier export
+# (voir core/exports.py).
+
+import tempfile
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+
+PDF_MARGE = 15 * mm
+PDF_HAUTEUR_LIGNE = 6 * mm
+PDF_COLONNES = [  # (titre, largeur)
+    ("Étudiant", 80 * mm),
+    ("Présent", 18 * mm),
+    ("Retard", 18 * mm),
+    ("Absent", 18 * mm),
+    ("Motif", 18 * mm),
+    ("Taux", 18 * mm),
+]
+PDF_BLEU = colors.HexColor("#0056b3")
+PDF_VERT = colors.HexColor("#10b981")
+PDF_ROUGE = colors.HexColor("#ef4444")
+
+
+class _RenduStatistiques:
+    """Dessine le tableau des statistiques d'un cours page par page"""
+
+    def __init__(self, fichier, resume, date_generation):
+        self.c = canvas.Canvas(fichier, pagesize=A4, pageCompression=1)
+        self.resume = resume
+        self.date_generation = date_generation
+        self.largeur, self.hauteur = A4
+        self.page = 0
+
+    def texte(self, x, y, texte, taille=9, gras=False, couleur=colors.black, align="left"):
+        self.c.setFont("Helvetica-Bold" if gras else "Helvetica", taille)
+        self.c.setFillColor(couleur)
+        if align == "center":
+            self.c.drawCentredString(x, y, texte)
+        else:
+            self.c.drawString(x, y, texte)
+
+    def pied_de_page(self):
+        date = self.date_generation
+        self.c.setStrokeColor(colors.HexColor("#eeeeee"))
+        self.c.line(PDF_MARGE, PDF_MARGE, self.largeur - PDF_MARGE, PDF_MARGE)
+        self.texte(
+            self.largeur / 2, PDF_MARGE - 5 * mm,
+            f"Presia 2025, tous droits réservés — Généré le {date:%d/%m/%Y} à {date:%H:%M} — page {self.page}",
+            taille=8, couleur=colors.grey, align="center"
+        )
+
+    def nouvelle_page(self):
+        if self.page:
+            self.pied_de_page()
+            self.c.showPage()
+        self.page += 1
+        y = self.hauteur - PDF_MARGE
+
+        if self.page == 1:
+            cours = self.resume.cours
+            totaux = self.resume.totaux
+            self.texte(self.largeur / 2, y - 5 * mm, "Presia App", taille=16, gras=True, couleur=PDF_BLEU, align="center")
+            self.texte(self.largeur / 2, y - 11 * mm, "Système de gestion des présences - Statistiques",
+                       taille=9, couleur=colors.grey, align="center")
+            self.texte(self.largeur / 2, y - 21 * mm,
+                       f"{cours.nom} - {cours.classe.nom} ({self.resume.total_seances} séances)",
+                       taille=12, gras=True, align="center")
+            self.texte(self.largeur / 2, y - 28 * mm,
+                       f"Présents : {totaux['present']}   Retards : {totaux['retard']}   "
+                       f"Absents : {totaux['absent']}   Motif : {totaux['motif']}",
+                       taille=10, align="center")
+            y -= 36 * mm
+
+        # En-tête du tableau, répété sur chaque page
+        self.c.setFillColor(colors.HexColor("#f2f2f2"))
+        self.c.rect(PDF_MARGE, y - PDF_HAUTEUR_LIGNE, sum(l for _, l in PDF_COLONNES), PDF_HAUTEUR_LIGNE, stroke=0, fill=1)
+        x = PDF_MARGE
+        for titre, largeur in PDF_COLONNES:
+            self.texte(x + 2 * mm, y - PDF_HAUTEUR_LIGNE + 2 * mm, titre, gras=True)
+            x += largeur
+        return y - PDF_HAUTEUR_LIGNE
+
+    def dessiner(self):
+        y = self.nouvelle_page()
+        bas_de_page = PDF_MARGE + PDF_HAUTEUR_LIGNE
+
+        for es in self.resume.etudiants_stats:
+            if y - PDF_HAUTEUR_LIGNE < bas_de_page:
+                y = self.nouvelle_page()
+            y -= PDF_HAUTEUR_LIGNE
+            base = y + 2 * mm
+            taux = es.taux_presence
+
+            valeurs = [es.etudiant.get_full_name()[:45], es.present, es.retard, es.absent, es.motif]
+            x = PDF_MARGE
+            for valeur, (_, largeur) in zip(valeurs, PDF_COLONNES):
+                self.texte(x + 2 * mm, base, str(valeur))
+                x += largeur
+            self.texte(x + 2 * mm, base, f"{taux:.0f}%", gras=True, couleur=PDF_VERT if taux >= 75 else PDF_ROUGE)
+
+            self.c.setStrokeColor(colors.HexColor("#dddddd"))
+            self.c.line(PDF_MARGE, y, x + PDF_COLONNES[-1][1], y)
+
+        self.pied_de_page()
+        self.c.save()
+
+
+
+def rapport_statistiques(resume, date_generation):
+    """
+    Dessine le rapport PDF des statistiques d'un cours (``StatsCours``)
+    directement avec reportlab dans un fichier temporaire prêt à être
+    streamé. Les longues listes d'étudiants sont paginées avec l'en-tête
+    du tableau répété.
+    """
+    fichier = tempfile.TemporaryFile(suffix=".pdf")
+    _RenduStatistiques(fichier, resume, date_generation).dessiner()
+    fichier.seek(0)
+    return fichier
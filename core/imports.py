@@ -0,0 +1,144 @@
+# core/imports.py
+
+import csv
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .cache import invalider_stats
+from .models import Etudiant
+from .recherche import indexer_etudiants
+
+
+TAILLE_LOT = 500
+
+CHAMPS = {
+    'matricule': Etudiant._meta.get_field('matricule'),
+    'nom': Etudiant._meta.get_field('nom'),
+    'prenom': Etudiant._meta.get_field('prenom'),
+}
+
+
+# -------------------
+# LECTURE DU FICHIER
+# -------------------
+
+def lire_lignes(fichier):
+    """
+    Itère sur les lignes d'un fichier Excel ou CSV sans le charger en
+    mémoire. Produit des tuples ``(numero_ligne, valeurs)`` en sautant
+    l'en-tête.
+    """
+    if fichier.name.endswith('.xlsx'):
+        import openpyxl  # chargé au premier import Excel, pas au démarrage
+        wb = openpyxl.load_workbook(fichier, read_only=True, data_only=True)
+        try:
+            lignes = wb.active.iter_rows(values_only=True)
+            yield from islice(enumerate(lignes, start=1), 1, None)
+        finally:
+            wb.close()
+    else:
+        lignes = csv.reader(ligne.decode('utf-8') for ligne in fichier)
+        yield from islice(enumerate(lignes, start=1), 1, None)
+
+
+def _lots(iterable, taille):
+    iterateur = iter(iterable)
+    while lot := list(islice(iterateur, taille)):
+        yield lot
+
+
+# -------------------
+# IMPORT
+# -------------------
+
+def _valider_ligne(valeurs):
+    """Retourne ``(donnees, erreur)`` ; ``donnees`` est None pour une ligne vide"""
+    if len(valeurs) < 2 or not valeurs[0] or not valeurs[1]:
+        return None, None
+
+    donnees = {
+        'matricule': str(valeurs[0]).strip(),
+        'nom': str(valeurs[1]).strip(),
+        'prenom': str(valeurs[2]).strip() if len(valeurs) > 2 and valeurs[2] is not None else "",
+    }
+    for nom_champ, champ in CHAMPS.items():
+        if len(donnees[nom_champ]) > champ.max_length:
+            return donnees, f"{champ.verbose_name} trop long ({champ.max_length} caractères max)"
+    return donnees, None
+
+
+def importer_etudiants(fichier, classe, mode='create', taille_lot=TAILLE_LOT):
+    """
+    Importe les étudiants d'un fichier dans ``classe`` par lots.
+
+    Pour chaque lot, les matricules existants sont chargés en une requête
+    ``IN``, puis les nouveaux étudiants sont créés avec ``bulk_create`` et,
+    en mode ``update``, les existants modifiés avec ``bulk_update``.
+
+    Retourne un rapport ``{"crees", "modifies", "inchanges", "erreurs"}`` où
+    ``erreurs`` est une liste de ``{"ligne", "matricule", "message"}``.
+    """
+    rapport = {"crees": 0, "modifies": 0, "inchanges": 0, "erreurs": []}
+
+    for lot in _lots(lire_lignes(fichier), taille_lot):
+        # Dernière occurrence d'un matricule dans le lot en mode update,
+        # première en mode create (comme get_or_create / update_or_create)
+        lignes = {}
+        for numero, valeurs in lot:
+            donnees, erreur = _valider_ligne(valeurs)
+            if erreur:
+                rapport["erreurs"].append(
+                    {"ligne": numero, "matricule": donnees['matricule'], "message": erreur}
+                )
+            elif donnees and (mode == 'update' or donnees['matricule'] not in lignes):
+                lignes[donnees['matricule']] = (numero, donnees)
+
+        if not lignes:
+            continue
+
+        try:
+            with transaction.atomic():
+                existants = Etudiant.objects.only('id', 'matricule', 'nom', 'prenom', 'classe_id').in_bulk(
+                    list(lignes), field_name='matricule'
+                )
+
+                nouveaux = [
+                    Etudiant(classe=classe, **donnees)
+                    for matricule, (_, donnees) in lignes.items()
+                    if matricule not in existants
+                ]
+                Etudiant.objects.bulk_create(nouveaux)
+
+                a_modifier = []
+                if mode == 'update':
+                    maintenant = timezone.now()
+                    for matricule, etudiant in existants.items():
+                        donnees = lignes[matricule][1]
+                        if (etudiant.nom, etudiant.prenom, etudiant.classe_id) == (donnees['nom'], donnees['prenom'], classe.id):
+                            continue
+                        etudiant.nom = donnees['nom']
+                        etudiant.prenom = donnees['prenom']
+                        etudiant.classe = classe
+                        etudiant.updated_at = maintenant
+                        a_modifier.append(etudiant)
+                    Etudiant.objects.bulk_update(a_modifier, ['nom', 'prenom', 'classe', 'updated_at'])
+
+                # bulk_create / bulk_update n'émettent pas de signaux
+                if nouveaux or a_modifier:
+                    indexer_etudiants([e.pk for e in nouveaux + a_modifier])
+        except DatabaseError as e:
+            rapport["erreurs"].extend(
+                {"ligne": numero, "matricule": matricule, "message": str(e)}
+                for matricule, (numero, _) in lignes.items()
+            )
+            continue
+
+        if nouveaux or a_modifier:
+            invalider_stats()
+        rapport["crees"] += len(nouveaux)
+        rapport["modifies"] += len(a_modifier)
+        rapport["inchanges"] += len(existants) - len(a_modifier)
+
+    return rapport
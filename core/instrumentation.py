@@ -0,0 +1,226 @@
+# core/instrumentation.py
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+
+# Bornes supérieures (ms) des classes de l'histogramme des durées
+BORNES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+CLE_PROCESSUS = "instrumentation:processus"
+
+_mesure_courante = ContextVar("mesure_courante", default=None)
+
+
+# -------------------
+# MESURE D'UNE REQUÊTE
+# -------------------
+
+class Mesure:
+    """Compteurs d'une requête HTTP, alimentés par le wrapper SQL et le rendu"""
+
+    __slots__ = ("requetes", "duree_sql", "duree_rendu", "_rendus_en_cours")
+
+    def __init__(self):
+        self.requetes = 0
+        self.duree_sql = 0.0
+        self.duree_rendu = 0.0
+        self._rendus_en_cours = 0
+
+    def activer(self):
+        return _mesure_courante.set(self)
+
+    @staticmethod
+    def desactiver(jeton):
+        _mesure_courante.reset(jeton)
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.requetes += 1
+            self.duree_sql += time.perf_counter() - debut
+
+
+def _executer_mesure(execute, sql, params, many, context):
+    """
+    Wrapper d'exécution SQL installé en permanence sur chaque connexion.
+    La mesure est retrouvée par la ContextVar, copiée dans les threads de
+    ``sync_to_async`` : les requêtes de l'ORM asynchrone sont comptées.
+    """
+    mesure = _mesure_courante.get()
+    if mesure is None:
+        return execute(sql, params, many, context)
+    return mesure(execute, sql, params, many, context)
+
+
+def installer_mesure_sql(connexion):
+    if _executer_mesure not in connexion.execute_wrappers:
+        connexion.execute_wrappers.insert(0, _executer_mesure)
+
+
+class TemplateMesure(Template):
+    """Gabarit dont le rendu est chronométré dans la mesure courante"""
+
+    def render(self, context=None, request=None):
+        mesure = _mesure_courante.get()
+        if mesure is None:
+            return super().render(context, request)
+
+        # Un rendu imbriqué (render_to_string dans une balise) est déjà
+        # compté dans le rendu englobant
+        mesure._rendus_en_cours += 1
+        debut = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            mesure._rendus_en_cours -= 1
+            if not mesure._rendus_en_cours:
+                mesure.duree_rendu += time.perf_counter() - debut
+
+
+class DjangoTemplatesMesures(DjangoTemplates):
+    """Moteur de gabarits Django standard avec chronométrage des rendus"""
+
+    def from_string(self, template_code):
+        return TemplateMesure(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TemplateMesure(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# -------------------
+# HISTOGRAMMES PAR VUE
+# -------------------
+
+def _agregat_vide():
+    return {
+        "n": 0,
+        "duree_ms": 0.0,
+        "sql_ms": 0.0,
+        "requetes": 0,
+        "requetes_max": 0,
+        "histogramme": [0] * (len(BORNES_MS) + 1),
+    }
+
+
+def _fusionner(cible, agregat):
+    cible["n"] += agregat["n"]
+    cible["duree_ms"] += agregat["duree_ms"]
+    cible["sql_ms"] += agregat["sql_ms"]
+    cible["requetes"] += agregat["requetes"]
+    cible["requetes_max"] = max(cible["requetes_max"], agregat["requetes_max"])
+    cible["histogramme"] = [a + b for a, b in zip(cible["histogramme"], agregat["histogramme"])]
+
+
+def _classe(duree_ms):
+    for i, borne in enumerate(BORNES_MS):
+        if duree_ms <= borne:
+            return i
+    return len(BORNES_MS)
+
+
+class Histogrammes:
+    """
+    Agrégats glissants par nom d'URL, découpés par minute et conservés sur
+    ``INSTRUMENTATION_FENETRE`` secondes. Chaque processus tient les siens
+    et les publie régulièrement dans le cache pour l'endpoint de lecture.
+    """
+
+    PAS = 60
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._minutes = {}
+        self._publie_a = 0.0
+
+    def _fenetre(self):
+        return getattr(settings, "INSTRUMENTATION_FENETRE", 900)
+
+    def enregistrer(self, vue, duree_ms, sql_ms, requetes):
+        minute = int(time.time() // self.PAS)
+        with self._verrou:
+            agregat = self._minutes.setdefault(minute, {}).setdefault(vue, _agregat_vide())
+            agregat["n"] += 1
+            agregat["duree_ms"] += duree_ms
+            agregat["sql_ms"] += sql_ms
+            agregat["requetes"] += requetes
+            agregat["requetes_max"] = max(agregat["requetes_max"], requetes)
+            agregat["histogramme"][_classe(duree_ms)] += 1
+
+            limite = minute - self._fenetre() // self.PAS
+            for ancienne in [m for m in self._minutes if m <= limite]:
+                del self._minutes[ancienne]
+
+    def instantane(self):
+        """Agrégats de la fenêtre courante, fusionnés par vue"""
+        limite = int(time.time() // self.PAS) - self._fenetre() // self.PAS
+        vues = {}
+        with self._verrou:
+            for minute, par_vue in self._minutes.items():
+                if minute <= limite:
+                    continue
+                for vue, agregat in par_vue.items():
+                    _fusionner(vues.setdefault(vue, _agregat_vide()), agregat)
+        return vues
+
+    def publier(self, force=False):
+        """Copie l'instantané du processus dans le cache (au plus toutes les 10 s)"""
+        maintenant = time.time()
+        if not force and maintenant - self._publie_a < 10:
+            return
+        self._publie_a = maintenant
+        cle = f"instrumentation:{os.getpid()}"
+        cache.set(cle, self.instantane(), timeout=self._fenetre())
+        processus = cache.get(CLE_PROCESSUS) or set()
+        if cle not in processus:
+            cache.set(CLE_PROCESSUS, processus | {cle}, timeout=None)
+
+
+histogrammes = Histogrammes()
+
+
+def _percentile(histogramme, n, rang):
+    """Borne supérieure de la classe contenant le percentile ``rang`` (None au-delà de la dernière)"""
+    cumul = 0
+    for i, effectif in enumerate(histogramme):
+        cumul += effectif
+        if cumul >= n * rang:
+            return BORNES_MS[i] if i < len(BORNES_MS) else None
+    return None
+
+
+def statistiques_vues():
+    """Statistiques par vue, tous processus confondus"""
+    histogrammes.publier(force=True)
+    processus = cache.get(CLE_PROCESSUS) or set()
+    vues = {}
+    for instantane in cache.get_many(list(processus)).values():
+        for vue, agregat in instantane.items():
+            _fusionner(vues.setdefault(vue, _agregat_vide()), agregat)
+
+    return {
+        vue: {
+            "requetes_http": a["n"],
+            "duree_moyenne_ms": round(a["duree_ms"] / a["n"], 1),
+            "duree_p50_ms": _percentile(a["histogramme"], a["n"], 0.5),
+            "duree_p95_ms": _percentile(a["histogramme"], a["n"], 0.95),
+            "sql_moyen_ms": round(a["sql_ms"] / a["n"], 1),
+            "requetes_sql_moyennes": round(a["requetes"] / a["n"], 1),
+            "requetes_sql_max": a["requetes_max"],
+            "histogramme": dict(zip([*map(str, BORNES_MS), "+"], a["histogramme"])),
+        }
+        for vue, a in sorted(vues.items())
+        if a["n"]
+    }
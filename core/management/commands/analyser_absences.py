@@ -0,0 +1,22 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.alertes import analyser_absences
+
+
+class Command(BaseCommand):
+    help = (
+        "Met à jour les alertes d'absentéisme (taux sous le seuil, absences consécutives) "
+        "pour les cours modifiés depuis le dernier passage ; à lancer chaque nuit"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--complet', action='store_true',
+            help="Réanalyser tous les cours (après un changement de seuils ou des suppressions)"
+        )
+
+    def handle(self, *args, complet, **options):
+        compte_rendu = analyser_absences(complet=complet)
+        self.stdout.write(json.dumps(compte_rendu, indent=2, ensure_ascii=False))
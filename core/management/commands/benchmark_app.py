@@ -0,0 +1,260 @@
+import json
+import platform
+import re
+import statistics
+import subprocess
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cache import invalider_stats
+from core.donnees_fictives import generer_ecole
+from core.models import Cours, Etudiant, User
+
+
+# Paramètres d'une classe fictive ; l'échelle est le nombre de classes
+CLASSE_TYPE = {"etudiants_par_classe": 40, "cours_par_classe": 6, "seances_par_cours": 24}
+
+
+def _commit_git():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _sql_ms(response):
+    """Durée SQL annoncée par l'en-tête Server-Timing (voir InstrumentationMiddleware)"""
+    trouve = re.search(r"\bsql;dur=([\d.]+)", response.get("Server-Timing", ""))
+    return float(trouve.group(1)) if trouve else None
+
+
+# -------------------
+# SCÉNARIOS
+# -------------------
+
+def scenarios():
+    """
+    Scénarios mesurés sur la base courante : ``(nom, utilisateur, méthode,
+    url, données, préparation)``. Les données de chaque répétition sont
+    calculées par ``données(i)`` ; ``préparation`` est appelée avant chaque
+    mesure.
+    """
+    cours = (
+        Cours.objects.annotate(nb=Count('seances__presences'))
+        .select_related('enseignant', 'classe').order_by('-nb', 'id').first()
+    )
+    if cours is None:
+        raise CommandError("Aucun cours à mesurer : générez d'abord des données (generate_fake_school)")
+    enseignant = cours.enseignant
+    admin = User.objects.filter(role='admin').order_by('id').first()
+    seance = cours.seances.filter(is_annulee=False).order_by('-date', 'id').first()
+    etudiant = Etudiant.objects.filter(classe_id=cours.classe_id).order_by('id').first()
+    etudiant_ids = list(Etudiant.objects.filter(classe_id=cours.classe_id).values_list('id', flat=True))
+    statuts = ["present", "retard", "absent", "motif"]
+
+    def appel(i):
+        # Statuts décalés à chaque répétition : chaque POST écrit réellement
+        return {"presences_data": json.dumps({pk: statuts[(pk + i) % 4] for pk in etudiant_ids})}
+
+    liste = [
+        ("statistiques (froid)", enseignant, "get", reverse("core:statistiques"), None, invalider_stats),
+        ("statistiques", enseignant, "get", reverse("core:statistiques"), None, None),
+        ("cours_detail", enseignant, "get", reverse("core:cours_detail", args=[cours.pk]), None, None),
+        ("export_excel", enseignant, "get", reverse("core:export_excel", args=[cours.pk]), None, None),
+        ("export_pdf_statistiques", enseignant, "get",
+         reverse("core:export_pdf_statistiques", args=[cours.pk]), None, None),
+    ]
+    if seance is not None:
+        url = reverse("core:appel_presence", args=[seance.pk])
+        liste += [
+            ("appel_presence GET", enseignant, "get", url, None, None),
+            ("appel_presence POST", enseignant, "post", url, appel, None),
+        ]
+    if etudiant is not None:
+        url = reverse("core:api_recherche_etudiants")
+        liste += [
+            ("api_recherche_etudiants prefixe", enseignant, "get", url, lambda i: {"q": etudiant.nom[:3]}, None),
+            ("api_recherche_etudiants liste", enseignant, "get", url, None, None),
+        ]
+        if admin is not None:
+            liste.append((
+                "api_recherche_etudiants admin", admin, "get", url,
+                lambda i: {"q": f"{etudiant.nom} {etudiant.prenom}"}, None,
+            ))
+    liste.append((
+        "api_recherche_cours", enseignant, "get", reverse("core:api_recherche_cours"),
+        lambda i: {"q": cours.nom[:4]}, None,
+    ))
+    return liste
+
+
+def mesurer(scenario, repetitions):
+    nom, utilisateur, methode, url, donnees, preparation = scenario
+    client = Client()
+    client.force_login(utilisateur)
+
+    def executer(i):
+        response = getattr(client, methode)(url, donnees(i) if donnees else None)
+        # Les exports sont streamés : la mesure inclut la production du fichier
+        taille = len(b"".join(response.streaming_content)) if response.streaming else len(response.content)
+        response.close()
+        return response, taille
+
+    executer(0)  # chauffe (gabarits, caches de processus)
+    durees, sql, requetes = [], [], []
+    for i in range(1, repetitions + 1):
+        if preparation:
+            preparation()
+        with CaptureQueriesContext(connection) as ctx:
+            debut = time.perf_counter()
+            response, taille = executer(i)
+            durees.append((time.perf_counter() - debut) * 1000)
+        requetes.append(len(ctx.captured_queries))
+        if _sql_ms(response) is not None:
+            sql.append(_sql_ms(response))
+
+    client.logout()
+    return nom, {
+        "statut": response.status_code,
+        "mediane_ms": round(statistics.median(durees), 2),
+        "min_ms": round(min(durees), 2),
+        "max_ms": round(max(durees), 2),
+        "sql_mediane_ms": round(statistics.median(sql), 2) if sql else None,
+        "requetes": max(requetes),
+        "taille_octets": taille,
+    }
+
+
+# -------------------
+# COMPARAISON
+# -------------------
+
+def regressions(rapport, reference, seuil):
+    """Vues plus lentes (médiane × ``seuil``) ou plus bavardes qu'à la référence"""
+    anciennes = {
+        (echelle["echelle"], vue): mesure
+        for echelle in reference["echelles"]
+        for vue, mesure in echelle["vues"].items()
+    }
+    trouvees = []
+    for echelle in rapport["echelles"]:
+        for vue, mesure in echelle["vues"].items():
+            ancienne = anciennes.get((echelle["echelle"], vue))
+            if ancienne is None:
+                continue
+            ratio = mesure["mediane_ms"] / max(ancienne["mediane_ms"], 0.01)
+            if ratio > seuil or mesure["requetes"] > ancienne["requetes"]:
+                trouvees.append({
+                    "echelle": echelle["echelle"],
+                    "vue": vue,
+                    "ratio_duree": round(ratio, 2),
+                    "requetes": [ancienne["requetes"], mesure["requetes"]],
+                })
+    return trouvees
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure les vues principales (durée, durée SQL, nombre de requêtes) sur des écoles "
+        "fictives de plusieurs tailles et produit un rapport JSON comparable entre commits"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--echelles', type=int, nargs='+', default=[1, 10],
+            help="Nombres de classes fictives (40 étudiants, 6 cours, 24 séances par cours)",
+        )
+        parser.add_argument('--repetitions', type=int, default=5)
+        parser.add_argument('--graine', type=int, default=1)
+        parser.add_argument(
+            '--base-courante', action='store_true',
+            help="Mesurer la base courante telle quelle au lieu de bases temporaires générées",
+        )
+        parser.add_argument('--sortie', help="Fichier du rapport JSON (sinon : sortie standard)")
+        parser.add_argument('--comparer', help="Rapport JSON de référence (commit précédent)")
+        parser.add_argument('--seuil', type=float, default=1.25, help="Ratio de durée signalé comme régression")
+
+    def handle(self, *args, echelles, repetitions, graine, base_courante, sortie, comparer, seuil, **options):
+        rapport = {
+            "commit": _commit_git(),
+            "date": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "base": connection.vendor,
+            "repetitions": repetitions,
+            "echelles": [],
+        }
+
+        # Cache isolé : ni les statistiques en cache du site, ni celles d'une
+        # autre échelle ; rapports stockés dans un dossier temporaire
+        with tempfile.TemporaryDirectory() as medias, override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark",
+            }},
+            INSTRUMENTATION_SERVER_TIMING=True,
+            MEDIA_ROOT=medias,
+        ):
+            if base_courante:
+                rapport["echelles"].append({"echelle": None, "donnees": None, "vues": self.mesurer(repetitions)})
+            else:
+                for echelle in echelles:
+                    rapport["echelles"].append(self.mesurer_echelle(echelle, repetitions, graine))
+
+        if comparer:
+            with open(comparer, encoding="utf-8") as fichier:
+                rapport["regressions"] = regressions(rapport, json.load(fichier), seuil)
+
+        texte = json.dumps(rapport, indent=2, ensure_ascii=False)
+        if sortie:
+            with open(sortie, "w", encoding="utf-8") as fichier:
+                fichier.write(texte)
+        else:
+            self.stdout.write(texte)
+
+        if rapport.get("regressions"):
+            for regression in rapport["regressions"]:
+                self.stderr.write(
+                    f"Régression échelle {regression['echelle']} - {regression['vue']} : "
+                    f"durée ×{regression['ratio_duree']}, requêtes {regression['requetes'][0]} -> {regression['requetes'][1]}"
+                )
+            raise CommandError(f"{len(rapport['regressions'])} régression(s) par rapport à {comparer}")
+
+    def mesurer_echelle(self, echelle, repetitions, graine):
+        """Génère une école de ``echelle`` classes dans une base temporaire et la mesure"""
+        anciennes_bases = setup_databases(
+            verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS}, serialized_aliases=set()
+        )
+        try:
+            debut = time.perf_counter()
+            donnees = generer_ecole(nb_classes=echelle, graine=graine, **CLASSE_TYPE)
+            User.objects.create_user(username="bench_admin", password="bench_admin", role="admin")
+            self.stderr.write(
+                f"Échelle {echelle} : {donnees['presences']} présences générées en {time.perf_counter() - debut:.1f} s"
+            )
+            return {"echelle": echelle, "donnees": donnees, "vues": self.mesurer(repetitions)}
+        finally:
+            teardown_databases(anciennes_bases, verbosity=0)
+
+    def mesurer(self, repetitions):
+        vues = {}
+        for scenario in scenarios():
+            nom, resultat = mesurer(scenario, repetitions)
+            vues[nom] = resultat
+            self.stderr.write(
+                f"  {nom:<34} {resultat['mediane_ms']:>9.1f} ms {resultat['requetes']:>4} requêtes"
+            )
+        return vues
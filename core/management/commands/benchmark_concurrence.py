@@ -0,0 +1,171 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from core.management.commands.benchmark_app import _commit_git
+from core.models import Cours, Etudiant, Seance
+
+
+# Même gestionnaire de processus des deux côtés : seule la classe de worker
+# change. (``uvicorn --workers`` seul laisse les connexions keep-alive
+# subir ~40 ms d'attente Nagle / ACK retardé, ce qui fausserait la mesure.)
+SERVEURS = {
+    "wsgi": lambda port, workers, threads: [
+        sys.executable, "-m", "gunicorn", "gestion_presences.wsgi:application",
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+        "--log-level", "warning",
+    ],
+    "asgi": lambda port, workers, threads: [
+        sys.executable, "-m", "gunicorn", "gestion_presences.asgi:application",
+        "--worker-class", "uvicorn.workers.UvicornWorker",
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+        "--log-level", "warning",
+    ],
+}
+
+
+def _centile(durees, rang):
+    return round(durees[min(len(durees) - 1, int(len(durees) * rang))], 2)
+
+
+def urls_api():
+    """Endpoints JSON mesurés et enseignant qui les appelle"""
+    cours = Cours.objects.filter(seances__isnull=False).select_related('enseignant').order_by('id').first()
+    if cours is None:
+        raise CommandError("Aucun cours avec séances : générez d'abord des données (generate_fake_school)")
+    seance = Seance.objects.filter(cours=cours).order_by('-date', 'id').first()
+    etudiant = Etudiant.objects.filter(classe_id=cours.classe_id).order_by('id').first()
+    urls = [
+        reverse("core:api_stats_cours", args=[cours.pk]),
+        reverse("core:api_presences_seance", args=[seance.pk]),
+        f"{reverse('core:api_recherche_cours')}?q={cours.nom[:3]}",
+    ]
+    if etudiant is not None:
+        urls.append(f"{reverse('core:api_recherche_etudiants')}?q={etudiant.nom[:3]}")
+    return cours.enseignant, urls
+
+
+def _attendre(processus, port, delai=30):
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if processus.poll() is not None:
+            raise CommandError(f"Le serveur s'est arrêté au démarrage (code {processus.returncode})")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise CommandError(f"Le serveur n'écoute pas sur le port {port} après {delai} s")
+
+
+@contextmanager
+def lancer_serveur(nom, port, workers, threads):
+    """Serveur ``nom`` (wsgi ou asgi) démarré en sous-processus sur la base courante"""
+    env = {**os.environ, "ALLOWED_HOSTS": ",".join({*settings.ALLOWED_HOSTS, "127.0.0.1"})}
+    processus = subprocess.Popen(SERVEURS[nom](port, workers, threads), cwd=settings.BASE_DIR, env=env)
+    try:
+        _attendre(processus, port)
+        yield processus
+    finally:
+        processus.terminate()
+        processus.wait(timeout=30)
+
+
+def ouvrir_session(utilisateur):
+    """Session authentifiée créée directement en base (pas de formulaire de connexion)"""
+    session = SessionStore()
+    session[SESSION_KEY] = str(utilisateur.pk)
+    session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    session[HASH_SESSION_KEY] = utilisateur.get_session_auth_hash()
+    session.create()
+    return session
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare sous charge concurrente les endpoints JSON servis en WSGI (gunicorn) "
+        "et en ASGI (gunicorn + workers uvicorn) : débit et latences, rapport JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--serveurs', nargs='+', choices=sorted(SERVEURS), default=["wsgi", "asgi"])
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=1, help="Threads par worker gunicorn (WSGI)")
+        parser.add_argument('--concurrences', type=int, nargs='+', default=[1, 10, 50])
+        parser.add_argument('--requetes', type=int, default=500, help="Requêtes par niveau de concurrence")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--sortie', help="Fichier du rapport JSON (sinon : sortie standard)")
+
+    def handle(self, *args, serveurs, workers, threads, concurrences, requetes, port, sortie, **options):
+        enseignant, urls = urls_api()
+        session = ouvrir_session(enseignant)
+        rapport = {
+            "commit": _commit_git(),
+            "date": timezone.now().isoformat(),
+            "base": settings.DATABASES["default"]["ENGINE"],
+            "workers": workers,
+            "threads_wsgi": threads,
+            "urls": urls,
+            "resultats": [],
+        }
+        try:
+            for serveur in serveurs:
+                with lancer_serveur(serveur, port, workers, threads):
+                    for concurrence in concurrences:
+                        resultat = self.charger(port, urls, session.session_key, concurrence, requetes)
+                        rapport["resultats"].append({"serveur": serveur, "concurrence": concurrence, **resultat})
+                        self.stderr.write(
+                            f"{serveur} c={concurrence:<4} {resultat['debit_rps']:>8.1f} req/s "
+                            f"p50 {resultat['p50_ms']:>7.1f} ms  p95 {resultat['p95_ms']:>7.1f} ms  "
+                            f"erreurs {resultat['erreurs']}"
+                        )
+        finally:
+            session.delete()
+
+        texte = json.dumps(rapport, indent=2, ensure_ascii=False)
+        if sortie:
+            with open(sortie, "w", encoding="utf-8") as fichier:
+                fichier.write(texte)
+        else:
+            self.stdout.write(texte)
+
+    @staticmethod
+    def charger(port, urls, cle_session, concurrence, nombre):
+        """``nombre`` requêtes réparties sur ``urls``, ``concurrence`` clients simultanés"""
+        def client(rang):
+            with requests.Session() as http:
+                http.cookies.set(settings.SESSION_COOKIE_NAME, cle_session)
+                mesures = []
+                for i in range(rang, nombre, concurrence):
+                    debut = time.perf_counter()
+                    reponse = http.get(f"http://127.0.0.1:{port}{urls[i % len(urls)]}", allow_redirects=False)
+                    mesures.append(((time.perf_counter() - debut) * 1000, reponse.status_code == 200))
+                return mesures
+
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrence) as executeur:
+            mesures = [m for resultat in executeur.map(client, range(concurrence)) for m in resultat]
+        duree = time.perf_counter() - debut
+
+        durees = sorted(d for d, _ in mesures)
+        return {
+            "debit_rps": round(len(mesures) / duree, 1),
+            "p50_ms": _centile(durees, 0.5),
+            "p95_ms": _centile(durees, 0.95),
+            "p99_ms": _centile(durees, 0.99),
+            "moyenne_ms": round(statistics.fmean(durees), 2),
+            "erreurs": sum(not ok for _, ok in mesures),
+        }
@@ -0,0 +1,84 @@
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Bibliothèques lourdes qui ne doivent être chargées qu'au premier export
+MODULES_LOURDS = ["numpy", "openpyxl", "reportlab", "PIL"]
+
+# Budget d'import de core.urls (vues, formulaires, services) en ms
+BUDGET_MS = 150
+
+SCRIPT = (
+    "import sys, django; django.setup(); import core.urls; "
+    "print(' '.join(m for m in %r if m in sys.modules))" % (MODULES_LOURDS,)
+)
+
+LIGNE_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def mesurer_imports():
+    """
+    Lance un interpréteur neuf avec ``-X importtime`` qui configure Django et
+    importe ``core.urls`` (ce que fait un worker au démarrage). Retourne les
+    durées cumulées par module (ms), les bibliothèques lourdes chargées et le
+    pic mémoire du processus (Ko).
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE)}
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if resultat.returncode:
+        raise CommandError(resultat.stderr.strip().splitlines()[-1] if resultat.stderr.strip() else "échec de l'import")
+
+    cumules = {}
+    for ligne in resultat.stderr.splitlines():
+        trouve = LIGNE_IMPORTTIME.match(ligne)
+        if trouve:
+            cumules[trouve.group(4)] = int(trouve.group(2)) / 1000
+    return {
+        "cumules": cumules,
+        "modules_lourds": resultat.stdout.split(),
+        # ru_maxrss est en Ko sous Linux ; seul enfant lancé par cette commande
+        "rss_max_ko": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le temps d'import de l'application au démarrage d'un worker (python -X importtime) "
+        "et vérifie que numpy, openpyxl et reportlab ne sont pas chargés"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help="Modules les plus coûteux affichés")
+        parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+
+    def handle(self, *args, top, budget_ms, **options):
+        mesure = mesurer_imports()
+        cumules = mesure["cumules"]
+        core_urls = cumules.get("core.urls", 0.0)
+        rapport = {
+            "python": sys.version.split()[0],
+            "core_urls_ms": round(core_urls, 1),
+            "budget_ms": budget_ms,
+            "rss_max_mo": round(mesure["rss_max_ko"] / 1024, 1),
+            "modules_lourds_charges": mesure["modules_lourds"],
+            "plus_couteux": [
+                {"module": nom, "cumule_ms": round(duree, 1)}
+                for nom, duree in sorted(cumules.items(), key=lambda item: -item[1])[:top]
+            ],
+        }
+        self.stdout.write(json.dumps(rapport, indent=2, ensure_ascii=False))
+
+        if mesure["modules_lourds"]:
+            raise CommandError(f"Chargés au démarrage : {', '.join(mesure['modules_lourds'])}")
+        if core_urls > budget_ms:
+            raise CommandError(f"Import de core.urls : {core_urls:.0f} ms > budget {budget_ms:.0f} ms")
@@ -0,0 +1,78 @@
+import io
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.exports import export_pdf_statistiques
+from core.models import Classe, Cours, Etudiant
+from core.stats import StatsCours, StatsEtudiant
+
+
+def stats_fictives(nb_etudiants, nb_seances=30):
+    """Statistiques d'un cours fictif, construites sans base de données"""
+    classe = Classe(nom="Classe bench")
+    cours = Cours(nom="Cours bench", classe=classe)
+    etudiants_stats = []
+    for i in range(nb_etudiants):
+        present = (i * 7) % (nb_seances + 1)
+        retard = min(nb_seances - present, i % 3)
+        absent = nb_seances - present - retard
+        etudiants_stats.append(StatsEtudiant(
+            Etudiant(matricule=f"B{i:06d}", nom=f"Nom{i}", prenom="Prénom", classe=classe),
+            nb_seances, present=present, retard=retard, absent=absent,
+        ))
+    return StatsCours(cours, nb_seances, etudiants_stats)
+
+
+def rendu_reportlab(resume):
+    fichier = export_pdf_statistiques(resume, timezone.now())
+    taille = len(fichier.read())
+    fichier.close()
+    return taille
+
+
+def rendu_pisa(resume):
+    """Ancien rendu : template HTML converti par xhtml2pdf"""
+    from xhtml2pdf import pisa
+
+    stats = {
+        "cours": resume.cours,
+        "total_seances": resume.total_seances,
+        "global": resume.totaux,
+        "etudiants_stats": resume.etudiants_stats,
+        "date_generation": timezone.now(),
+    }
+    html_string = render_to_string("core/statistiques_pdf.html", {"stats": stats})
+    sortie = io.BytesIO()
+    pisa.CreatePDF(src=html_string, dest=sortie, encoding='UTF-8')
+    return len(sortie.getvalue())
+
+
+class Command(BaseCommand):
+    help = "Compare le rendu PDF reportlab à l'ancien rendu xhtml2pdf (temps et mémoire)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailles', type=int, nargs='+', default=[50, 500, 5000])
+        parser.add_argument('--sans-pisa', action='store_true', help="Ne mesurer que le rendu reportlab")
+
+    def handle(self, *args, tailles, sans_pisa, **options):
+        moteurs = [("reportlab", rendu_reportlab)]
+        if not sans_pisa:
+            moteurs.append(("pisa", rendu_pisa))
+
+        self.stdout.write(f"{'moteur':<10} {'étudiants':>9} {'temps (s)':>10} {'pic mém. (Mo)':>14} {'taille (Ko)':>12}")
+        for nb in tailles:
+            resume = stats_fictives(nb)
+            for nom, rendu in moteurs:
+                tracemalloc.start()
+                debut = time.perf_counter()
+                taille = rendu(resume)
+                duree = time.perf_counter() - debut
+                pic = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.stdout.write(
+                    f"{nom:<10} {nb:>9} {duree:>10.3f} {pic / 1024 / 1024:>14.1f} {taille / 1024:>12.1f}"
+                )
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.donnees_fictives import generer_ecole, purger_ecole
+
+
+class Command(BaseCommand):
+    help = "Génère une école fictive (classes, enseignants, cours, séances et présences) pour les essais de charge"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classes', type=int, default=10)
+        parser.add_argument('--etudiants-par-classe', type=int, default=40)
+        parser.add_argument('--cours-par-classe', type=int, default=6)
+        parser.add_argument('--seances-par-cours', type=int, default=24)
+        parser.add_argument('--enseignants', type=int, default=None, help="Par défaut : un pour quatre cours")
+        parser.add_argument('--prefixe', default="FX", help="Préfixe des noms de classes, codes et identifiants")
+        parser.add_argument('--graine', type=int, default=None, help="Graine aléatoire (génération reproductible)")
+        parser.add_argument('--purger', action='store_true', help="Supprimer d'abord les données de même préfixe")
+
+    def handle(self, *args, **options):
+        if options['purger']:
+            purger_ecole(options['prefixe'])
+
+        debut = time.perf_counter()
+        bilan = generer_ecole(
+            nb_classes=options['classes'],
+            etudiants_par_classe=options['etudiants_par_classe'],
+            cours_par_classe=options['cours_par_classe'],
+            seances_par_cours=options['seances_par_cours'],
+            nb_enseignants=options['enseignants'],
+            prefixe=options['prefixe'],
+            graine=options['graine'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"École générée en {time.perf_counter() - debut:.1f} s : "
+            + ", ".join(f"{nombre} {modele}" for modele, nombre in bilan.items())
+        ))
@@ -0,0 +1,51 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.models import Etudiant
+from core.pool import initialiser_worker, vignettes_dans_worker
+
+
+class Command(BaseCommand):
+    help = "Génère les vignettes WebP des photos d'étudiants existantes avec un pool de processus"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'TACHES_WORKERS', 2),
+            help="Nombre de processus (0 : exécution dans le processus courant)"
+        )
+        parser.add_argument(
+            '--toutes', action='store_true',
+            help="Reprendre aussi les photos qui ont déjà une empreinte (nouvelle taille de vignette)"
+        )
+
+    def handle(self, *args, workers, toutes, **options):
+        etudiants = Etudiant.objects.exclude(photo__isnull=True).exclude(photo="")
+        if not toutes:
+            etudiants = etudiants.filter(photo_empreinte="")
+        ids = list(etudiants.order_by('id').values_list('id', flat=True))
+
+        if workers == 0:
+            resultats = map(vignettes_dans_worker, ids)
+            self.compter(resultats, len(ids))
+            return
+
+        # Les processus ouvrent leurs propres connexions
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=initialiser_worker,
+        ) as pool:
+            self.compter(pool.map(vignettes_dans_worker, ids, chunksize=16), len(ids))
+
+    def compter(self, resultats, total):
+        echecs = 0
+        for etudiant_id, empreinte in resultats:
+            if empreinte is None:
+                echecs += 1
+                self.stdout.write(self.style.WARNING(f"Étudiant #{etudiant_id} : photo absente ou illisible"))
+        self.stdout.write(self.style.SUCCESS(f"{total - echecs}/{total} photo(s) traitée(s)"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.resumes import ecarts_resumes, reconstruire_resumes
+
+
+class Command(BaseCommand):
+    help = "Reconstruit (ou vérifie) la table des résumés de présence par cours et par étudiant"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cours', type=int, action='append', dest='cours_ids',
+            help="Limiter à un cours (option répétable)"
+        )
+        parser.add_argument(
+            '--verifier', action='store_true',
+            help="Vérifier la cohérence des résumés sans les modifier"
+        )
+
+    def handle(self, *args, cours_ids=None, verifier=False, **options):
+        if verifier:
+            ecarts = ecarts_resumes(cours_ids)
+            for cours_id, etudiant_id in ecarts[:20]:
+                self.stdout.write(f"Écart : cours={cours_id} étudiant={etudiant_id}")
+            if ecarts:
+                raise CommandError(f"{len(ecarts)} résumé(s) incohérent(s)")
+            self.stdout.write(self.style.SUCCESS("Résumés de présence cohérents"))
+            return
+
+        n = reconstruire_resumes(cours_ids)
+        self.stdout.write(self.style.SUCCESS(f"{n} résumé(s) de présence reconstruit(s)"))
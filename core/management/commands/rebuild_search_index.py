@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.recherche import indexer_cours, indexer_etudiants
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche des étudiants et des cours"
+
+    def handle(self, *args, **options):
+        nb_etudiants = indexer_etudiants()
+        nb_cours = indexer_cours()
+        self.stdout.write(self.style.SUCCESS(
+            f"Index de recherche reconstruit : {nb_etudiants} étudiant(s), {nb_cours} cours"
+        ))
@@ -0,0 +1,95 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.pool import executer_dans_worker, initialiser_worker
+from core.taches import echouer_taches_interrompues, executer_tache, marquer_echec, reclamer, remettre_en_attente
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches en arrière-plan (exports, imports) avec un pool de processus"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'TACHES_WORKERS', 2),
+            help="Nombre de processus (0 : exécution dans le processus courant)"
+        )
+        parser.add_argument('--intervalle', type=float, default=2.0, help="Attente entre deux scrutations (s)")
+        parser.add_argument('--une-fois', action='store_true', help="Traiter les tâches en attente puis quitter")
+
+    def handle(self, *args, workers, intervalle, une_fois, **options):
+        if workers == 0:
+            self.executer_en_ligne(intervalle, une_fois)
+        else:
+            self.executer_en_pool(workers, intervalle, une_fois)
+
+    def compte_rendu(self, tache_id, statut):
+        style = self.style.SUCCESS if statut == 'terminee' else self.style.ERROR
+        self.stdout.write(style(f"Tâche #{tache_id} : {statut}"))
+
+    def recuperer(self):
+        """Tâches restées en_cours après un arrêt ou un processus tué (au démarrage puis à chaque tour)"""
+        nombre = echouer_taches_interrompues()
+        if nombre:
+            self.stdout.write(self.style.WARNING(f"{nombre} tâche(s) interrompue(s) passée(s) en échec"))
+
+    def executer_en_ligne(self, intervalle, une_fois):
+        while True:
+            self.recuperer()
+            ids = reclamer(1)
+            for tache_id in ids:
+                self.compte_rendu(tache_id, executer_tache(tache_id))
+            if not ids:
+                if une_fois:
+                    return
+                time.sleep(intervalle)
+
+    @staticmethod
+    def nouveau_pool(workers):
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=initialiser_worker,
+        )
+
+    def executer_en_pool(self, workers, intervalle, une_fois):
+        en_cours = {}
+        pool = self.nouveau_pool(workers)
+        try:
+            while True:
+                self.recuperer()
+                for futur in [f for f in en_cours if f.done()]:
+                    tache_id = en_cours.pop(futur)
+                    try:
+                        statut = futur.result()
+                    except Exception as e:  # processus du pool interrompu
+                        marquer_echec(tache_id, str(e) or type(e).__name__)
+                        statut = 'echec'
+                    self.compte_rendu(tache_id, statut)
+
+                ids = reclamer(workers - len(en_cours)) if len(en_cours) < workers else []
+                for rang, tache_id in enumerate(ids):
+                    try:
+                        en_cours[pool.submit(executer_dans_worker, tache_id)] = tache_id
+                    except BrokenProcessPool:
+                        # Un processus est mort : ses tâches en vol échouent au
+                        # tour suivant, les tâches non soumises retournent en
+                        # attente et le pool est recréé
+                        self.stdout.write(self.style.WARNING("Pool de processus cassé : recréé"))
+                        remettre_en_attente(ids[rang:])
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = self.nouveau_pool(workers)
+                        break
+
+                if not ids:
+                    if une_fois and not en_cours:
+                        return
+                    connections.close_all()
+                    time.sleep(intervalle)
+        finally:
+            pool.shutdown()
@@ -0,0 +1,109 @@
+import json
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.base_donnees import pragmas_effectifs
+from core.models import Etudiant, Seance
+
+
+STATUTS = ["present", "retard", "absent", "motif"]
+
+
+def seances_cibles(nombre):
+    """
+    Les ``nombre`` séances non annulées les plus récentes d'un même cours
+    (un seul enseignant) et les étudiants de sa classe.
+    """
+    derniere = Seance.objects.filter(is_annulee=False).order_by('-date', 'id').first()
+    if derniere is None:
+        raise CommandError("Aucune séance : générez d'abord des données (generate_fake_school)")
+    seances = list(
+        Seance.objects.filter(cours_id=derniere.cours_id, is_annulee=False)
+        .select_related('cours__enseignant').order_by('-date', 'id')[:nombre]
+    )
+    etudiant_ids = list(
+        Etudiant.objects.filter(classe_id=seances[0].cours.classe_id).values_list('id', flat=True)
+    )
+    return seances, etudiant_ids
+
+
+class Command(BaseCommand):
+    help = (
+        "Envoie des appels de présence (POST appel_presence) en parallèle depuis plusieurs threads "
+        "sur la base courante et compte les erreurs (\"database is locked\"...)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--appels', type=int, default=25, help="Appels par thread")
+        parser.add_argument('--seances', type=int, default=2, help="Séances visées (peu = forte contention)")
+        parser.add_argument('--graine', type=int, default=None)
+
+    def handle(self, *args, threads, appels, seances, graine, **options):
+        cibles, etudiant_ids = seances_cibles(seances)
+        rng = random.Random(graine)
+        erreurs = []
+        statuts_http = {}
+        verrou = threading.Lock()
+
+        # Sessions ouvertes avant la charge : seuls les appels sont concurrents
+        clients = []
+        for _ in range(threads):
+            client = Client()
+            client.force_login(cibles[0].cours.enseignant)
+            clients.append(client)
+
+        def travailleur(client, graine_thread):
+            tirage = random.Random(graine_thread)
+            try:
+                for _ in range(appels):
+                    seance = tirage.choice(cibles)
+                    donnees = {pk: tirage.choice(STATUTS) for pk in etudiant_ids}
+                    try:
+                        response = client.post(
+                            reverse("core:appel_presence", args=[seance.pk]),
+                            {"presences_data": json.dumps(donnees)},
+                        )
+                    except Exception as exc:  # noqa: BLE001 - erreur comptée, la charge continue
+                        with verrou:
+                            erreurs.append(f"{type(exc).__name__}: {exc}")
+                        continue
+                    with verrou:
+                        statuts_http[response.status_code] = statuts_http.get(response.status_code, 0) + 1
+            finally:
+                connection.close()
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            debut = time.perf_counter()
+            fils = [
+                threading.Thread(target=travailleur, args=(client, rng.random()))
+                for client in clients
+            ]
+            for fil in fils:
+                fil.start()
+            for fil in fils:
+                fil.join()
+            duree = time.perf_counter() - debut
+
+        rapport = {
+            "base": connection.vendor,
+            "options": {k: v for k, v in connection.settings_dict.get("OPTIONS", {}).items() if k != "pool"},
+            "pragmas": pragmas_effectifs(connection) if connection.vendor == "sqlite" else None,
+            "threads": threads,
+            "appels": threads * appels,
+            "duree_s": round(duree, 2),
+            "appels_par_s": round(threads * appels / duree, 1),
+            "statuts_http": {str(code): nombre for code, nombre in sorted(statuts_http.items())},
+            "erreurs": len(erreurs),
+            "exemples_erreurs": sorted(set(erreurs))[:5],
+        }
+        self.stdout.write(json.dumps(rapport, indent=2, ensure_ascii=False))
+        if erreurs:
+            raise CommandError(f"{len(erreurs)} appel(s) en erreur sur {threads * appels}")
@@ -0,0 +1,146 @@
+# core/matrice.py
+
+import numpy as np
+
+from .cache import cache_stats
+from .models import Etudiant, Presence, Seance
+from .stats import STATUTS
+
+
+# Codes de statut dans la matrice : 0 = aucune présence enregistrée
+CODES = {statut: code for code, statut in enumerate(STATUTS, start=1)}
+CODES_PRESENTS = [CODES["present"], CODES["retard"]]
+CODES_ABSENTS = [CODES["absent"], CODES["motif"]]
+
+
+class MatricePresences:
+    """
+    Grille étudiant × séance d'un cours : un tableau ``uint8`` de codes de
+    statut (``CODES``) et les ids correspondant à ses lignes (étudiants de la
+    classe, par nom) et colonnes (séances, chronologiques). Les calculs
+    par étudiant ou par séance sont vectorisés sur le tableau.
+    """
+
+    __slots__ = ("etudiant_ids", "seance_ids", "dates", "codes", "_lignes", "_colonnes")
+
+    def __init__(self, etudiant_ids, seance_ids, dates, codes):
+        self.etudiant_ids = etudiant_ids
+        self.seance_ids = seance_ids
+        self.dates = dates
+        self.codes = codes
+        self._lignes = {pk: i for i, pk in enumerate(etudiant_ids)}
+        self._colonnes = {pk: j for j, pk in enumerate(seance_ids)}
+
+    def __getstate__(self):
+        return self.etudiant_ids, self.seance_ids, self.dates, self.codes
+
+    def __setstate__(self, etat):
+        self.__init__(*etat)
+
+    @classmethod
+    def charger(cls, cours):
+        """Construit la matrice d'un cours : étudiants, séances puis toutes les présences en une requête"""
+        etudiant_ids = list(
+            Etudiant.objects.filter(classe_id=cours.classe_id).order_by('nom', 'prenom', 'id').values_list('id', flat=True)
+        )
+        seances = list(
+            Seance.objects.filter(cours=cours).order_by('date', 'heure_debut', 'id').values_list('id', 'date')
+        )
+        matrice = cls(etudiant_ids, [pk for pk, _ in seances], [date for _, date in seances],
+                      np.zeros((len(etudiant_ids), len(seances)), dtype=np.uint8))
+
+        lignes, colonnes, codes = [], [], []
+        presences = Presence.objects.filter(seance__cours=cours).values_list('etudiant_id', 'seance_id', 'statut')
+        for etudiant_id, seance_id, statut in presences.iterator(chunk_size=5000):
+            i = matrice._lignes.get(etudiant_id)
+            if i is None:
+                # Étudiant qui n'appartient plus à la classe du cours
+                continue
+            lignes.append(i)
+            colonnes.append(matrice._colonnes[seance_id])
+            codes.append(CODES[statut])
+
+        if codes:
+            matrice.codes[lignes, colonnes] = codes
+        return matrice
+
+    # -------------------
+    # ACCÈS
+    # -------------------
+
+    @property
+    def forme(self):
+        return self.codes.shape
+
+    def ligne(self, etudiant_id):
+        return self.codes[self._lignes[etudiant_id]]
+
+    def statut(self, etudiant_id, seance_id):
+        """Statut enregistré, ou None"""
+        code = self.codes[self._lignes[etudiant_id], self._colonnes[seance_id]]
+        return STATUTS[code - 1] if code else None
+
+    def seances_avec_appel(self):
+        """Masque des séances ayant au moins une présence enregistrée"""
+        return self.codes.any(axis=0)
+
+    def derniers_appels(self, fenetre):
+        """Matrice réduite aux ``fenetre`` dernières séances ayant eu un appel (fenêtre glissante)"""
+        colonnes = np.flatnonzero(self.seances_avec_appel())[-fenetre:]
+        return MatricePresences(
+            self.etudiant_ids, [self.seance_ids[j] for j in colonnes], [self.dates[j] for j in colonnes],
+            self.codes[:, colonnes],
+        )
+
+    # -------------------
+    # CALCULS
+    # -------------------
+
+    def totaux_par_etudiant(self):
+        """Tableau (étudiants × 4) des nombres de séances par statut, dans l'ordre de ``STATUTS``"""
+        return np.stack([(self.codes == CODES[statut]).sum(axis=1) for statut in STATUTS], axis=1)
+
+    def totaux(self):
+        return {statut: int((self.codes == CODES[statut]).sum()) for statut in STATUTS}
+
+    def appels_par_etudiant(self):
+        """Nombre de séances où chaque étudiant a été appelé"""
+        return (self.codes != 0).sum(axis=1)
+
+    def taux_par_etudiant(self):
+        """Présents et retards (%) parmi les séances où l'étudiant a été appelé"""
+        appeles = (self.codes != 0).sum(axis=1)
+        presents = np.isin(self.codes, CODES_PRESENTS).sum(axis=1)
+        return np.divide(presents * 100, appeles, out=np.zeros(len(appeles)), where=appeles > 0)
+
+    def taux_par_seance(self):
+        """Présents et retards (%) parmi les étudiants appelés à chaque séance"""
+        appeles = (self.codes != 0).sum(axis=0)
+        presents = np.isin(self.codes, CODES_PRESENTS).sum(axis=0)
+        return np.divide(presents * 100, appeles, out=np.zeros(len(appeles)), where=appeles > 0)
+
+    def taux_global(self):
+        """Présents et retards (%) sur toutes les présences attendues (étudiants × séances)"""
+        if not self.codes.size:
+            return 0
+        return np.isin(self.codes, CODES_PRESENTS).sum() * 100 / self.codes.size
+
+    def series_absences(self):
+        """
+        Absences consécutives (justifiées ou non) de chaque étudiant sur les
+        séances ayant eu un appel : ``(série en cours, plus longue série)``.
+        """
+        absences = np.isin(self.codes[:, self.seances_avec_appel()], CODES_ABSENTS)
+        if not absences.shape[1]:
+            zeros = np.zeros(len(self.etudiant_ids), dtype=np.int64)
+            return zeros, zeros
+        # Cumul des absences, remis à zéro à chaque présence
+        cumul = np.cumsum(absences, axis=1)
+        remises = np.maximum.accumulate(np.where(absences, 0, cumul), axis=1)
+        series = cumul - remises
+        return series[:, -1], series.max(axis=1)
+
+
+def matrice_cours(cours):
+    """Matrice du cours, en cache jusqu'à la prochaine modification des données"""
+    return cache_stats(f"matrice:{cours.pk}", lambda: MatricePresences.charger(cours))
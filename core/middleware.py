@@ -1,20 +1,220 @@
-from django.shortcuts import redirect
-from django.urls import reverse
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .instrumentation import Mesure, histogrammes
+from .routage import COOKIE_PRIMAIRE, EtatRoutage, replica_configuree
+from .selectors import MemoSelecteurs
+
+
+logger = logging.getLogger("core.instrumentation")
+
+BUDGETS_DEFAUT = {"requetes": 50, "sql_ms": 300, "total_ms": 1000}
+
+
+# Les middlewares du projet acceptent les deux modes : sous ASGI, une
+# chaîne entièrement asynchrone sert les vues ``async def`` sans passer
+# par un thread à chaque requête.
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise (synchrone seulement en 6.x) utilisable dans une chaîne
+    asynchrone : la recherche du fichier est une lecture de dictionnaire
+    (hors ``WHITENOISE_AUTOREFRESH``), sans entrée-sortie bloquante.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class InstrumentationMiddleware:
+    """
+    Mesure chaque requête : nombre et durée des requêtes SQL (wrapper
+    installé sur chaque connexion, voir ``core.signals``), durée de rendu
+    des gabarits (moteur ``core.instrumentation.DjangoTemplatesMesures``),
+    durée totale et taille de la réponse.
+
+    Les mesures sont renvoyées dans l'en-tête ``Server-Timing``, agrégées
+    par nom d'URL (voir ``api_instrumentation``) et journalisées quand une
+    vue dépasse son budget (``INSTRUMENTATION_BUDGETS`` et
+    ``INSTRUMENTATION_BUDGETS_VUES``).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mesure = Mesure()
+        jeton = mesure.activer()
+        debut = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            Mesure.desactiver(jeton)
+        return self.conclure(request, response, mesure, debut)
+
+    async def __acall__(self, request):
+        mesure = Mesure()
+        jeton = mesure.activer()
+        debut = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            Mesure.desactiver(jeton)
+        return self.conclure(request, response, mesure, debut)
+
+    def conclure(self, request, response, mesure, debut):
+        total_ms = (time.perf_counter() - debut) * 1000
+
+        match = request.resolver_match
+        vue = match.view_name if match else "<non résolue>"
+        sql_ms = mesure.duree_sql * 1000
+        rendu_ms = mesure.duree_rendu * 1000
+        taille = self.taille(response)
+
+        if getattr(settings, "INSTRUMENTATION_SERVER_TIMING", True):
+            metriques = [
+                f'sql;dur={sql_ms:.1f};desc="{mesure.requetes} requetes"',
+                f"rendu;dur={rendu_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            ]
+            if taille is not None:
+                metriques.append(f'taille;desc="{taille} octets"')
+            response["Server-Timing"] = ", ".join(metriques)
+
+        self.verifier_budget(request, vue, mesure.requetes, sql_ms, total_ms)
+        histogrammes.enregistrer(vue, total_ms, sql_ms, mesure.requetes)
+        histogrammes.publier()
+        return response
+
+    @staticmethod
+    def taille(response):
+        if response.streaming:
+            return response.get("Content-Length")
+        return len(response.content)
+
+    @staticmethod
+    def verifier_budget(request, vue, requetes, sql_ms, total_ms):
+        budget = {
+            **BUDGETS_DEFAUT,
+            **getattr(settings, "INSTRUMENTATION_BUDGETS", {}),
+            **getattr(settings, "INSTRUMENTATION_BUDGETS_VUES", {}).get(vue, {}),
+        }
+        depassements = [
+            f"{nom}={valeur:.0f} (budget {budget[nom]})"
+            for nom, valeur in (("requetes", requetes), ("sql_ms", sql_ms), ("total_ms", total_ms))
+            if valeur > budget[nom]
+        ]
+        if depassements:
+            logger.warning("Budget dépassé pour %s (%s) : %s", vue, request.path, ", ".join(depassements))
+
+
+class RoutageLectureMiddleware:
+    """
+    Active le routage des lectures (``core.routage``) pour la requête.
+    Après une écriture, un cookie maintient les lectures de l'utilisateur
+    sur le primaire pendant ``REPLICA_COLLAGE`` secondes, le temps que la
+    réplique rattrape son retard.
+    """
+
+    sync_capable = True
+    async_capable = True
 
-class EnseignantRestrictionMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        etat = self.etat(request)
+        jeton = etat.activer()
+        try:
+            response = self.get_response(request)
+        finally:
+            EtatRoutage.desactiver(jeton)
+        return self.conclure(response, etat)
+
+    async def __acall__(self, request):
+        etat = self.etat(request)
+        jeton = etat.activer()
+        try:
+            response = await self.get_response(request)
+        finally:
+            EtatRoutage.desactiver(jeton)
+        return self.conclure(response, etat)
+
+    @staticmethod
+    def etat(request):
+        try:
+            collee = float(request.COOKIES.get(COOKIE_PRIMAIRE, 0)) > time.time()
+        except ValueError:
+            collee = False
+        return EtatRoutage(collee=collee)
+
+    @staticmethod
+    def conclure(response, etat):
+        if etat.ecriture and replica_configuree():
+            duree = getattr(settings, "REPLICA_COLLAGE", 10)
+            response.set_cookie(
+                COOKIE_PRIMAIRE, f"{time.time() + duree:.0f}", max_age=duree, httponly=True, samesite="Lax",
+            )
         return response
 
-    def process_view(self, request, view_func, view_args, view_kwargs):
-        # Vérifier si l'utilisateur est enseignant et tente d'accéder à l'admin
-        # if (request.user.is_authenticated and 
-        #     request.user.role == 'enseignant' and 
-        #     request.path.startswith('/admin/')):
-        #     # Utilisez une URL directe au lieu d'un nom d'URL
-        #     return redirect('/')  # Redirige vers la page d'accueil
-        pass
-        return None
\ No newline at end of file
+
+class SelecteursMiddleware:
+    """Mémoïse les QuerySets des sélecteurs (``core.selectors``) le temps d'une requête"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        jeton = MemoSelecteurs().activer()
+        try:
+            return self.get_response(request)
+        finally:
+            MemoSelecteurs.desactiver(jeton)
+
+    async def __acall__(self, request):
+        jeton = MemoSelecteurs().activer()
+        try:
+            return await self.get_response(request)
+        finally:
+            MemoSelecteurs.desactiver(jeton)
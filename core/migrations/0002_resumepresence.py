@@ -0,0 +1,62 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+STATUTS = ('present', 'retard', 'absent', 'motif')
+
+
+def remplir_resumes(apps, schema_editor):
+    Presence = apps.get_model('core', 'Presence')
+    ResumePresence = apps.get_model('core', 'ResumePresence')
+    lignes = (
+        Presence.objects
+        .values('seance__cours_id', 'etudiant_id')
+        .annotate(total=Count('id'), **{s: Count('id', filter=Q(statut=s)) for s in STATUTS})
+        .order_by()
+    )
+    ResumePresence.objects.bulk_create(
+        (
+            ResumePresence(
+                cours_id=ligne['seance__cours_id'],
+                etudiant_id=ligne['etudiant_id'],
+                total=ligne['total'],
+                **{s: ligne[s] for s in STATUTS}
+            )
+            for ligne in lignes.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumePresence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0, verbose_name='Présent')),
+                ('retard', models.PositiveIntegerField(default=0, verbose_name='En retard')),
+                ('absent', models.PositiveIntegerField(default=0, verbose_name='Absent')),
+                ('motif', models.PositiveIntegerField(default=0, verbose_name='Absent avec motif')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cours', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumes', to='core.cours', verbose_name='Cours')),
+                ('etudiant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumes', to='core.etudiant', verbose_name='Étudiant')),
+            ],
+            options={
+                'verbose_name': 'Résumé de présence',
+                'verbose_name_plural': 'Résumés de présence',
+                'indexes': [models.Index(fields=['etudiant'], name='core_resume_etudian_8c6f07_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cours', 'etudiant'), name='unique_resume_presence')],
+            },
+        ),
+        migrations.RunPython(remplir_resumes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_resumepresence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_tache', models.CharField(choices=[('export_excel', 'Export Excel'), ('export_pdf', 'Export PDF'), ('import_etudiants', "Import d'étudiants")], max_length=30, verbose_name='Type')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echec', 'Échec')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('parametres', models.JSONField(blank=True, default=dict, verbose_name='Paramètres')),
+                ('fichier_source', models.FileField(blank=True, null=True, upload_to='taches/sources/', verbose_name='Fichier source')),
+                ('fichier', models.FileField(blank=True, null=True, upload_to='taches/', verbose_name='Fichier produit')),
+                ('resultat', models.JSONField(blank=True, default=dict, verbose_name='Résultat')),
+                ('erreur', models.TextField(blank=True, null=True, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='taches', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Tâche',
+                'verbose_name_plural': 'Tâches',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['statut', 'created_at'], name='core_tache_statut_71c159_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:49
+
+import re
+import unicodedata
+
+from django.db import DatabaseError, migrations, models, transaction
+
+
+# Découpage figé à la création de l'index (copie de core.recherche à cette
+# date) : la migration ne dépend pas du code courant de l'application
+
+TAILLE_TERME = 100
+
+
+def mots(texte):
+    texte = unicodedata.normalize('NFKD', str(texte or "")).encode('ascii', 'ignore').decode()
+    return re.findall(r"[a-z0-9]+", texte.lower())
+
+
+def termes_etudiant(nom, prenom, matricule, classe):
+    matricule = mots(matricule)
+    termes = {*mots(nom), *mots(prenom), *matricule, "".join(matricule), *mots(classe)}
+    return {t[:TAILLE_TERME] for t in termes if t}
+
+
+def termes_cours(nom, code, classe, enseignant):
+    termes = {*mots(nom), *mots(code), *mots(classe), *mots(enseignant)}
+    return {t[:TAILLE_TERME] for t in termes if t}
+
+
+def remplir_index(apps, schema_editor):
+    Etudiant = apps.get_model('core', 'Etudiant')
+    Cours = apps.get_model('core', 'Cours')
+    TermeRecherche = apps.get_model('core', 'TermeRecherche')
+
+    def termes():
+        for pk, *valeurs in Etudiant.objects.values_list('id', 'nom', 'prenom', 'matricule', 'classe__nom').iterator():
+            for terme in termes_etudiant(*valeurs):
+                yield TermeRecherche(type_objet='etudiant', objet_id=pk, terme=terme)
+        for pk, *valeurs in Cours.objects.values_list('id', 'nom', 'code', 'classe__nom', 'enseignant__username').iterator():
+            for terme in termes_cours(*valeurs):
+                yield TermeRecherche(type_objet='cours', objet_id=pk, terme=terme)
+
+    TermeRecherche.objects.bulk_create(termes(), batch_size=1000)
+
+
+def creer_index_trigrammes(apps, schema_editor):
+    """Index GIN pg_trgm pour la recherche approchée (PostgreSQL uniquement)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic():
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        # Extension non installable (droits insuffisants) : recherche par préfixe seule
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS core_termerecherche_trgm "
+        "ON core_termerecherche USING gin (terme gin_trgm_ops)"
+    )
+
+
+def supprimer_index_trigrammes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS core_termerecherche_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_tache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermeRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_objet', models.CharField(choices=[('etudiant', 'Étudiant'), ('cours', 'Cours')], max_length=10, verbose_name='Type')),
+                ('objet_id', models.PositiveIntegerField(verbose_name='Identifiant')),
+                ('terme', models.CharField(max_length=100, verbose_name='Terme')),
+            ],
+            options={
+                'verbose_name': 'Terme de recherche',
+                'verbose_name_plural': 'Termes de recherche',
+                'indexes': [models.Index(fields=['type_objet', 'terme', 'objet_id'], name='core_termer_type_ob_1d222e_idx'), models.Index(fields=['type_objet', 'objet_id', 'terme'], name='core_termer_type_ob_3fa345_idx')],
+            },
+        ),
+        migrations.RunPython(remplir_index, migrations.RunPython.noop),
+        migrations.RunPython(creer_index_trigrammes, supprimer_index_trigrammes),
+    ]
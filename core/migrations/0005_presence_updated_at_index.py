@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_termerecherche'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='presence',
+            index=models.Index(fields=['updated_at', 'id'], name='core_presen_updated_f0a8bc_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_presence_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointReprise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=50, unique=True, verbose_name='Traitement')),
+                ('horodatage', models.DateTimeField(verbose_name="Traité jusqu'à")),
+            ],
+            options={
+                'verbose_name': 'Point de reprise',
+                'verbose_name_plural': 'Points de reprise',
+            },
+        ),
+        migrations.CreateModel(
+            name='AlerteAbsence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taux_presence', models.FloatField(verbose_name='Taux de présence (%)')),
+                ('seances_appelees', models.PositiveIntegerField(verbose_name='Séances appelées')),
+                ('absences_consecutives', models.PositiveIntegerField(verbose_name='Absences consécutives en cours')),
+                ('taux_insuffisant', models.BooleanField(default=False, verbose_name='Taux sous le seuil')),
+                ('serie_absences', models.BooleanField(default=False, verbose_name="Série d'absences")),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Signalé depuis')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cours', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertes', to='core.cours', verbose_name='Cours')),
+                ('etudiant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertes', to='core.etudiant', verbose_name='Étudiant')),
+            ],
+            options={
+                'verbose_name': "Alerte d'absentéisme",
+                'verbose_name_plural': "Alertes d'absentéisme",
+                'indexes': [models.Index(fields=['taux_presence', 'id'], name='core_alerte_taux_pr_f434fc_idx'), models.Index(fields=['etudiant'], name='core_alerte_etudian_a6585b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cours', 'etudiant'), name='unique_alerte_absence')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alerteabsence_pointreprise'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='presence',
+            name='core_presen_etudian_cd6226_idx',
+        ),
+        migrations.AddIndex(
+            model_name='presence',
+            index=models.Index(fields=['etudiant', 'seance', 'statut', 'heure_arrivee'], name='core_presen_etudian_98f713_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_presence_index_chronologie'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etudiant',
+            name='photo_empreinte',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Empreinte de la photo'),
+        ),
+    ]
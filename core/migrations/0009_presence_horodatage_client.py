@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_etudiant_photo_empreinte'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presence',
+            name='horodatage_client',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Horodatage client'),
+        ),
+    ]
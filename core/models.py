@@ -3,6 +3,7 @@
 import uuid
 import time
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.urls import reverse
 from django.utils import timezone
@@ -208,6 +209,15 @@ class Etudiant(models.Model):
         null=True,
         verbose_name="Photo"
     )
+
+    # Empreinte du contenu de la photo : nomme ses vignettes (core.vignettes)
+    photo_empreinte = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Empreinte de la photo"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -240,12 +250,9 @@ class Etudiant(models.Model):
         return None
 
     def taux_presence_global(self):
-        total_presences = self.presences.count()
-        if total_presences == 0:
-            return 0
-        
-        presentes = self.presences.filter(statut__in=['present', 'retard']).count()
-        return (presentes / total_presences) * 100
+        # Résumé par étudiant mis en cache (voir core.stats.resumes_etudiants)
+        from .stats import resume_etudiant
+        return resume_etudiant(self.pk)['taux_global']
 
 
 # -------------------
@@ -348,6 +355,9 @@ class Cours(models.Model):
         return reverse('cours_detail', kwargs={'pk': self.pk})
 
     def seances_count(self):
+        # Annoté par ``core.selectors.cours_enseignant`` : pas de requête par cours
+        if hasattr(self, 'nb_seances'):
+            return self.nb_seances
         return self.seances.count()
 
     def etudiants_count(self):
@@ -358,10 +368,9 @@ class Cours(models.Model):
         if total_presences_attendues == 0:
             return 0
         
-        total_presences = Presence.objects.filter(
-            seance__cours=self,
-            statut__in=['present', 'retard']
-        ).count()
+        total_presences = self.resumes.aggregate(
+            n=models.Sum(models.F('present') + models.F('retard'))
+        )['n'] or 0
         
         return (total_presences / total_presences_attendues) * 100
 
@@ -369,6 +378,27 @@ class Cours(models.Model):
 # -------------------
 # SEANCE
 # -------------------
+class SeanceQuerySet(models.QuerySet):
+    def with_presence_stats(self):
+        """
+        Annote chaque séance avec ses compteurs de présence (nb_presents,
+        nb_absents, nb_attendus) et son taux, en une seule requête.
+        """
+        attendus = (
+            Etudiant.objects
+            .filter(classe_id=models.OuterRef('cours__classe_id'))
+            .order_by()
+            .values('classe_id')
+            .annotate(n=models.Count('id'))
+            .values('n')
+        )
+        return self.annotate(
+            nb_presents=models.Count('presences', filter=models.Q(presences__statut__in=['present', 'retard'])),
+            nb_absents=models.Count('presences', filter=models.Q(presences__statut__in=['absent', 'motif'])),
+            nb_attendus=Coalesce(models.Subquery(attendus), 0),
+        )
+
+
 class Seance(models.Model):
     cours = models.ForeignKey(
         Cours, 
@@ -416,6 +446,8 @@ class Seance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SeanceQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Séance"
         verbose_name_plural = "Séances"
@@ -441,14 +473,24 @@ class Seance(models.Model):
     def presences_count(self):
         return self.presences.count()
 
+    # Les méthodes suivantes utilisent les annotations de
+    # Seance.objects.with_presence_stats() quand elles sont présentes
+
     def presences_present(self):
+        if hasattr(self, 'nb_presents'):
+            return self.nb_presents
         return self.presences.filter(statut__in=['present', 'retard']).count()
 
     def presences_absentes(self):
+        if hasattr(self, 'nb_absents'):
+            return self.nb_absents
         return self.presences.filter(statut__in=['absent', 'motif']).count()
 
     def taux_presence(self):
-        total_etudiants = self.cours.classe.etudiants.count()
+        if hasattr(self, 'nb_attendus'):
+            total_etudiants = self.nb_attendus
+        else:
+            total_etudiants = Etudiant.objects.filter(classe_id=self.cours.classe_id).count()
         if total_etudiants == 0:
             return 0
         return (self.presences_present() / total_etudiants) * 100
@@ -511,6 +553,16 @@ class Presence(models.Model):
         verbose_name="Notes"
     )
     
+    # Moment du changement sur l'appareil, pour une écriture venue d'une
+    # synchronisation hors ligne (dernier écrivain gagnant) ; vide pour une
+    # écriture faite sur le serveur, datée par updated_at
+    horodatage_client = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Horodatage client"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -521,8 +573,12 @@ class Presence(models.Model):
             models.UniqueConstraint(fields=["etudiant", "seance"], name="unique_presence")
         ]
         indexes = [
-            models.Index(fields=['etudiant', 'seance']),
+            # Couvrant pour la chronologie d'un étudiant ; (etudiant, seance)
+            # seul est déjà indexé par la contrainte d'unicité
+            models.Index(fields=['etudiant', 'seance', 'statut', 'heure_arrivee']),
             models.Index(fields=['statut']),
+            # Dumps incrémentaux (api/export/presences/?depuis=...)
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
@@ -536,12 +592,235 @@ class Presence(models.Model):
 
     def save(self, *args, **kwargs):
         # Vérifier que l'étudiant appartient à la classe du cours
-        if self.etudiant.classe != self.seance.cours.classe:
+        if self.etudiant.classe_id != self.seance.cours.classe_id:
             raise ValueError("L'étudiant n'appartient pas à la classe de ce cours")
         
+        # Écriture serveur : datée par updated_at (voir horodatage_client)
+        self.horodatage_client = None
         super().save(*args, **kwargs)
 
 
+# -------------------
+# RÉSUMÉ DES PRÉSENCES
+# -------------------
+class ResumePresence(models.Model):
+    """
+    Compteurs de présence matérialisés par (cours, étudiant), tenus à jour
+    à chaque écriture de présence (voir core.resumes).
+    """
+    cours = models.ForeignKey(
+        Cours,
+        on_delete=models.CASCADE,
+        related_name="resumes",
+        verbose_name="Cours"
+    )
+
+    etudiant = models.ForeignKey(
+        Etudiant,
+        on_delete=models.CASCADE,
+        related_name="resumes",
+        verbose_name="Étudiant"
+    )
+
+    present = models.PositiveIntegerField(default=0, verbose_name="Présent")
+    retard = models.PositiveIntegerField(default=0, verbose_name="En retard")
+    absent = models.PositiveIntegerField(default=0, verbose_name="Absent")
+    motif = models.PositiveIntegerField(default=0, verbose_name="Absent avec motif")
+    total = models.PositiveIntegerField(default=0, verbose_name="Total")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Résumé de présence"
+        verbose_name_plural = "Résumés de présence"
+        constraints = [
+            models.UniqueConstraint(fields=["cours", "etudiant"], name="unique_resume_presence")
+        ]
+        indexes = [
+            models.Index(fields=['etudiant']),
+        ]
+
+    def __str__(self):
+        return f"{self.etudiant} - {self.cours.nom} : {self.present + self.retard}/{self.total}"
+
+
+# -------------------
+# TÂCHES EN ARRIÈRE-PLAN
+# -------------------
+class Tache(models.Model):
+    """
+    Travail lourd (export, import) exécuté hors requête par la commande
+    ``runjobs`` (voir core.taches).
+    """
+    TYPE_CHOICES = [
+        ('export_excel', 'Export Excel'),
+        ('export_pdf', 'Export PDF'),
+        ('import_etudiants', 'Import d\'étudiants'),
+    ]
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('terminee', 'Terminée'),
+        ('echec', 'Échec'),
+    ]
+
+    type_tache = models.CharField(
+        max_length=30,
+        choices=TYPE_CHOICES,
+        verbose_name="Type"
+    )
+
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut"
+    )
+
+    utilisateur = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="taches",
+        verbose_name="Utilisateur"
+    )
+
+    parametres = models.JSONField(default=dict, blank=True, verbose_name="Paramètres")
+
+    fichier_source = models.FileField(
+        upload_to='taches/sources/',
+        blank=True,
+        null=True,
+        verbose_name="Fichier source"
+    )
+
+    fichier = models.FileField(
+        upload_to='taches/',
+        blank=True,
+        null=True,
+        verbose_name="Fichier produit"
+    )
+
+    resultat = models.JSONField(default=dict, blank=True, verbose_name="Résultat")
+
+    erreur = models.TextField(blank=True, null=True, verbose_name="Erreur")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Tâche"
+        verbose_name_plural = "Tâches"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['statut', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_type_tache_display()} #{self.pk} ({self.get_statut_display()})"
+
+    def est_terminee(self):
+        return self.statut in ['terminee', 'echec']
+
+
+# -------------------
+# INDEX DE RECHERCHE
+# -------------------
+class TermeRecherche(models.Model):
+    """
+    Mot normalisé (minuscules, sans accents) d'un étudiant ou d'un cours,
+    tenu à jour à chaque écriture (voir core.recherche).
+    """
+    TYPE_CHOICES = [
+        ('etudiant', 'Étudiant'),
+        ('cours', 'Cours'),
+    ]
+
+    type_objet = models.CharField(
+        max_length=10,
+        choices=TYPE_CHOICES,
+        verbose_name="Type"
+    )
+
+    objet_id = models.PositiveIntegerField(verbose_name="Identifiant")
+
+    terme = models.CharField(max_length=100, verbose_name="Terme")
+
+    class Meta:
+        verbose_name = "Terme de recherche"
+        verbose_name_plural = "Termes de recherche"
+        # Index couvrants : sans statistiques, SQLite préfère un index
+        # couvrant à un index plus sélectif qui ne l'est pas
+        indexes = [
+            models.Index(fields=['type_objet', 'terme', 'objet_id']),
+            models.Index(fields=['type_objet', 'objet_id', 'terme']),
+        ]
+
+    def __str__(self):
+        return f"{self.type_objet} #{self.objet_id} : {self.terme}"
+
+
+# -------------------
+# ALERTES D'ABSENTÉISME
+# -------------------
+class AlerteAbsence(models.Model):
+    """
+    Étudiant en difficulté dans un cours (taux de présence sous le seuil ou
+    absences consécutives), calculé par la commande ``analyser_absences``
+    (voir core.alertes). Lu tel quel par le tableau de bord administrateur.
+    """
+    cours = models.ForeignKey(
+        Cours,
+        on_delete=models.CASCADE,
+        related_name="alertes",
+        verbose_name="Cours"
+    )
+
+    etudiant = models.ForeignKey(
+        Etudiant,
+        on_delete=models.CASCADE,
+        related_name="alertes",
+        verbose_name="Étudiant"
+    )
+
+    taux_presence = models.FloatField(verbose_name="Taux de présence (%)")
+    seances_appelees = models.PositiveIntegerField(verbose_name="Séances appelées")
+    absences_consecutives = models.PositiveIntegerField(verbose_name="Absences consécutives en cours")
+    taux_insuffisant = models.BooleanField(default=False, verbose_name="Taux sous le seuil")
+    serie_absences = models.BooleanField(default=False, verbose_name="Série d'absences")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Signalé depuis")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Alerte d'absentéisme"
+        verbose_name_plural = "Alertes d'absentéisme"
+        constraints = [
+            models.UniqueConstraint(fields=["cours", "etudiant"], name="unique_alerte_absence")
+        ]
+        indexes = [
+            models.Index(fields=['taux_presence', 'id']),
+            models.Index(fields=['etudiant']),
+        ]
+
+    def __str__(self):
+        return f"{self.etudiant} - {self.cours.nom} : {self.taux_presence:.0f}%"
+
+
+class PointReprise(models.Model):
+    """Dernier ``updated_at`` traité par un traitement incrémental (ex. ``analyser_absences``)"""
+    nom = models.CharField(max_length=50, unique=True, verbose_name="Traitement")
+    horodatage = models.DateTimeField(verbose_name="Traité jusqu'à")
+
+    class Meta:
+        verbose_name = "Point de reprise"
+        verbose_name_plural = "Points de reprise"
+
+    def __str__(self):
+        return f"{self.nom} : {self.horodatage}"
+
+
 # -------------------
 # MODÈLES ADDITIONNELS (optionnels)
 # -------------------
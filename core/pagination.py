@@ -0,0 +1,160 @@
+# core/pagination.py
+
+import hashlib
+from functools import cached_property
+
+from django.core import signing
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q
+
+from .cache import cache_stats
+
+
+SEL_CURSEUR = "core.pagination"
+
+
+# -------------------
+# CURSEURS
+# -------------------
+
+def _valeur(objet, champ):
+    """Valeur d'un champ d'ordre (``classe__nom`` -> ``objet.classe.nom``)"""
+    for attribut in champ.split('__'):
+        objet = getattr(objet, attribut)
+    return objet.isoformat() if hasattr(objet, 'isoformat') else objet
+
+
+def _encoder(objet, champs, sens):
+    return signing.dumps(
+        {"v": [_valeur(objet, champ) for champ, _ in champs], "s": sens},
+        salt=SEL_CURSEUR, compress=True
+    )
+
+
+def _decoder(curseur, champs):
+    """Retourne ``(valeurs, sens)``, ou None pour un curseur absent ou invalide"""
+    if not curseur:
+        return None
+    try:
+        donnees = signing.loads(curseur, salt=SEL_CURSEUR)
+    except signing.BadSignature:
+        return None
+    if len(donnees.get("v", ())) != len(champs) or donnees.get("s") not in ("suivant", "precedent"):
+        return None
+    return donnees["v"], donnees["s"]
+
+
+def _au_dela(champs, valeurs, vers_le_debut):
+    """
+    Condition « strictement après la ligne ``valeurs`` » dans l'ordre
+    ``champs`` (ou avant si ``vers_le_debut``) :
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)...
+    """
+    condition = Q()
+    egalites = {}
+    for (champ, decroissant), valeur in zip(champs, valeurs):
+        lookup = "lt" if decroissant != vers_le_debut else "gt"
+        condition |= Q(**egalites, **{f"{champ}__{lookup}": valeur})
+        egalites[champ] = valeur
+    return condition
+
+
+# -------------------
+# PAGE
+# -------------------
+
+class PageCurseur:
+    """
+    Page d'une pagination par curseur. Offre aux gabarits l'interface de
+    ``django.core.paginator.Page`` (itération, ``has_next``,
+    ``has_previous``, ``has_other_pages``) avec des jetons
+    ``curseur_suivant`` / ``curseur_precedent`` au lieu de numéros de page.
+    """
+
+    def __init__(self, objets, curseur_suivant, curseur_precedent, compter):
+        self.object_list = objets
+        self.curseur_suivant = curseur_suivant
+        self.curseur_precedent = curseur_precedent
+        self._compter = compter
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.curseur_suivant is not None
+
+    def has_previous(self):
+        return self.curseur_precedent is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @cached_property
+    def total(self):
+        """Nombre total d'objets, calculé seulement si affiché"""
+        return self._compter()
+
+    def as_dict(self):
+        """Bloc de pagination des réponses JSON"""
+        return {
+            "suivant": self.curseur_suivant,
+            "precedent": self.curseur_precedent,
+            "more": self.has_next(),
+        }
+
+
+def total_en_cache(queryset):
+    """
+    ``COUNT`` d'un queryset mis en cache avec les statistiques (donc
+    invalidé à chaque écriture) sous une clé dérivée de sa requête SQL.
+    """
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0
+    cle = hashlib.md5(sql.encode()).hexdigest()
+    return cache_stats(f"total:{cle}", queryset.count)
+
+
+def paginer(queryset, ordre, par_page, curseur=None):
+    """
+    Page de ``queryset`` suivant ``curseur`` (jeton de la page précédente
+    ou suivante ; première page si absent ou invalide).
+
+    ``ordre`` doit identifier chaque ligne de manière unique (terminer par
+    ``id``) et ne porter que sur des champs non nuls. Chaque page est une
+    requête ``WHERE ... LIMIT`` : son coût ne dépend pas de sa profondeur,
+    contrairement à ``OFFSET``.
+    """
+    champs = [(champ.lstrip('-'), champ.startswith('-')) for champ in ordre]
+    position = _decoder(curseur, champs)
+    vers_le_debut = position is not None and position[1] == "precedent"
+
+    if vers_le_debut:
+        # Page précédente : lecture à rebours depuis le premier élément affiché
+        ordre = [champ[1:] if champ.startswith('-') else f"-{champ}" for champ in ordre]
+    lignes = queryset.order_by(*ordre)
+    if position is not None:
+        lignes = lignes.filter(_au_dela(champs, position[0], vers_le_debut))
+
+    objets = list(lignes[:par_page + 1])
+    plus = len(objets) > par_page
+    objets = objets[:par_page]
+    if vers_le_debut:
+        objets.reverse()
+        suivant, precedent = True, plus
+    else:
+        suivant, precedent = plus, position is not None
+
+    return PageCurseur(
+        objets,
+        _encoder(objets[-1], champs, "suivant") if objets and suivant else None,
+        _encoder(objets[0], champs, "precedent") if objets and precedent else None,
+        lambda: total_en_cache(queryset),
+    )
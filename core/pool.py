@@ -0,0 +1,34 @@
+# core/pool.py
+#
+# Points d'entrée des processus des pools de ``runjobs`` et
+# ``generer_vignettes``. Les processus sont démarrés en mode ``spawn`` :
+# ce module ne doit rien importer de Django au chargement, la configuration
+# étant faite par ``initialiser_worker``.
+
+
+def initialiser_worker():
+    import django
+
+    django.setup()
+
+
+def executer_dans_worker(tache_id):
+    from django.db import connections
+
+    from .taches import executer_tache
+
+    try:
+        return executer_tache(tache_id)
+    finally:
+        connections.close_all()
+
+
+def vignettes_dans_worker(etudiant_id):
+    from django.db import connections
+
+    from .vignettes import vignettes_etudiant
+
+    try:
+        return etudiant_id, vignettes_etudiant(etudiant_id)
+    finally:
+        connections.close_all()
@@ -0,0 +1,197 @@
+# core/recherche.py
+
+import re
+import unicodedata
+from functools import lru_cache, reduce
+from operator import or_
+
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q, Sum
+
+from .models import Cours, Etudiant, TermeRecherche
+
+
+TAILLE_TERME = TermeRecherche._meta.get_field('terme').max_length
+
+# Au-delà, les mots supplémentaires de la requête sont ignorés
+MAX_JETONS = 5
+
+# Nombre de termes au-delà duquel un mot est jugé peu sélectif
+BORNE_SELECTIVITE = 1000
+
+
+# -------------------
+# NORMALISATION
+# -------------------
+
+def mots(texte):
+    """Mots d'un texte en minuscules, sans accents ni ponctuation"""
+    texte = unicodedata.normalize('NFKD', str(texte or "")).encode('ascii', 'ignore').decode()
+    return re.findall(r"[a-z0-9]+", texte.lower())
+
+
+def termes_etudiant(nom, prenom, matricule, classe):
+    matricule = mots(matricule)
+    # Le matricule est aussi indexé d'un seul tenant : "E-2024/01" -> "e202401"
+    termes = {*mots(nom), *mots(prenom), *matricule, "".join(matricule), *mots(classe)}
+    return {t[:TAILLE_TERME] for t in termes if t}
+
+
+def termes_cours(nom, code, classe, enseignant):
+    termes = {*mots(nom), *mots(code), *mots(classe), *mots(enseignant)}
+    return {t[:TAILLE_TERME] for t in termes if t}
+
+
+# -------------------
+# INDEXATION
+# -------------------
+
+def _remplacer(type_objet, objet_ids, termes_par_objet):
+    """Remplace les termes des objets donnés (tous si ``objet_ids`` est None)"""
+    anciens = TermeRecherche.objects.filter(type_objet=type_objet)
+    if objet_ids is not None:
+        anciens = anciens.filter(objet_id__in=objet_ids)
+
+    with transaction.atomic(savepoint=False):
+        anciens.delete()
+        TermeRecherche.objects.bulk_create(
+            (
+                TermeRecherche(type_objet=type_objet, objet_id=objet_id, terme=terme)
+                for objet_id, termes in termes_par_objet
+                for terme in termes
+            ),
+            batch_size=1000,
+        )
+
+
+def indexer_etudiants(etudiant_ids=None):
+    """(Ré)indexe les étudiants donnés, ou tous. Retourne le nombre d'étudiants"""
+    etudiants = Etudiant.objects.all()
+    if etudiant_ids is not None:
+        etudiant_ids = list(etudiant_ids)
+        etudiants = etudiants.filter(pk__in=etudiant_ids)
+
+    lignes = list(etudiants.values_list('id', 'nom', 'prenom', 'matricule', 'classe__nom'))
+    _remplacer('etudiant', etudiant_ids, ((pk, termes_etudiant(*valeurs)) for pk, *valeurs in lignes))
+    return len(lignes)
+
+
+def indexer_cours(cours_ids=None):
+    """(Ré)indexe les cours donnés, ou tous. Retourne le nombre de cours"""
+    cours = Cours.objects.all()
+    if cours_ids is not None:
+        cours_ids = list(cours_ids)
+        cours = cours.filter(pk__in=cours_ids)
+
+    lignes = list(cours.values_list('id', 'nom', 'code', 'classe__nom', 'enseignant__username'))
+    _remplacer('cours', cours_ids, ((pk, termes_cours(*valeurs)) for pk, *valeurs in lignes))
+    return len(lignes)
+
+
+def desindexer(type_objet, objet_ids):
+    TermeRecherche.objects.filter(type_objet=type_objet, objet_id__in=objet_ids).delete()
+
+
+# -------------------
+# RECHERCHE
+# -------------------
+
+def _prefixe(jeton):
+    """
+    Termes commençant par ``jeton``, exprimé comme un intervalle pour que
+    l'index (type_objet, terme) soit utilisé quel que soit le moteur
+    (``LIKE`` est insensible à la casse sous SQLite et ignore l'index).
+    """
+    borne = jeton[:-1] + chr(ord(jeton[-1]) + 1)
+    return Q(terme__gte=jeton, terme__lt=borne)
+
+
+@lru_cache(maxsize=None)
+def _trigrammes_disponibles(alias):
+    connexion = connections[alias]
+    if connexion.vendor != 'postgresql':
+        return False
+    with connexion.cursor() as curseur:
+        curseur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return curseur.fetchone() is not None
+
+
+def _recherche_approchee(termes, jetons, limite, exclure):
+    """Correspondances approchées (fautes de frappe) avec pg_trgm"""
+    from django.contrib.postgres.search import TrigramSimilarity
+    from django.db.models.functions import Greatest
+
+    similarites = [TrigramSimilarity('terme', jeton) for jeton in jetons]
+    score = similarites[0] if len(similarites) == 1 else Greatest(*similarites)
+    return list(
+        termes
+        .filter(reduce(or_, (Q(terme__trigram_similar=jeton) for jeton in jetons)))
+        .exclude(objet_id__in=exclure)
+        .values('objet_id')
+        .annotate(score=Sum(score))
+        .order_by('-score', 'objet_id')
+        .values_list('objet_id', flat=True)[:limite]
+    )
+
+
+def _plus_selectif(termes, jetons):
+    """Mot de la requête ayant le moins de termes correspondants (compte borné)"""
+    if len(jetons) == 1:
+        return jetons[0]
+    return min(jetons, key=lambda jeton: termes.filter(_prefixe(jeton))[:BORNE_SELECTIVITE].count())
+
+
+def _rechercher(queryset, type_objet, query, limite):
+    """
+    Objets de ``queryset`` dont chaque mot de ``query`` est le début d'un de
+    leurs termes. Le mot le plus sélectif guide la recherche : les objets
+    où il apparaît en entier d'abord, puis ceux où il n'est qu'un préfixe ;
+    les autres mots sont vérifiés par objet via l'index (type_objet,
+    objet_id). Chaque étape s'arrête dès ``limite`` objets trouvés.
+
+    Sous PostgreSQL avec pg_trgm, les résultats manquants sont complétés
+    par similarité de trigrammes.
+    """
+    jetons = list(dict.fromkeys(mots(query)))[:MAX_JETONS]
+    if not jetons:
+        return []
+
+    termes = TermeRecherche.objects.filter(type_objet=type_objet)
+    if queryset.query.has_filters():
+        # Vérifié par terme candidat plutôt que matérialisé en entier
+        termes = termes.filter(Exists(queryset.order_by().filter(pk=OuterRef('objet_id'))))
+
+    guide = _plus_selectif(termes, jetons)
+    candidats = termes
+    for jeton in jetons:
+        if jeton != guide:
+            candidats = candidats.filter(Exists(
+                TermeRecherche.objects.filter(type_objet=type_objet, objet_id=OuterRef('objet_id')).filter(_prefixe(jeton))
+            ))
+
+    # Sans DISTINCT (qui ferait choisir l'index par objet et parcourir toute
+    # la table) : les doublons sont écartés ici et la lecture s'arrête dès
+    # que la limite est atteinte
+    ids = []
+    for condition in (Q(terme=guide), _prefixe(guide) & ~Q(terme=guide)):
+        for objet_id in candidats.filter(condition).values_list('objet_id', flat=True).iterator(chunk_size=limite):
+            if len(ids) == limite:
+                break
+            if objet_id not in ids:
+                ids.append(objet_id)
+
+    if len(ids) < limite and _trigrammes_disponibles(queryset.db):
+        ids += _recherche_approchee(termes, jetons, limite - len(ids), ids)
+
+    objets = queryset.order_by().in_bulk(ids)
+    return [objets[pk] for pk in ids if pk in objets]
+
+
+def rechercher_etudiants(queryset, query, limite=10):
+    """Étudiants de ``queryset`` correspondant à ``query`` (nom, prénom, matricule, classe)"""
+    return _rechercher(queryset, 'etudiant', query, limite)
+
+
+def rechercher_cours(queryset, query, limite=10):
+    """Cours de ``queryset`` correspondant à ``query`` (nom, code, classe, enseignant)"""
+    return _rechercher(queryset, 'cours', query, limite)
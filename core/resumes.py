@@ -0,0 +1,97 @@
+# core/resumes.py
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Presence, ResumePresence
+from .stats import STATUTS
+
+
+CHAMPS_COMPTEURS = [*STATUTS, 'total']
+
+
+def _compteurs(presences):
+    """Compteurs par (cours, étudiant) calculés depuis la table Presence"""
+    lignes = (
+        presences
+        .values('seance__cours_id', 'etudiant_id')
+        .annotate(
+            total=Count('id'),
+            **{statut: Count('id', filter=Q(statut=statut)) for statut in STATUTS}
+        )
+        .order_by()
+    )
+    return {
+        (ligne['seance__cours_id'], ligne['etudiant_id']): {c: ligne[c] for c in CHAMPS_COMPTEURS}
+        for ligne in lignes
+    }
+
+
+def _ecrire(compteurs, obsoletes=None):
+    """Upsert des résumés calculés et suppression de ceux devenus vides"""
+    with transaction.atomic(savepoint=False):
+        if obsoletes is not None:
+            obsoletes.delete()
+        ResumePresence.objects.bulk_create(
+            [
+                ResumePresence(cours_id=cours_id, etudiant_id=etudiant_id, **valeurs)
+                for (cours_id, etudiant_id), valeurs in compteurs.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['cours', 'etudiant'],
+            update_fields=[*CHAMPS_COMPTEURS, 'updated_at'],
+        )
+
+
+def rafraichir_resumes(cours_id, etudiant_ids=None):
+    """
+    Recalcule les résumés d'un cours, limités à ``etudiant_ids`` si fourni.
+    Coût constant en requêtes, proportionnel aux lignes concernées.
+    """
+    presences = Presence.objects.filter(seance__cours_id=cours_id)
+    resumes = ResumePresence.objects.filter(cours_id=cours_id)
+
+    if etudiant_ids is None:
+        compteurs = _compteurs(presences)
+        _ecrire(compteurs, resumes.exclude(etudiant_id__in=[e for _, e in compteurs]))
+        return
+
+    etudiant_ids = set(etudiant_ids)
+    compteurs = _compteurs(presences.filter(etudiant_id__in=etudiant_ids))
+    vides = etudiant_ids - {e for _, e in compteurs}
+    _ecrire(compteurs, resumes.filter(etudiant_id__in=vides) if vides else None)
+
+
+def reconstruire_resumes(cours_ids=None):
+    """Reconstruit intégralement les résumés (tous les cours ou ``cours_ids``)"""
+    presences = Presence.objects.all()
+    resumes = ResumePresence.objects.all()
+    if cours_ids is not None:
+        presences = presences.filter(seance__cours_id__in=cours_ids)
+        resumes = resumes.filter(cours_id__in=cours_ids)
+
+    compteurs = _compteurs(presences)
+    _ecrire(compteurs, resumes)
+    return len(compteurs)
+
+
+def ecarts_resumes(cours_ids=None):
+    """
+    Compare la table des résumés aux compteurs recalculés. Retourne la liste
+    des clés ``(cours_id, etudiant_id)`` incohérentes.
+    """
+    presences = Presence.objects.all()
+    resumes = ResumePresence.objects.all()
+    if cours_ids is not None:
+        presences = presences.filter(seance__cours_id__in=cours_ids)
+        resumes = resumes.filter(cours_id__in=cours_ids)
+
+    attendus = _compteurs(presences)
+    actuels = {
+        (r['cours_id'], r['etudiant_id']): {c: r[c] for c in CHAMPS_COMPTEURS}
+        for r in resumes.values('cours_id', 'etudiant_id', *CHAMPS_COMPTEURS)
+    }
+    return sorted(
+        cle for cle in attendus.keys() | actuels.keys()
+        if attendus.get(cle) != actuels.get(cle)
+    )
@@ -0,0 +1,122 @@
+# core/routage.py
+
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Alias optionnel de la réplique en lecture (voir REPLICA_DATABASE_URL)
+ALIAS_REPLICA = "replica"
+
+# Cookie « lire sur le primaire jusqu'à » posé après une écriture
+COOKIE_PRIMAIRE = "primaire_jusqua"
+
+_etat_courant = ContextVar("etat_routage", default=None)
+
+
+class EtatRoutage:
+    """
+    Routage des lectures pendant une requête HTTP : ``rapport`` est levé
+    par les vues marquées ``@vue_rapport``, ``collee`` quand l'utilisateur
+    a écrit récemment (cookie), ``ecriture`` dès la première écriture de
+    la requête. Partagé par les threads de ``sync_to_async`` (ContextVar
+    copiée, objet commun).
+    """
+
+    __slots__ = ("rapport", "collee", "ecriture")
+
+    def __init__(self, collee=False):
+        self.rapport = False
+        self.collee = collee
+        self.ecriture = False
+
+    def activer(self):
+        return _etat_courant.set(self)
+
+    @staticmethod
+    def desactiver(jeton):
+        _etat_courant.reset(jeton)
+
+    @property
+    def lecture_replica(self):
+        return self.rapport and not self.collee and not self.ecriture
+
+
+def replica_configuree():
+    return ALIAS_REPLICA in connections
+
+
+def vue_rapport(vue):
+    """
+    Marque une vue de rapport en lecture seule : ses lectures vont à la
+    réplique si elle est configurée et que l'utilisateur n'a pas écrit
+    récemment. À placer sous ``login_required`` : la session et
+    l'utilisateur restent lus sur le primaire.
+    """
+    if iscoroutinefunction(vue):
+        @functools.wraps(vue)
+        async def envelopper(request, *args, **kwargs):
+            etat = _etat_courant.get()
+            if etat is not None:
+                etat.rapport = True
+            return await vue(request, *args, **kwargs)
+    else:
+        @functools.wraps(vue)
+        def envelopper(request, *args, **kwargs):
+            etat = _etat_courant.get()
+            if etat is not None:
+                etat.rapport = True
+            return vue(request, *args, **kwargs)
+    return envelopper
+
+
+@contextmanager
+def lecture_primaire():
+    """
+    Lectures du bloc sur le primaire, même dans une vue de rapport : pour
+    les données enregistrées sous la version courante (rapports stockés),
+    qu'une réplique en retard ne doit pas fournir.
+    """
+    etat = _etat_courant.get()
+    if etat is None or not etat.rapport:
+        yield
+        return
+    etat.rapport = False
+    try:
+        yield
+    finally:
+        etat.rapport = True
+
+
+class RouteurLecture:
+    """
+    Envoie les lectures des vues de rapport vers la réplique ; tout le
+    reste (écritures, sessions, commandes, tâches) va au primaire.
+    """
+
+    def db_for_read(self, model, **hints):
+        etat = _etat_courant.get()
+        if (
+            etat is not None and etat.lecture_replica
+            and model._meta.app_label != "sessions"
+            and replica_configuree()
+        ):
+            return ALIAS_REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        etat = _etat_courant.get()
+        if etat is not None:
+            etat.ecriture = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données des deux côtés
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplique reçoit le schéma par réplication (ou copie du fichier SQLite)
+        return db != ALIAS_REPLICA
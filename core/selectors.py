@@ -0,0 +1,116 @@
+# core/selectors.py
+
+import functools
+from contextvars import ContextVar
+
+from django.db.models import Count
+
+from .models import Classe, Cours, Etudiant, Seance
+
+
+_memo_courant = ContextVar("memo_selecteurs", default=None)
+
+
+# -------------------
+# MÉMOÏSATION PAR REQUÊTE
+# -------------------
+
+class MemoSelecteurs:
+    """
+    Résultats des sélecteurs pendant une requête HTTP (voir
+    ``SelecteursMiddleware``) : un sélecteur appelé avec les mêmes
+    arguments renvoie le même QuerySet, déjà évalué. Itérations, ``len``,
+    tranches, ``count()`` et ``exists()`` sont alors servis sans requête ;
+    seuls ``filter`` et consorts en exécutent une nouvelle. Vidé à chaque
+    écriture d'un modèle (``core.signals.donnees_modifiees``). Hors requête
+    (commandes, tâches), rien n'est mémorisé.
+    """
+
+    __slots__ = ("resultats",)
+
+    def __init__(self):
+        self.resultats = {}
+
+    def activer(self):
+        return _memo_courant.set(self)
+
+    @staticmethod
+    def desactiver(jeton):
+        _memo_courant.reset(jeton)
+
+
+def oublier_selecteurs():
+    memo = _memo_courant.get()
+    if memo is not None:
+        memo.resultats.clear()
+
+
+def selecteur(fonction):
+    """
+    Évalue le QuerySet ``fonction(utilisateur, *args)`` et le mémoïse pour
+    la requête courante. Réservé aux ensembles courts (cours, classes d'un
+    enseignant) : les vues en dérivent tranches et totaux en Python.
+    """
+    @functools.wraps(fonction)
+    def envelopper(utilisateur, *args):
+        memo = _memo_courant.get()
+        cle = (fonction.__name__, utilisateur.pk, args)
+        if memo is not None and cle in memo.resultats:
+            return memo.resultats[cle]
+        resultat = fonction(utilisateur, *args)
+        len(resultat)  # évalué une fois : le cache de résultats du QuerySet sert ensuite
+        if memo is not None:
+            memo.resultats[cle] = resultat
+        return resultat
+    return envelopper
+
+
+# -------------------
+# SÉLECTEURS ENSEIGNANT (évalués, mémoïsés)
+# -------------------
+
+@selecteur
+def cours_enseignant(utilisateur):
+    """Cours de l'enseignant, plus récents d'abord, avec leur classe et leur nombre de séances"""
+    return (
+        Cours.objects.filter(enseignant=utilisateur)
+        .select_related('classe')
+        .annotate(nb_seances=Count('seances'))
+        .order_by('-created_at', '-id')
+    )
+
+
+@selecteur
+def classes_enseignant(utilisateur):
+    """
+    Classes où l'enseignant a au moins un cours, par nom. Sous-requête sur
+    les cours plutôt qu'une jointure + ``distinct()`` ; seuls les champs
+    affichés (listes de choix, ``__str__``) sont chargés.
+    """
+    return (
+        Classe.objects.filter(pk__in=Cours.objects.filter(enseignant=utilisateur).values('classe_id'))
+        .only('id', 'nom', 'niveau')
+        .order_by('nom', 'id')
+    )
+
+
+# -------------------
+# REQUÊTES DE BASE (paresseuses, non mémoïsées)
+# -------------------
+
+# Séances et étudiants sont trop nombreux pour être chargés en entier : les
+# vues filtrent, paginent ou agrègent ces QuerySets en une requête chacune.
+
+def etudiants_enseignant(utilisateur, classe_id=None):
+    """Étudiants des classes de l'enseignant (d'une seule si ``classe_id``), avec leur classe"""
+    etudiants = Etudiant.objects.filter(
+        classe_id__in=Cours.objects.filter(enseignant=utilisateur).values('classe_id')
+    )
+    if classe_id is not None:
+        etudiants = etudiants.filter(classe_id=classe_id)
+    return etudiants.select_related('classe')
+
+
+def seances_enseignant(utilisateur):
+    """Séances des cours de l'enseignant, avec leur cours et sa classe"""
+    return Seance.objects.filter(cours__enseignant=utilisateur).select_related('cours', 'cours__classe')
@@ -0,0 +1,65 @@
+# core/services.py
+
+from django.db import transaction
+
+from .cache import invalider_stats
+from .models import Etudiant, Presence
+from .resumes import rafraichir_resumes
+from .stats import STATUTS
+
+
+# -------------------
+# APPEL DE PRÉSENCE
+# -------------------
+
+def enregistrer_appel(seance, statuts_par_etudiant, statut_defaut="absent"):
+    """
+    Enregistre l'appel complet d'une séance en un nombre constant de requêtes.
+
+    ``statuts_par_etudiant`` associe un id d'étudiant (int ou str) à un statut ;
+    les étudiants de la classe absents du dictionnaire reçoivent
+    ``statut_defaut``. L'appartenance à la classe est vérifiée une seule fois
+    pour tout l'ensemble, puis toutes les lignes modifiées sont écrites avec
+    un seul ``bulk_create`` (upsert) dans une transaction, avec la mise à
+    jour des résumés de présence concernés.
+
+    Retourne un bilan ``{"crees": n, "modifies": n, "inchanges": n}``.
+    """
+    statuts_par_etudiant = {int(k): v for k, v in statuts_par_etudiant.items()}
+
+    etudiant_ids = set(
+        Etudiant.objects.filter(classe_id=seance.cours.classe_id).values_list('id', flat=True).order_by()
+    )
+    if not statuts_par_etudiant.keys() <= etudiant_ids:
+        raise ValueError("L'étudiant n'appartient pas à la classe de ce cours")
+
+    invalides = set(statuts_par_etudiant.values()) - set(STATUTS)
+    if invalides:
+        raise ValueError(f"Statut invalide : {', '.join(sorted(invalides))}")
+
+    bilan = {"crees": 0, "modifies": 0, "inchanges": 0}
+    with transaction.atomic():
+        existants = dict(
+            Presence.objects.filter(seance=seance).values_list('etudiant_id', 'statut')
+        )
+
+        a_ecrire = []
+        for etudiant_id in etudiant_ids:
+            statut = statuts_par_etudiant.get(etudiant_id, statut_defaut)
+            ancien = existants.get(etudiant_id)
+            if ancien == statut:
+                bilan["inchanges"] += 1
+                continue
+            bilan["crees" if ancien is None else "modifies"] += 1
+            a_ecrire.append(Presence(etudiant_id=etudiant_id, seance=seance, statut=statut))
+
+        if a_ecrire:
+            Presence.objects.bulk_create(
+                a_ecrire,
+                update_conflicts=True,
+                unique_fields=['etudiant', 'seance'],
+                update_fields=['statut', 'horodatage_client', 'updated_at'],
+            )
+            rafraichir_resumes(seance.cours_id, [p.etudiant_id for p in a_ecrire])
+            transaction.on_commit(invalider_stats)
+    return bilan
@@ -0,0 +1,133 @@
+# core/signals.py
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .base_donnees import appliquer_pragmas
+from .cache import invalider_stats
+from .instrumentation import installer_mesure_sql
+from .models import Classe, Cours, Etudiant, Presence, Seance, User
+from .recherche import desindexer, indexer_cours, indexer_etudiants
+from .resumes import rafraichir_resumes
+from .selectors import oublier_selecteurs
+from .vignettes import generer_vignettes
+
+
+# -------------------
+# RÉSUMÉS DE PRÉSENCE
+# -------------------
+
+@receiver(post_save, sender=Presence)
+def presence_enregistree(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rafraichir_resumes(instance.seance.cours_id, [instance.etudiant_id])
+
+
+@receiver(post_delete, sender=Presence)
+def presence_supprimee(sender, instance, origin=None, **kwargs):
+    # Les suppressions en cascade (séance, étudiant, cours) sont traitées
+    # globalement par leur propre signal ou par la cascade sur les résumés
+    if isinstance(origin, Presence) or getattr(origin, 'model', None) is Presence:
+        rafraichir_resumes(instance.seance.cours_id, [instance.etudiant_id])
+
+
+@receiver(post_delete, sender=Seance)
+def seance_supprimee(sender, instance, **kwargs):
+    rafraichir_resumes(instance.cours_id)
+
+
+# -------------------
+# INDEX DE RECHERCHE
+# -------------------
+
+@receiver(post_save, sender=Etudiant)
+def etudiant_enregistre(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indexer_etudiants([instance.pk])
+
+
+@receiver(post_delete, sender=Etudiant)
+def etudiant_supprime(sender, instance, **kwargs):
+    desindexer('etudiant', [instance.pk])
+
+
+@receiver(post_save, sender=Cours)
+def cours_enregistre(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indexer_cours([instance.pk])
+
+
+@receiver(post_delete, sender=Cours)
+def cours_supprime(sender, instance, **kwargs):
+    desindexer('cours', [instance.pk])
+
+
+@receiver(post_save, sender=Classe)
+def classe_enregistree(sender, instance, created, raw=False, **kwargs):
+    # Le nom de la classe fait partie des termes de ses étudiants et cours
+    if raw or created:
+        return
+    indexer_etudiants(instance.etudiants.values_list('pk', flat=True))
+    indexer_cours(instance.cours.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User)
+def utilisateur_enregistre(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Nom d'utilisateur indexé avec les cours ; ignoré pour les mises à
+    # jour partielles comme last_login à la connexion
+    if raw or created or (update_fields is not None and 'username' not in update_fields):
+        return
+    cours_ids = list(instance.cours_enseignant.values_list('pk', flat=True))
+    if cours_ids:
+        indexer_cours(cours_ids)
+
+
+# -------------------
+# VIGNETTES DES PHOTOS
+# -------------------
+
+@receiver(pre_save, sender=Etudiant)
+def photo_envoyee(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Vignettes d'une nouvelle photo générées à l'envoi, avant l'enregistrement du fichier"""
+    if raw or update_fields is not None:
+        return
+    if not instance.photo:
+        instance.photo_empreinte = ""
+    elif not instance.photo._committed:
+        try:
+            instance.photo_empreinte = generer_vignettes(instance.photo)
+        except ValueError:
+            # Photo illisible : enregistrée telle quelle, affichée sans vignette
+            instance.photo_empreinte = ""
+
+
+# -------------------
+# CACHE DES STATISTIQUES
+# -------------------
+
+def donnees_modifiees(sender, instance, update_fields=None, **kwargs):
+    # Connexion : seul last_login change, rien d'affiché
+    if isinstance(instance, User) and update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    oublier_selecteurs()
+    # Après validation, comme services.enregistrer_appel : un cache vidé
+    # avant ne doit pas être recalculé sur les données d'avant
+    transaction.on_commit(invalider_stats, using=instance._state.db)
+
+
+for modele in (Presence, Seance, Cours, Etudiant, Classe, User):
+    post_save.connect(donnees_modifiees, sender=modele, dispatch_uid=f"invalider_stats_{modele.__name__}_save")
+    post_delete.connect(donnees_modifiees, sender=modele, dispatch_uid=f"invalider_stats_{modele.__name__}_delete")
+
+
+# -------------------
+# CONNEXIONS (pragmas SQLite, instrumentation)
+# -------------------
+
+@receiver(connection_created)
+def connexion_creee(sender, connection, **kwargs):
+    appliquer_pragmas(connection)
+    installer_mesure_sql(connection)
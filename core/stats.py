@@ -0,0 +1,191 @@
+# core/stats.py
+
+from django.db.models import Count
+
+from .cache import cache_stats_multiple
+from .models import Etudiant, Presence, ResumePresence, Seance
+
+
+STATUTS = ("present", "retard", "absent", "motif")
+
+
+# -------------------
+# RÉSULTATS
+# -------------------
+
+class StatsEtudiant:
+    """Compteurs de présence d'un étudiant pour un cours"""
+    __slots__ = ("etudiant", "present", "retard", "absent", "motif", "total_seances")
+
+    def __init__(self, etudiant, total_seances, present=0, retard=0, absent=0, motif=0):
+        self.etudiant = etudiant
+        self.total_seances = total_seances
+        self.present = present
+        self.retard = retard
+        self.absent = absent
+        self.motif = motif
+
+    @property
+    def total(self):
+        return self.present + self.retard + self.absent + self.motif
+
+    @property
+    def taux_presence(self):
+        if self.total_seances == 0:
+            return 0
+        return (self.present + self.retard) / self.total_seances * 100
+
+    def as_dict(self):
+        return {
+            'etudiant': f"{self.etudiant.nom} {self.etudiant.prenom or ''}",
+            'present': self.present,
+            'absent': self.absent,
+            'retard': self.retard,
+            'motif': self.motif,
+            'taux_presence': self.taux_presence,
+        }
+
+
+class StatsCours:
+    """Statistiques agrégées d'un cours : totaux globaux et détail par étudiant"""
+    __slots__ = ("cours", "total_seances", "etudiants_stats", "totaux")
+
+    def __init__(self, cours, total_seances, etudiants_stats):
+        self.cours = cours
+        self.total_seances = total_seances
+        self.etudiants_stats = etudiants_stats
+        self.totaux = {
+            statut: sum(getattr(es, statut) for es in etudiants_stats)
+            for statut in STATUTS
+        }
+
+    def as_dict(self):
+        return {
+            'cours': self.cours.nom,
+            'classe': self.cours.classe.nom,
+            'total_seances': self.total_seances,
+            'global': self.totaux,
+            'etudiants_stats': [es.as_dict() for es in self.etudiants_stats],
+        }
+
+
+# -------------------
+# AGRÉGATION
+# -------------------
+
+def compteurs_par_etudiant(cours_ids):
+    """
+    Lit les compteurs par (cours, étudiant) depuis la table des résumés.
+    Retourne {(cours_id, etudiant_id): {statut: n}}.
+    """
+    lignes = ResumePresence.objects.filter(cours_id__in=cours_ids).values_list(
+        'cours_id', 'etudiant_id', *STATUTS
+    )
+    return {
+        (cours_id, etudiant_id): dict(zip(STATUTS, compteurs))
+        for cours_id, etudiant_id, *compteurs in lignes
+    }
+
+
+def stats_par_cours(cours_list):
+    """
+    Calcule les statistiques de présence de plusieurs cours avec un nombre
+    constant de requêtes (séances, étudiants, compteurs), quel que soit le
+    nombre de cours ou d'étudiants.
+    """
+    cours_list = list(cours_list)
+    if not cours_list:
+        return []
+
+    cours_ids = [c.id for c in cours_list]
+    classe_ids = {c.classe_id for c in cours_list}
+
+    seances_par_cours = dict(
+        Seance.objects
+        .filter(cours_id__in=cours_ids)
+        .values('cours_id')
+        .annotate(n=Count('id'))
+        .values_list('cours_id', 'n')
+        .order_by()
+    )
+
+    etudiants_par_classe = {}
+    for etu in Etudiant.objects.filter(classe_id__in=classe_ids).order_by('nom', 'prenom'):
+        etudiants_par_classe.setdefault(etu.classe_id, []).append(etu)
+
+    compteurs = compteurs_par_etudiant(cours_ids)
+
+    resultats = []
+    for cours in cours_list:
+        total_seances = seances_par_cours.get(cours.id, 0)
+        etudiants_stats = [
+            StatsEtudiant(etu, total_seances, **compteurs.get((cours.id, etu.id), {}))
+            for etu in etudiants_par_classe.get(cours.classe_id, [])
+        ]
+        resultats.append(StatsCours(cours, total_seances, etudiants_stats))
+    return resultats
+
+
+def stats_cours(cours):
+    """Raccourci pour un seul cours"""
+    return stats_par_cours([cours])[0]
+
+
+# -------------------
+# PAR ÉTUDIANT
+# -------------------
+
+def _resumes_etudiants(etudiant_ids):
+    resumes = {pk: {"cours": [], "total": 0, "presentes": 0, "taux_global": 0} for pk in etudiant_ids}
+    lignes = (
+        ResumePresence.objects.filter(etudiant_id__in=etudiant_ids)
+        .values_list('etudiant_id', 'cours_id', 'cours__nom', *STATUTS, 'total')
+        .order_by('cours__nom', 'cours_id')
+    )
+    for etudiant_id, cours_id, nom, present, retard, absent, motif, total in lignes:
+        resume = resumes[etudiant_id]
+        resume["cours"].append({
+            "id": cours_id,
+            "nom": nom,
+            "present": present,
+            "retard": retard,
+            "absent": absent,
+            "motif": motif,
+            "total": total,
+            "taux_presence": (present + retard) / total * 100 if total else 0,
+        })
+        resume["total"] += total
+        resume["presentes"] += present + retard
+    for resume in resumes.values():
+        if resume["total"]:
+            resume["taux_global"] = resume["presentes"] / resume["total"] * 100
+    return resumes
+
+
+def resumes_etudiants(etudiant_ids):
+    """
+    Résumé de présence de chaque étudiant tous cours confondus : compteurs
+    et taux par cours (parmi les séances où il a été appelé) et taux
+    global. Lu depuis la table des résumés en une requête pour les seuls
+    étudiants absents du cache ; chaque résumé est mis en cache
+    (``etudiant:<id>:resume``) jusqu'à la prochaine modification.
+    """
+    return cache_stats_multiple(list(etudiant_ids), lambda pk: f"etudiant:{pk}:resume", _resumes_etudiants)
+
+
+def resume_etudiant(etudiant_id):
+    """Raccourci pour un seul étudiant"""
+    return resumes_etudiants([etudiant_id])[etudiant_id]
+
+
+def chronologie_etudiant(etudiant_id):
+    """
+    Présences d'un étudiant avec leur séance et leur cours, à ordonner par
+    date de séance. Servie par l'index couvrant ``(etudiant, seance,
+    statut, heure_arrivee)`` de Presence : la table n'est pas lue.
+    """
+    return Presence.objects.filter(etudiant_id=etudiant_id).select_related('seance__cours').only(
+        'statut', 'heure_arrivee',
+        'seance__date', 'seance__heure_debut', 'seance__heure_fin', 'seance__is_annulee',
+        'seance__cours__nom',
+    )
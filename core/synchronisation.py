@@ -0,0 +1,227 @@
+# core/synchronisation.py
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_time
+
+from .cache import invalider_stats
+from .models import Etudiant, Presence, Seance
+from .resumes import rafraichir_resumes
+from .stats import STATUTS
+
+
+MAX_MUTATIONS = 5000
+
+
+# -------------------
+# JETON DE SYNCHRONISATION
+# -------------------
+
+def lire_jeton(jeton):
+    """Instant de la synchronisation précédente, ou None pour une première synchronisation"""
+    if not jeton:
+        return None
+    moment = parse_datetime(jeton) if isinstance(jeton, str) else None
+    if moment is None or timezone.is_naive(moment):
+        raise ValueError("Jeton de synchronisation invalide")
+    return moment
+
+
+def _horodatage(mutation, maintenant):
+    """Horodatage client d'une mutation, borné à l'heure du serveur (horloges en avance)"""
+    horodatage = mutation.get("horodatage")
+    moment = parse_datetime(horodatage) if isinstance(horodatage, str) else None
+    if moment is None:
+        raise ValueError("horodatage manquant ou invalide")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return min(moment, maintenant)
+
+
+# -------------------
+# APPLICATION DES MUTATIONS
+# -------------------
+
+class _Lot:
+    """Mutations d'une synchronisation, appliquées dans une seule transaction"""
+
+    def __init__(self, utilisateur, mutations, seance_ids, maintenant):
+        self.maintenant = maintenant
+        self.mutations = mutations
+        self.resultats = [None] * len(mutations)
+        ids = [m.get("seance") for m in mutations] + list(seance_ids)
+        self.seances = Seance.objects.filter(
+            cours__enseignant=utilisateur
+        ).select_related('cours').in_bulk({i for i in ids if isinstance(i, int)})
+        self.classes = {}
+        for etudiant_id, classe_id in Etudiant.objects.filter(
+            classe_id__in={s.cours.classe_id for s in self.seances.values()}
+        ).values_list('id', 'classe_id'):
+            self.classes[etudiant_id] = classe_id
+        self.references = {}  # référence client d'un étudiant ajouté -> id
+
+    def resultat(self, rang, etat, **details):
+        self.resultats[rang] = {"id": self.mutations[rang].get("id"), "etat": etat, **details}
+
+    def seance(self, mutation):
+        seance_id = mutation.get("seance")
+        seance = self.seances.get(seance_id) if isinstance(seance_id, int) else None
+        if seance is None:
+            raise ValueError("Séance introuvable")
+        return seance
+
+    def ajouter_etudiant(self, rang, mutation):
+        """Même règle que ``ajouter_etudiant_rapide`` : par matricule, déplacé dans la classe de la séance"""
+        seance = self.seance(mutation)
+        matricule, nom = mutation.get("matricule"), mutation.get("nom")
+        if not (matricule and nom and isinstance(matricule, str) and isinstance(nom, str)):
+            raise ValueError("Matricule et nom requis")
+        etudiant, cree = Etudiant.objects.get_or_create(
+            matricule=matricule,
+            defaults={'nom': nom, 'prenom': mutation.get("prenom") or '', 'classe_id': seance.cours.classe_id},
+        )
+        if not cree and etudiant.classe_id != seance.cours.classe_id:
+            etudiant.classe_id = seance.cours.classe_id
+            etudiant.save()
+        self.classes[etudiant.pk] = etudiant.classe_id
+        if mutation.get("ref"):
+            self.references[mutation["ref"]] = etudiant.pk
+        self.resultat(rang, "appliquee", etudiant=etudiant.pk, cree=cree)
+
+    def statut(self, mutation):
+        """``(seance, etudiant_id, statut, heure_arrivee, horodatage)`` d'un changement de statut valide"""
+        seance = self.seance(mutation)
+        etudiant_id = mutation.get("etudiant")
+        if isinstance(etudiant_id, str):
+            etudiant_id = self.references.get(etudiant_id)
+        if not isinstance(etudiant_id, int) or self.classes.get(etudiant_id) != seance.cours.classe_id:
+            raise ValueError("L'étudiant n'appartient pas à la classe de ce cours")
+        if mutation.get("statut") not in STATUTS:
+            raise ValueError(f"Statut invalide : {mutation.get('statut')}")
+        heure_arrivee = None
+        if mutation.get("heure_arrivee"):
+            if isinstance(mutation["heure_arrivee"], str):
+                heure_arrivee = parse_time(mutation["heure_arrivee"])
+            if heure_arrivee is None:
+                raise ValueError("heure_arrivee invalide")
+        return seance, etudiant_id, mutation["statut"], heure_arrivee, _horodatage(mutation, self.maintenant)
+
+    def appliquer(self):
+        changements = {}  # (seance_id, etudiant_id) -> (horodatage, rang, Presence)
+        # Étudiants ajoutés d'abord : les changements de statut peuvent citer leur référence
+        ordre = sorted(range(len(self.mutations)), key=lambda r: self.mutations[r].get("type") != "etudiant")
+        for rang in ordre:
+            mutation = self.mutations[rang]
+            try:
+                if mutation.get("type") == "etudiant":
+                    self.ajouter_etudiant(rang, mutation)
+                elif mutation.get("type") == "statut":
+                    seance, etudiant_id, statut, heure_arrivee, horodatage = self.statut(mutation)
+                    cle = (seance.pk, etudiant_id)
+                    precedent = changements.get(cle)
+                    if precedent is not None and precedent[0] >= horodatage:
+                        self.resultat(rang, "ignoree")
+                        continue
+                    if precedent is not None:
+                        self.resultat(precedent[1], "ignoree")
+                    changements[cle] = (horodatage, rang, Presence(
+                        seance=seance, etudiant_id=etudiant_id, statut=statut, heure_arrivee=heure_arrivee,
+                        horodatage_client=horodatage,
+                    ))
+                else:
+                    raise ValueError(f"Type de mutation inconnu : {mutation.get('type')}")
+            except ValueError as e:
+                self.resultat(rang, "rejetee", erreur=str(e))
+
+        if not changements:
+            return
+
+        # Dernier écrivain gagnant : la mutation doit être postérieure au
+        # dernier changement connu, daté côté client s'il vient d'une
+        # synchronisation (heure de l'appareil, pas de l'envoi), sinon par
+        # updated_at. Rejouer un lot est sans effet.
+        derniers = {
+            (seance_id, etudiant_id): horodatage_client or updated_at
+            for seance_id, etudiant_id, horodatage_client, updated_at in Presence.objects.select_for_update().filter(
+                seance_id__in={s for s, _ in changements}, etudiant_id__in={e for _, e in changements},
+            ).values_list('seance_id', 'etudiant_id', 'horodatage_client', 'updated_at')
+        }
+        a_ecrire = []
+        for cle, (horodatage, rang, presence) in changements.items():
+            if cle in derniers and derniers[cle] >= horodatage:
+                self.resultat(rang, "ignoree")
+                continue
+            self.resultat(rang, "appliquee")
+            a_ecrire.append(presence)
+        if not a_ecrire:
+            return
+
+        Presence.objects.bulk_create(
+            a_ecrire,
+            update_conflicts=True,
+            unique_fields=['etudiant', 'seance'],
+            update_fields=['statut', 'heure_arrivee', 'horodatage_client', 'updated_at'],
+        )
+        par_cours = {}
+        for presence in a_ecrire:
+            par_cours.setdefault(presence.seance.cours_id, []).append(presence.etudiant_id)
+        for cours_id, etudiant_ids in par_cours.items():
+            rafraichir_resumes(cours_id, etudiant_ids)
+        transaction.on_commit(invalider_stats)
+
+    def delta(self, depuis):
+        """Présences et étudiants des séances concernées modifiés depuis ``depuis`` (tout si None)"""
+        presences = Presence.objects.filter(seance_id__in=self.seances).order_by('updated_at', 'id')
+        etudiants = Etudiant.objects.filter(
+            classe_id__in={s.cours.classe_id for s in self.seances.values()}
+        ).order_by('nom', 'prenom', 'id')
+        if depuis is not None:
+            # Chevauchement : une transaction validée juste après le jeton précédent n'est pas perdue
+            depuis -= datetime.timedelta(seconds=getattr(settings, "CHEVAUCHEMENT_INCREMENTAL", 5))
+            presences = presences.filter(updated_at__gt=depuis)
+            etudiants = etudiants.filter(updated_at__gt=depuis)
+        return {
+            "presences": list(presences.values('seance_id', 'etudiant_id', 'statut', 'heure_arrivee', 'updated_at')),
+            "etudiants": list(etudiants.values('id', 'matricule', 'nom', 'prenom', 'classe_id')),
+        }
+
+
+def synchroniser(utilisateur, mutations, jeton=None, seance_ids=None):
+    """
+    Applique un lot de mutations d'appel faites hors ligne et renvoie ce qui
+    a changé côté serveur depuis ``jeton``, en un aller-retour.
+
+    Mutations (dans l'ordre du client, chacune avec un ``id`` client) :
+
+    - ``{"type": "statut", "seance", "etudiant", "statut", "heure_arrivee",
+      "horodatage"}`` : ``etudiant`` est un id ou la ``ref`` d'un étudiant
+      ajouté dans le même lot ;
+    - ``{"type": "etudiant", "seance", "ref", "matricule", "nom", "prenom"}``.
+
+    Tout est appliqué dans une transaction. Un changement de statut n'est
+    écrit que s'il est plus récent que le dernier changement de la
+    présence : son ``horodatage`` client s'il venait d'une synchronisation,
+    sinon ``updated_at``. Rejouer un lot est sans effet. Retourne le nouveau
+    jeton, l'état de chaque mutation (``appliquee``, ``ignoree``,
+    ``rejetee``) et le delta des séances concernées (celles des mutations et
+    ``seance_ids``). Lève ValueError pour un lot mal formé.
+    """
+    if not isinstance(mutations, list) or not all(isinstance(m, dict) for m in mutations):
+        raise ValueError("mutations doit être une liste d'objets")
+    seance_ids = [] if seance_ids is None else seance_ids
+    if not isinstance(seance_ids, list):
+        raise ValueError("seances doit être une liste d'ids")
+    if len(mutations) > MAX_MUTATIONS:
+        raise ValueError(f"Au plus {MAX_MUTATIONS} mutations par synchronisation")
+    depuis = lire_jeton(jeton)
+
+    maintenant = timezone.now()
+    with transaction.atomic():
+        lot = _Lot(utilisateur, mutations, seance_ids, maintenant)
+        lot.appliquer()
+        delta = lot.delta(depuis)
+
+    return {"jeton": maintenant.isoformat(), "resultats": lot.resultats, **delta}
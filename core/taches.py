@@ -0,0 +1,111 @@
+# core/taches.py
+
+import datetime
+import traceback
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import Classe, Cours, Tache
+
+
+# -------------------
+# EXÉCUTION DES TÂCHES
+# -------------------
+
+def _export_excel(tache):
+    from .exports import export_excel_presences
+
+    cours = Cours.objects.select_related('classe').get(pk=tache.parametres['cours_id'])
+    with export_excel_presences(cours) as fichier:
+        tache.fichier.save(f"presences_{cours.nom}_{timezone.now().date()}.xlsx", File(fichier), save=False)
+
+
+def _export_pdf(tache):
+    from .exports import export_pdf_statistiques
+    from .stats import stats_cours
+
+    cours = Cours.objects.select_related('classe').get(pk=tache.parametres['cours_id'])
+    with export_pdf_statistiques(stats_cours(cours), timezone.localtime()) as fichier:
+        tache.fichier.save(f"statistiques_{cours.nom}_{timezone.now().date()}.pdf", File(fichier), save=False)
+
+
+def _import_etudiants(tache):
+    from .imports import importer_etudiants
+
+    classe = Classe.objects.get(pk=tache.parametres['classe_id'])
+    with tache.fichier_source.open('rb') as fichier:
+        tache.resultat = importer_etudiants(fichier, classe, tache.parametres.get('mode', 'create'))
+
+
+EXECUTANTS = {
+    'export_excel': _export_excel,
+    'export_pdf': _export_pdf,
+    'import_etudiants': _import_etudiants,
+}
+
+
+def marquer_echec(tache_id, erreur):
+    Tache.objects.filter(pk=tache_id).update(statut='echec', erreur=erreur, finished_at=timezone.now())
+
+
+def executer_tache(tache_id):
+    """Exécute une tâche déjà réclamée (statut ``en_cours``) et enregistre son issue"""
+    tache = Tache.objects.get(pk=tache_id)
+    try:
+        EXECUTANTS[tache.type_tache](tache)
+        tache.statut = 'terminee'
+    except Exception:
+        tache.statut = 'echec'
+        tache.erreur = traceback.format_exc()
+    tache.finished_at = timezone.now()
+    tache.save()
+    return tache.statut
+
+
+# -------------------
+# FILE D'ATTENTE
+# -------------------
+
+def enfiler(type_tache, utilisateur, fichier_source=None, **parametres):
+    """Crée une tâche en attente et la retourne"""
+    tache = Tache(type_tache=type_tache, utilisateur=utilisateur, parametres=parametres)
+    if fichier_source is not None:
+        tache.fichier_source.save(fichier_source.name, fichier_source, save=False)
+    tache.save()
+    return tache
+
+
+def reclamer(limite):
+    """
+    Réclame jusqu'à ``limite`` tâches en attente. La réclamation est un
+    UPDATE conditionnel sur le statut : deux workers ne peuvent pas obtenir
+    la même tâche, sans verrou spécifique à la base (SQLite ou Postgres).
+    """
+    reclamees = []
+    candidates = Tache.objects.filter(statut='en_attente').values_list('pk', flat=True)[:limite]
+    for pk in candidates:
+        if Tache.objects.filter(pk=pk, statut='en_attente').update(statut='en_cours', started_at=timezone.now()):
+            reclamees.append(pk)
+    return reclamees
+
+
+def remettre_en_attente(tache_ids):
+    """Rend à la file des tâches réclamées mais jamais soumises (pool de processus cassé)"""
+    Tache.objects.filter(pk__in=tache_ids, statut='en_cours').update(statut='en_attente', started_at=None)
+
+
+def echouer_taches_interrompues(delai=None):
+    """
+    Passe en échec les tâches ``en_cours`` depuis plus de ``delai`` secondes
+    (``TACHES_DELAI_MAX``) : processus tué ou ``runjobs`` arrêté pendant
+    leur exécution. Elles ne sont pas relancées (un import peut avoir été
+    appliqué en partie). Retourne leur nombre.
+    """
+    if delai is None:
+        delai = getattr(settings, 'TACHES_DELAI_MAX', 3600)
+    limite = timezone.now() - datetime.timedelta(seconds=delai)
+    return Tache.objects.filter(statut='en_cours', started_at__lt=limite).update(
+        statut='echec', erreur="Tâche interrompue (délai d'exécution dépassé)", finished_at=timezone.now(),
+    )
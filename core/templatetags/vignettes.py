@@ -0,0 +1,31 @@
+# core/templatetags/vignettes.py
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from core.vignettes import tailles, url_vignette
+
+register = template.Library()
+
+
+@register.simple_tag
+def vignette_etudiant(etudiant, taille=40, classes="rounded-circle"):
+    """
+    ``<img>`` carré de ``taille`` px : vignette WebP de la photo (avec sa
+    version 2x pour les écrans denses) ou avatar par défaut. Aucun accès
+    au stockage : l'URL se déduit de ``photo_empreinte``.
+    """
+    srcset = ""
+    if etudiant.photo_empreinte:
+        disponibles = tailles()
+        simple = next((t for t in disponibles if t >= taille), disponibles[-1])
+        double = next((t for t in disponibles if t >= 2 * taille), None)
+        src = url_vignette(etudiant.photo_empreinte, simple)
+        if double is not None and double != simple:
+            srcset = format_html(' srcset="{} 1x, {} 2x"', src, url_vignette(etudiant.photo_empreinte, double))
+    else:
+        src = static('img/avatar.png')
+    return format_html(
+        '<img src="{}"{} alt="{}" class="{}" width="{}" height="{}" loading="lazy" decoding="async">',
+        src, srcset, f"{etudiant.nom} {etudiant.prenom or ''}".strip(), classes, taille, taille,
+    )
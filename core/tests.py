@@ -1,3 +1,1379 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import math
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+import openpyxl
+from asgiref.sync import sync_to_async
+
+from .models import (
+    AlerteAbsence, Classe, Cours, Etudiant, Presence, ResumePresence, Seance, Tache, TermeRecherche, User,
+)
+from .alertes import analyser_absences
+from .base_donnees import pragmas_effectifs
+from .cache import cache_stats, invalider_stats
+from .donnees_fictives import generer_ecole, purger_ecole
+from .exports import rapport_stocke
+from .imports import importer_etudiants
+from .management.commands.benchmark_imports import BUDGET_MS, mesurer_imports
+from .matrice import MatricePresences, matrice_cours
+from .pagination import paginer
+from .recherche import indexer_etudiants, rechercher_cours, rechercher_etudiants
+from .resumes import ecarts_resumes, reconstruire_resumes
+from .routage import ALIAS_REPLICA, COOKIE_PRIMAIRE, EtatRoutage, RouteurLecture, lecture_primaire, vue_rapport
+from .selectors import MemoSelecteurs, classes_enseignant, cours_enseignant, etudiants_enseignant, seances_enseignant
+from .services import enregistrer_appel
+from .stats import resumes_etudiants, stats_par_cours
+from .synchronisation import synchroniser
+from .taches import enfiler, reclamer
+from .templatetags.vignettes import vignette_etudiant
+from .vignettes import nom_vignette
+
+
+def _worker_factice(tache_id):
+    """Exécutant de pool pour les tests : tue son processus pour la tâche désignée"""
+    if tache_id == int(os.environ["TACHE_A_TUER"]):
+        os._exit(1)
+    return "terminee"
+
+
+class PresenceDataMixin:
+    """Jeu de données commun : un enseignant, deux cours, des séances et des présences"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.enseignant = User.objects.create_user(
+            username="prof", email="prof@example.com", password="secret", role="enseignant"
+        )
+        cls.classe = Classe.objects.create(nom="L1 Info", niveau="L1")
+        cls.cours = Cours.objects.create(nom="Algo", classe=cls.classe, enseignant=cls.enseignant)
+        cls.cours_bis = Cours.objects.create(nom="Réseaux", classe=cls.classe, enseignant=cls.enseignant)
+        cls.etudiants = Etudiant.objects.bulk_create([
+            Etudiant(matricule=f"MAT{i:04d}", nom=f"Nom{i:02d}", prenom="P", classe=cls.classe)
+            for i in range(12)
+        ])
+        cls.seances = Seance.objects.bulk_create([
+            Seance(
+                cours=cours,
+                date=datetime.date(2025, 9, 1) + datetime.timedelta(days=j),
+                heure_debut=datetime.time(8, 0),
+                heure_fin=datetime.time(10, 0),
+            )
+            for cours in (cls.cours, cls.cours_bis)
+            for j in range(4)
+        ])
+        statuts = ["present", "retard", "absent", "motif"]
+        Presence.objects.bulk_create([
+            Presence(etudiant=etu, seance=s, statut=statuts[(i + j) % 4])
+            for i, etu in enumerate(cls.etudiants)
+            for j, s in enumerate(cls.seances)
+        ])
+        reconstruire_resumes()
+
+
+class StatsTests(PresenceDataMixin, TestCase):
+
+    def test_compteurs_identiques_aux_requetes_unitaires(self):
+        stats = stats_par_cours([self.cours, self.cours_bis])
+        self.assertEqual(len(stats), 2)
+        for s in stats:
+            self.assertEqual(s.total_seances, 4)
+            for es in s.etudiants_stats:
+                presences = es.etudiant.presences.filter(seance__cours=s.cours)
+                for statut in ("present", "retard", "absent", "motif"):
+                    self.assertEqual(getattr(es, statut), presences.filter(statut=statut).count())
+            self.assertEqual(sum(s.totaux.values()), 12 * 4)
+
+    def test_nombre_de_requetes_constant(self):
+        with self.assertNumQueries(3):
+            stats_par_cours([self.cours, self.cours_bis])
+
+    def test_statistiques_nombre_de_requetes_borne(self):
+        self.client.force_login(self.enseignant)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("core:statistiques"))
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(ctx.captured_queries), 10)
+        self.assertEqual(len(response.context["stats"]), 2)
+
+
+class MediasTemporairesMixin:
+    """MEDIA_ROOT temporaire : fichiers des tâches et rapports stockés"""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        reglages = override_settings(MEDIA_ROOT=self.media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+
+class ExportExcelTests(MediasTemporairesMixin, PresenceDataMixin, TestCase):
+
+    def test_export_excel_matrice(self):
+        Presence.objects.filter(etudiant=self.etudiants[0], seance=self.seances[0]).delete()
+        self.client.force_login(self.enseignant)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("core:export_excel", args=[self.cours.id]))
+            contenu = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        # Matrice (3 requêtes) + identité des étudiants, puis classeur stocké
+        self.assertLessEqual(len(ctx.captured_queries), 9)
+        with CaptureQueriesContext(connection) as ctx:
+            b"".join(self.client.get(reverse("core:export_excel", args=[self.cours.id])).streaming_content)
+        self.assertLessEqual(len(ctx.captured_queries), 6)
+
+        ws = openpyxl.load_workbook(io.BytesIO(contenu)).active
+        lignes = list(ws.iter_rows(values_only=True))
+        self.assertEqual(len(lignes), 1 + len(self.etudiants))
+        self.assertEqual(lignes[0][:3], ("Matricule", "Nom", "Prénom"))
+        # Étudiant 0 : séance 0 sans présence -> absent, puis retard, absent, motif
+        self.assertEqual(lignes[1][3:], ("absent", "retard", "absent", "motif", 1, 3, "25.0%"))
+
+
+class EnregistrerAppelTests(PresenceDataMixin, TestCase):
+
+    def test_bilan_et_upsert(self):
+        seance = self.seances[0]
+        Presence.objects.filter(seance=seance, etudiant__in=self.etudiants[:2]).delete()
+        statuts = {str(etu.id): "present" for etu in self.etudiants}
+        avant = dict(Presence.objects.filter(seance=seance).values_list("etudiant_id", "statut"))
+
+        bilan = enregistrer_appel(seance, statuts)
+
+        inchanges = sum(1 for statut in avant.values() if statut == "present")
+        self.assertEqual(bilan, {"crees": 2, "modifies": len(avant) - inchanges, "inchanges": inchanges})
+        self.assertEqual(
+            Presence.objects.filter(seance=seance, statut="present").count(), len(self.etudiants)
+        )
+
+    def test_nombre_de_requetes_constant(self):
+        seance = self.seances[0]
+        Etudiant.objects.bulk_create([
+            Etudiant(matricule=f"BULK{i:04d}", nom="Bulk", prenom="P", classe=self.classe)
+            for i in range(300)
+        ])
+        # SQLite découpe les insertions en lots (limite de paramètres) : une requête par lot
+        def lots(modele):
+            champs = [f for f in modele._meta.concrete_fields if not f.primary_key]
+            return math.ceil(312 / connection.ops.bulk_batch_size(champs, [None] * 312))
+
+        # étudiants, savepoint, existants, upsert présences, compteurs, upsert résumés, release
+        with self.assertNumQueries(5 + lots(Presence) + lots(ResumePresence)):
+            bilan = enregistrer_appel(seance, {})
+        self.assertEqual(bilan["crees"], 300)
+        self.assertEqual(bilan["modifies"] + bilan["inchanges"], 12)
+
+    def test_etudiant_hors_classe_refuse(self):
+        autre = Etudiant.objects.create(
+            matricule="AUTRE01", nom="X", prenom="Y", classe=Classe.objects.create(nom="L2 Info")
+        )
+        with self.assertRaises(ValueError):
+            enregistrer_appel(self.seances[0], {autre.id: "present"})
+
+
+class ImportEtudiantsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.classe = Classe.objects.create(nom="L2 Math", niveau="L2")
+        Etudiant.objects.create(matricule="EXIST01", nom="Ancien", prenom="A", classe=cls.classe)
+
+    def fichier_csv(self, lignes):
+        contenu = "\n".join(["Matricule,Nom,Prénom", *lignes]).encode("utf-8")
+        return SimpleUploadedFile("etudiants.csv", contenu)
+
+    def fichier_xlsx(self, lignes):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["Matricule", "Nom", "Prénom"])
+        for ligne in lignes:
+            ws.append(ligne)
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        return SimpleUploadedFile("etudiants.xlsx", buffer.getvalue())
+
+    def test_import_csv_mode_create(self):
+        fichier = self.fichier_csv(["NEW0001,Kule,Robert", "EXIST01,Nouveau,N", ",SansMatricule,X"])
+        rapport = importer_etudiants(fichier, self.classe, mode="create")
+        self.assertEqual((rapport["crees"], rapport["modifies"], rapport["inchanges"]), (1, 0, 1))
+        self.assertEqual(Etudiant.objects.get(matricule="EXIST01").nom, "Ancien")
+
+    def test_import_xlsx_mode_update_par_lots(self):
+        lignes = [[f"LOT{i:05d}", f"Nom{i}", "P"] for i in range(25)] + [["EXIST01", "Modifié", "M"]]
+        rapport = importer_etudiants(self.fichier_xlsx(lignes), self.classe, mode="update", taille_lot=10)
+        self.assertEqual((rapport["crees"], rapport["modifies"]), (25, 1))
+        self.assertEqual(rapport["erreurs"], [])
+        self.assertEqual(Etudiant.objects.get(matricule="EXIST01").nom, "Modifié")
+
+    def test_rapport_erreurs_par_ligne(self):
+        fichier = self.fichier_csv(["OK00001,Bon,B", f"{'X' * 30},Trop,Long"])
+        rapport = importer_etudiants(fichier, self.classe)
+        self.assertEqual(rapport["crees"], 1)
+        self.assertEqual(len(rapport["erreurs"]), 1)
+        self.assertEqual(rapport["erreurs"][0]["ligne"], 3)
+
+    def test_requetes_par_lot(self):
+        fichier = self.fichier_csv([f"Q{i:06d},Nom,P" for i in range(40)])
+        # Par lot : savepoint, SELECT IN, INSERT, indexation (SELECT, DELETE, INSERT), release
+        with self.assertNumQueries(7 * 2):
+            importer_etudiants(fichier, self.classe, taille_lot=20)
+
+
+class ResumePresenceTests(PresenceDataMixin, TestCase):
+
+    def test_resumes_maintenus_par_les_ecritures(self):
+        etu, seance = self.etudiants[0], self.seances[0]
+        presence = Presence.objects.get(etudiant=etu, seance=seance)
+        presence.statut = "motif"
+        presence.save()
+        Presence.objects.filter(etudiant=self.etudiants[1], seance=seance).delete()
+        enregistrer_appel(self.seances[1], {etu.id: "present"})
+        self.seances[2].delete()
+        self.assertEqual(ecarts_resumes(), [])
+
+    def test_commande_rebuild(self):
+        ResumePresence.objects.filter(etudiant=self.etudiants[0]).update(present=99)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_presence_summaries", verifier=True, stdout=io.StringIO())
+        call_command("rebuild_presence_summaries", cours_ids=[self.cours.id, self.cours_bis.id], stdout=io.StringIO())
+        call_command("rebuild_presence_summaries", verifier=True, stdout=io.StringIO())
+
+    def test_vues_lisent_les_resumes(self):
+        self.client.force_login(self.enseignant)
+        response = self.client.get(reverse("core:cours_detail", args=[self.cours.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(response.context["stats"]["stats_globales"].values()), 12 * 4)
+        response = self.client.get(reverse("core:api_stats_cours", args=[self.cours.id]))
+        self.assertEqual(response.json()["taux_presence"], 50.0)
+        self.assertEqual(self.cours.taux_presence_global(), 50.0)
+        self.assertEqual(self.etudiants[0].taux_presence_global(), 50.0)
+
+
+class SeanceStatsTests(PresenceDataMixin, TestCase):
+
+    def test_annotations_identiques_aux_methodes(self):
+        for seance in Seance.objects.with_presence_stats():
+            brute = Seance.objects.get(pk=seance.pk)
+            self.assertEqual(seance.presences_present(), brute.presences_present())
+            self.assertEqual(seance.presences_absentes(), brute.presences_absentes())
+            self.assertEqual(seance.taux_presence(), brute.taux_presence())
+
+    def test_seance_list_sans_n_plus_un(self):
+        self.client.force_login(self.enseignant)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("core:seance_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(ctx.captured_queries), 6)
+
+
+class CacheStatsTests(PresenceDataMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.appels = 0
+
+    def calcul(self):
+        self.appels += 1
+        return self.appels
+
+    def test_valeur_en_cache_jusqu_a_invalidation(self):
+        self.assertEqual(cache_stats("test", self.calcul), 1)
+        self.assertEqual(cache_stats("test", self.calcul), 1)
+        presence = Presence.objects.filter(seance=self.seances[0]).first()
+        with self.captureOnCommitCallbacks() as rappels:
+            presence.save()
+            # Pas d'invalidation avant la validation de la transaction
+            self.assertEqual(cache_stats("test", self.calcul), 1)
+        for rappel in rappels:
+            rappel()
+        self.assertEqual(cache_stats("test", self.calcul), 2)
+
+    def test_connexion_sans_invalidation(self):
+        cache_stats("test", self.calcul)
+        with self.captureOnCommitCallbacks(execute=True) as rappels:
+            self.client.force_login(self.enseignant)
+        self.assertEqual(rappels, [])
+        self.assertEqual(cache_stats("test", self.calcul), 1)
+
+    def test_valeur_perimee_servie_pendant_le_recalcul(self):
+        cache_stats("test", self.calcul)
+        invalider_stats()
+        cache.add("stats:test:verrou", 1)  # un autre worker recalcule
+        self.assertEqual(cache_stats("test", self.calcul), 1)
+        cache.delete("stats:test:verrou")
+        self.assertEqual(cache_stats("test", self.calcul), 2)
+
+    @override_settings(STATS_CACHE_TIMEOUT=0)
+    def test_expiration(self):
+        cache_stats("test", self.calcul)
+        self.assertEqual(cache_stats("test", self.calcul), 2)
+
+    def test_home_en_cache(self):
+        self.client.get(reverse("core:home"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("core:home"))
+        self.assertEqual(response.context["stats"]["total_appels"], Presence.objects.count())
+
+
+class ExportPdfTests(MediasTemporairesMixin, PresenceDataMixin, TestCase):
+
+    def test_export_pdf_reportlab(self):
+        self.client.force_login(self.enseignant)
+        response = self.client.get(reverse("core:export_pdf_statistiques", args=[self.cours.id]))
+        contenu = b"".join(response.streaming_content)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(contenu.startswith(b"%PDF"))
+
+    def test_pagination_longue_liste(self):
+        from .management.commands.benchmark_pdf import stats_fictives
+        from .exports import export_pdf_statistiques
+
+        fichier = export_pdf_statistiques(stats_fictives(200), timezone.now())
+        self.assertGreater(fichier.read().count(b"/Type /Page\n"), 1)
+
+
+class TachesTests(MediasTemporairesMixin, PresenceDataMixin, TestCase):
+
+    def test_export_en_arriere_plan(self):
+        self.client.force_login(self.enseignant)
+        response = self.client.get(reverse("core:export_excel", args=[self.cours.id]), {"async": 1})
+        self.assertEqual(response.status_code, 202)
+        url_statut = response.json()["url_statut"]
+        self.assertEqual(self.client.get(url_statut).json()["statut"], "en_attente")
+
+        call_command("runjobs", workers=0, une_fois=True, stdout=io.StringIO())
+
+        data = self.client.get(url_statut).json()
+        self.assertEqual(data["statut"], "terminee")
+        response = self.client.get(data["url_telechargement"])
+        contenu = b"".join(response.streaming_content)
+        ws = openpyxl.load_workbook(io.BytesIO(contenu)).active
+        self.assertEqual(ws.max_row, 1 + len(self.etudiants))
+
+    @override_settings(TACHES_SEUIL_IMPORT=0)
+    def test_import_en_arriere_plan(self):
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="x", role="admin")
+        self.client.force_login(admin)
+        fichier = SimpleUploadedFile("etudiants.csv", "Matricule,Nom,Prénom\nASYNC01,Tard,T\n".encode("utf-8"))
+        self.client.post(reverse("core:admin_importer_etudiants"), {"fichier": fichier, "classe": self.classe.id, "mode": "create"})
+        self.assertFalse(Etudiant.objects.filter(matricule="ASYNC01").exists())
+
+        call_command("runjobs", workers=0, une_fois=True, stdout=io.StringIO())
+
+        tache = Tache.objects.get(type_tache="import_etudiants")
+        self.assertEqual(tache.statut, "terminee")
+        self.assertEqual(tache.resultat["crees"], 1)
+        self.assertTrue(Etudiant.objects.filter(matricule="ASYNC01").exists())
+
+    def test_reclamation_unique(self):
+        tache = enfiler("export_pdf", self.enseignant, cours_id=self.cours.id)
+        self.assertEqual(reclamer(5), [tache.pk])
+        self.assertEqual(reclamer(5), [])
+
+    def test_echec_enregistre(self):
+        enfiler("export_pdf", self.enseignant, cours_id=0)
+        call_command("runjobs", workers=0, une_fois=True, stdout=io.StringIO())
+        tache = Tache.objects.get()
+        self.assertEqual(tache.statut, "echec")
+        self.assertIn("DoesNotExist", tache.erreur)
+
+    def test_taches_interrompues_en_echec(self):
+        bloquee, recente = (enfiler("export_pdf", self.enseignant, cours_id=self.cours.id) for _ in range(2))
+        Tache.objects.filter(pk=bloquee.pk).update(statut="en_cours", started_at=timezone.now() - datetime.timedelta(hours=2))
+        Tache.objects.filter(pk=recente.pk).update(statut="en_cours", started_at=timezone.now())
+        call_command("runjobs", workers=0, une_fois=True, stdout=io.StringIO())
+        bloquee.refresh_from_db()
+        self.assertEqual((bloquee.statut, bloquee.erreur), ("echec", "Tâche interrompue (délai d'exécution dépassé)"))
+        self.assertEqual(Tache.objects.get(pk=recente.pk).statut, "en_cours")
+
+    def test_processus_du_pool_tue(self):
+        tuee, suivante = (enfiler("export_pdf", self.enseignant, cours_id=self.cours.id) for _ in range(2))
+        sortie = io.StringIO()
+        with mock.patch.dict(os.environ, {"TACHE_A_TUER": str(tuee.pk)}), \
+                mock.patch("core.management.commands.runjobs.executer_dans_worker", _worker_factice):
+            call_command("runjobs", workers=1, une_fois=True, intervalle=0.05, stdout=sortie)
+        self.assertEqual(Tache.objects.get(pk=tuee.pk).statut, "echec")
+        # La commande continue avec un nouveau pool
+        self.assertIn("Pool de processus cassé : recréé", sortie.getvalue())
+        self.assertIn(f"Tâche #{suivante.pk} : terminee", sortie.getvalue())
+
+
+class RechercheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.enseignant = User.objects.create_user(
+            username="mbuyi", email="mbuyi@example.com", password="secret", role="enseignant"
+        )
+        cls.classe = Classe.objects.create(nom="Génie Électrique", niveau="L2")
+        cls.autre_classe = Classe.objects.create(nom="L1 Droit", niveau="L1")
+        cls.helene = Etudiant.objects.create(matricule="GE-2024/001", nom="Kabila", prenom="Hélène", classe=cls.classe)
+        cls.helena = Etudiant.objects.create(matricule="GE-2024/002", nom="Heleneau", prenom="Marc", classe=cls.classe)
+        cls.juriste = Etudiant.objects.create(matricule="DR-2024/001", nom="Lukusa", prenom="Hélène", classe=cls.autre_classe)
+        cls.cours = Cours.objects.create(nom="Électronique de puissance", classe=cls.classe, enseignant=cls.enseignant)
+
+    def test_prefixe_sans_accents_et_classement(self):
+        # "helene" est un mot exact pour deux étudiants, un préfixe pour le troisième
+        resultats = rechercher_etudiants(Etudiant.objects.all(), "HELENE")
+        self.assertEqual(resultats, [self.helene, self.juriste, self.helena])
+        self.assertEqual(rechercher_etudiants(Etudiant.objects.all(), "hél kab"), [self.helene])
+        self.assertEqual(rechercher_etudiants(Etudiant.objects.all(), "ge2024"), [self.helene, self.helena])
+        self.assertEqual(rechercher_etudiants(Etudiant.objects.all(), "elect"), [self.helene, self.helena])
+        self.assertEqual(rechercher_etudiants(Etudiant.objects.all(), "--"), [])
+
+    def test_restriction_du_queryset(self):
+        queryset = Etudiant.objects.filter(classe=self.autre_classe)
+        self.assertEqual(rechercher_etudiants(queryset, "helene"), [self.juriste])
+
+    def test_index_maintenu_par_les_ecritures(self):
+        self.helene.nom = "Tshisekedi"
+        self.helene.save()
+        self.assertEqual(rechercher_etudiants(Etudiant.objects.all(), "kabila"), [])
+
+        self.classe.nom = "Mécanique"
+        self.classe.save()
+        self.assertEqual(rechercher_etudiants(Etudiant.objects.all(), "meca"), [self.helene, self.helena])
+        self.assertEqual(rechercher_cours(Cours.objects.all(), "mbuyi meca"), [self.cours])
+
+        self.juriste.delete()
+        self.assertFalse(TermeRecherche.objects.filter(type_objet="etudiant", objet_id=self.juriste.pk).exists())
+
+    def test_commande_rebuild(self):
+        TermeRecherche.objects.all().delete()
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        self.assertEqual(rechercher_cours(Cours.objects.all(), "electro"), [self.cours])
+        self.assertEqual(rechercher_etudiants(Etudiant.objects.all(), "lukusa"), [self.juriste])
+
+    def test_api_autocompletion(self):
+        self.client.force_login(self.enseignant)
+        # session, utilisateur, termes exacts, termes préfixes, étudiants avec leur classe
+        with self.assertNumQueries(5):
+            reponse = self.client.get(reverse("core:api_recherche_etudiants"), {"q": "hele"})
+        noms = [r["nom"] for r in reponse.json()["results"]]
+        # L'enseignant ne voit que les étudiants des classes de ses cours
+        self.assertEqual(sorted(noms), ["Heleneau", "Kabila"])
+
+
+class PaginationCurseurTests(PresenceDataMixin, TestCase):
+
+    ORDRE = ('classe__nom', 'nom', 'prenom', 'id')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="secret", role="admin"
+        )
+        autre = Classe.objects.create(nom="A1 Bio", niveau="L1")
+        # Homonymes : l'id départage les lignes de même (classe, nom, prénom)
+        Etudiant.objects.bulk_create([
+            Etudiant(matricule=f"BIO{i:04d}", nom="Homonyme", prenom="P", classe=autre) for i in range(25)
+        ])
+
+    def test_parcours_complet_dans_les_deux_sens(self):
+        attendus = list(Etudiant.objects.select_related('classe').order_by(*self.ORDRE))
+        queryset = Etudiant.objects.select_related('classe')
+
+        pages, page = [], paginer(queryset, self.ORDRE, 5)
+        self.assertFalse(page.has_previous())
+        while True:
+            pages.append(page)
+            if not page.has_next():
+                break
+            page = paginer(queryset, self.ORDRE, 5, page.curseur_suivant)
+        self.assertEqual([e for p in pages for e in p], attendus)
+
+        for precedente, courante in zip(reversed(pages[:-1]), reversed(pages)):
+            retour = paginer(queryset, self.ORDRE, 5, courante.curseur_precedent)
+            self.assertEqual(list(retour), list(precedente))
+        self.assertFalse(paginer(queryset, self.ORDRE, 5, pages[1].curseur_precedent).has_previous())
+
+    def test_curseur_invalide_premiere_page(self):
+        page = paginer(Etudiant.objects.all(), self.ORDRE, 5, "falsifie")
+        self.assertEqual(list(page), list(Etudiant.objects.order_by(*self.ORDRE)[:5]))
+
+    def test_ordre_decroissant_mixte(self):
+        seances = Seance.objects.all()
+        ordre = ('-date', '-heure_debut', 'id')
+        page = paginer(seances, ordre, 3)
+        page = paginer(seances, ordre, 3, page.curseur_suivant)
+        self.assertEqual(list(page), list(seances.order_by(*ordre)[3:6]))
+
+    def test_vue_sans_count_ni_offset(self):
+        self.client.force_login(self.admin)
+        reponse = self.client.get(reverse("core:etudiant_list"))
+        page = reponse.context["etudiants"]
+        self.assertEqual(page.total, 37)
+
+        with CaptureQueriesContext(connection) as ctx:
+            reponse = self.client.get(reverse("core:etudiant_list"), {"curseur": page.curseur_suivant})
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn('COUNT(*) AS "__count" FROM "core_etudiant"', sql)  # total en cache
+        self.assertEqual(len(reponse.context["etudiants"]), 37 - 30)
+        self.assertContains(reponse, "Total: <strong>37</strong>")
+
+    def test_api_pagination_json(self):
+        self.client.force_login(self.admin)
+        donnees = self.client.get(reverse("core:api_recherche_etudiants")).json()
+        self.assertEqual(len(donnees["results"]), 20)
+        self.assertTrue(donnees["pagination"]["more"])
+        suite = self.client.get(
+            reverse("core:api_recherche_etudiants"), {"curseur": donnees["pagination"]["suivant"]}
+        ).json()
+        self.assertEqual(len(suite["results"]), 17)
+        self.assertFalse(suite["pagination"]["more"])
+
+
+class InstrumentationTests(PresenceDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="secret", role="admin"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_en_tete_server_timing(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            reponse = self.client.get(reverse("core:statistiques"))
+        en_tete = reponse["Server-Timing"]
+        self.assertIn(f'desc="{len(ctx.captured_queries)} requetes"', en_tete)
+        self.assertIn("rendu;dur=", en_tete)
+        self.assertIn(f'taille;desc="{len(reponse.content)} octets"', en_tete)
+
+    @override_settings(INSTRUMENTATION_BUDGETS_VUES={"core:statistiques": {"requetes": 1}})
+    def test_depassement_de_budget_journalise(self):
+        self.client.force_login(self.admin)
+        with self.assertLogs("core.instrumentation", "WARNING") as journal:
+            self.client.get(reverse("core:statistiques"))
+        self.assertIn("core:statistiques", journal.output[0])
+        self.assertIn("requetes=", journal.output[0])
+
+    def test_endpoint_reserve_aux_admins(self):
+        self.client.force_login(self.enseignant)
+        self.assertEqual(self.client.get(reverse("core:api_instrumentation")).status_code, 302)
+
+        self.client.force_login(self.admin)
+        self.client.get(reverse("core:statistiques"))
+        vues = self.client.get(reverse("core:api_instrumentation")).json()["vues"]
+        self.assertGreaterEqual(vues["core:statistiques"]["requetes_http"], 1)
+        self.assertGreater(vues["core:statistiques"]["requetes_sql_moyennes"], 0)
+
+
+class EcoleFictiveTests(TestCase):
+
+    def test_generation_coherente(self):
+        bilan = generer_ecole(nb_classes=2, etudiants_par_classe=10, cours_par_classe=3, seances_par_cours=4, graine=7)
+        self.assertEqual(bilan["classes"], 2)
+        self.assertEqual(Etudiant.objects.count(), bilan["etudiants"])
+        self.assertEqual(Presence.objects.count(), bilan["presences"])
+        # Un appel complet par séance non annulée
+        self.assertEqual(
+            bilan["presences"],
+            sum(
+                Etudiant.objects.filter(classe=s.cours.classe).count()
+                for s in Seance.objects.filter(is_annulee=False).select_related('cours')
+            ),
+        )
+        self.assertEqual(ecarts_resumes(), [])
+        etudiant = Etudiant.objects.first()
+        self.assertIn(etudiant, rechercher_etudiants(Etudiant.objects.all(), etudiant.matricule))
+
+        purger_ecole("FX")
+        self.assertFalse(Classe.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+
+# Budgets illimités : pas d'avertissements dans la sortie des tests
+@override_settings(INSTRUMENTATION_BUDGETS={"requetes": 10**6, "sql_ms": 10**6, "total_ms": 10**6}, INSTRUMENTATION_BUDGETS_VUES={})
+class BenchmarkTests(PresenceDataMixin, TestCase):
+
+    def test_rapport_et_regressions(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            sortie = os.path.join(dossier, "rapport.json")
+            call_command("benchmark_app", "--base-courante", "--repetitions", "1", "--sortie", sortie, stderr=io.StringIO())
+            with open(sortie) as fichier:
+                rapport = json.load(fichier)
+
+            vues = rapport["echelles"][0]["vues"]
+            self.assertEqual(vues["statistiques"]["statut"], 200)
+            self.assertEqual(vues["appel_presence POST"]["statut"], 302)
+            self.assertGreater(vues["cours_detail"]["requetes"], 0)
+
+            # Référence plus rapide et moins bavarde : régression signalée
+            for mesure in rapport["echelles"][0]["vues"].values():
+                mesure["mediane_ms"] /= 10
+            vues["export_excel"]["requetes"] = 0
+            reference = os.path.join(dossier, "reference.json")
+            with open(reference, "w") as fichier:
+                json.dump(rapport, fichier)
+            with self.assertRaises(CommandError):
+                call_command(
+                    "benchmark_app", "--base-courante", "--repetitions", "1",
+                    "--sortie", sortie, "--comparer", reference, stderr=io.StringIO(),
+                )
+
+
+class ApiAsynchroneTests(PresenceDataMixin, TestCase):
+
+    def test_chaine_de_middlewares_asynchrone(self):
+        # Un seul middleware synchrone ferait repasser toute la chaîne par un thread
+        for chemin in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(chemin), "async_capable", False), chemin)
+
+    async def test_stats_et_presences(self):
+        await self.async_client.aforce_login(self.enseignant)
+        reponse = await self.async_client.get(reverse("core:api_stats_cours", args=[self.cours.pk]))
+        self.assertEqual(reponse.json()["classe"], "L1 Info")
+        self.assertEqual(reponse.json()["taux_presence"], 50.0)
+        # Requêtes de l'ORM asynchrone comptées par l'instrumentation
+        self.assertNotIn('desc="0 requetes"', reponse["Server-Timing"])
+
+        reponse = await self.async_client.get(reverse("core:api_presences_seance", args=[self.seances[0].pk]))
+        self.assertEqual(len(reponse.json()["presences"]), 12)
+
+        autre = await User.objects.acreate(username="autre", role="enseignant")
+        await self.async_client.aforce_login(autre)
+        reponse = await self.async_client.get(reverse("core:api_stats_cours", args=[self.cours.pk]))
+        self.assertEqual(reponse.status_code, 404)
+
+    async def test_recherche(self):
+        await sync_to_async(indexer_etudiants)()
+        await self.async_client.aforce_login(self.enseignant)
+        reponse = await self.async_client.get(reverse("core:api_recherche_etudiants"), {"q": "nom03"})
+        self.assertEqual([r["matricule"] for r in reponse.json()["results"]], ["MAT0003"])
+        reponse = await self.async_client.get(reverse("core:api_recherche_cours"))
+        self.assertEqual({r["nom"] for r in reponse.json()["results"]}, {"Algo", "Réseaux"})
+
+    async def test_ajout_rapide(self):
+        await self.async_client.aforce_login(self.enseignant)
+        url = reverse("core:ajouter_etudiant_rapide", args=[self.seances[0].pk])
+        reponse = await self.async_client.post(url, {"matricule": "NEW0001", "nom": "Nouveau", "prenom": "N"})
+        self.assertTrue(reponse.json()["created"])
+        self.assertTrue(await Etudiant.objects.filter(matricule="NEW0001", classe=self.classe).aexists())
+        self.assertIn(
+            await Etudiant.objects.aget(matricule="NEW0001"),
+            await sync_to_async(rechercher_etudiants)(Etudiant.objects.all(), "nouveau"),
+        )
+
+
+class ExportFluxTests(PresenceDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="secret", role="admin"
+        )
+
+    def lire(self, reponse):
+        return b"".join(reponse.streaming_content).decode()
+
+    def test_ndjson_complet(self):
+        self.client.force_login(self.admin)
+        reponse = self.client.get(reverse("core:api_export_presences"))
+        self.assertEqual(reponse["Content-Type"], "application/x-ndjson")
+        lignes = [json.loads(ligne) for ligne in self.lire(reponse).splitlines()]
+        self.assertEqual(len(lignes), Presence.objects.count())
+        self.assertEqual(lignes[0]["classe"], "L1 Info")
+        self.assertIn(lignes[0]["matricule"], {e.matricule for e in self.etudiants})
+
+    def test_csv_filtre(self):
+        self.client.force_login(self.admin)
+        reponse = self.client.get(reverse("core:api_export_presences"), {
+            "format": "csv", "cours": self.cours.pk, "du": "2025-09-02", "au": "2025-09-03",
+        })
+        lignes = self.lire(reponse).splitlines()
+        self.assertTrue(lignes[0].startswith("id,statut,"))
+        self.assertEqual(len(lignes), 1 + 2 * 12)
+
+    def test_filigrane_incremental(self):
+        Presence.objects.update(updated_at=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+        modifiee = Presence.objects.first()
+        Presence.objects.filter(pk=modifiee.pk).update(
+            updated_at=datetime.datetime(2025, 6, 1, 12, 30, tzinfo=datetime.timezone.utc)
+        )
+        self.client.force_login(self.admin)
+        reponse = self.client.get(reverse("core:api_export_presences"), {"depuis": "2025-03-01T00:00:00Z"})
+        lignes = [json.loads(ligne) for ligne in self.lire(reponse).splitlines()]
+        self.assertEqual([ligne["id"] for ligne in lignes], [modifiee.pk])
+
+        # La dernière ligne sert de filigrane : elle est renvoyée, avec une
+        # écriture antérieure validée après le dump précédent
+        tardive = Presence.objects.exclude(pk=modifiee.pk).first()
+        Presence.objects.filter(pk=tardive.pk).update(
+            updated_at=datetime.datetime(2025, 6, 1, 12, 29, 58, tzinfo=datetime.timezone.utc)
+        )
+        reponse = self.client.get(reverse("core:api_export_presences"), {"depuis": lignes[-1]["updated_at"]})
+        lignes = [json.loads(ligne) for ligne in self.lire(reponse).splitlines()]
+        self.assertEqual([ligne["id"] for ligne in lignes], [tardive.pk, modifiee.pk])
+
+    def test_acces_et_parametres(self):
+        self.client.force_login(self.enseignant)
+        self.assertEqual(self.client.get(reverse("core:api_export_presences")).status_code, 302)
+        self.client.force_login(self.admin)
+        for parametres in (
+            {"du": "01/09/2025"}, {"au": "2025-02-30"}, {"depuis": "hier"}, {"format": "xml"}, {"classe": "x"},
+        ):
+            self.assertEqual(self.client.get(reverse("core:api_export_presences"), parametres).status_code, 400)
+
+
+class MatricePresencesTests(PresenceDataMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_calculs_vectorises(self):
+        matrice = MatricePresences.charger(self.cours)
+        self.assertEqual(matrice.forme, (12, 4))
+        etu = self.etudiants[0]
+        # statuts[(i + j) % 4] : present, retard, absent, motif pour l'étudiant 0
+        self.assertEqual(matrice.statut(etu.pk, self.seances[2].pk), "absent")
+        self.assertEqual(matrice.totaux(), {"present": 12, "retard": 12, "absent": 12, "motif": 12})
+        self.assertEqual(matrice.totaux_par_etudiant()[0].tolist(), [1, 1, 1, 1])
+        self.assertEqual(matrice.taux_par_etudiant().tolist(), [50.0] * 12)
+        self.assertEqual(matrice.taux_par_seance().tolist(), [50.0] * 4)
+
+        # Étudiant 0 : present, retard, absent, motif -> série en cours de 2
+        en_cours, plus_longue = matrice.series_absences()
+        self.assertEqual((int(en_cours[0]), int(plus_longue[0])), (2, 2))
+        # Étudiant 1 : retard, absent, motif, present -> série close de 2
+        self.assertEqual((int(en_cours[1]), int(plus_longue[1])), (0, 2))
+
+    def test_seance_sans_appel_ignoree_par_les_series(self):
+        Seance.objects.create(
+            cours=self.cours, date=datetime.date(2025, 9, 10),
+            heure_debut=datetime.time(8, 0), heure_fin=datetime.time(10, 0),
+        )
+        matrice = MatricePresences.charger(self.cours)
+        self.assertEqual(matrice.forme, (12, 5))
+        self.assertEqual(int(matrice.series_absences()[0][0]), 2)
+        self.assertEqual(matrice.taux_par_seance()[-1], 0)
+
+    def test_cache_invalide_par_un_appel(self):
+        matrice_cours(self.cours)
+        with self.assertNumQueries(0):
+            matrice = matrice_cours(self.cours)
+        self.assertEqual(matrice.statut(self.etudiants[0].pk, self.seances[0].pk), "present")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enregistrer_appel(self.seances[0], {self.etudiants[0].pk: "absent"})
+        self.assertEqual(matrice_cours(self.cours).statut(self.etudiants[0].pk, self.seances[0].pk), "absent")
+
+    def test_detail_du_cours_en_requetes_constantes(self):
+        self.client.force_login(self.enseignant)
+        with CaptureQueriesContext(connection) as ctx:
+            reponse = self.client.get(reverse("core:cours_detail", args=[self.cours.pk]))
+        self.assertLessEqual(len(ctx.captured_queries), 11)
+        lignes = reponse.context["stats"]["presences_par_etudiant"]
+        self.assertEqual(len(lignes), 12)
+        self.assertEqual(lignes[0]["serie_absences"], 2)
+        self.assertEqual(lignes[0]["taux_global"], 50.0)
+        self.assertEqual(reponse.context["stats"]["taux_global"], 50.0)
+
+    def test_matrice_perimee_apres_suppression_d_un_etudiant(self):
+        from .exports import export_excel_presences
+
+        # Matrice en cache calculée avant la suppression (servie pendant le recalcul)
+        perimee = MatricePresences.charger(self.cours)
+        self.etudiants[0].delete()
+        self.client.force_login(self.enseignant)
+        with mock.patch("core.matrice.matrice_cours", return_value=perimee):
+            reponse = self.client.get(reverse("core:cours_detail", args=[self.cours.pk]))
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(len(reponse.context["stats"]["presences_par_etudiant"]), 11)
+
+        with mock.patch("core.exports_excel.matrice_cours", return_value=perimee):
+            with export_excel_presences(self.cours) as fichier:
+                lignes = list(openpyxl.load_workbook(fichier).active.iter_rows(values_only=True))
+        self.assertEqual(len(lignes), 1 + 11)
+
+
+class BaseDonneesTests(SimpleTestCase):
+    databases = {"default"}
+
+    def test_pragmas_appliques_a_la_connexion(self):
+        pragmas = pragmas_effectifs(connection, ["synchronous", "busy_timeout", "cache_size"])
+        self.assertEqual(pragmas["synchronous"], 1)  # NORMAL
+        self.assertEqual(pragmas["busy_timeout"], settings.SQLITE_PRAGMAS["busy_timeout"])
+        self.assertEqual(pragmas["cache_size"], settings.SQLITE_PRAGMAS["cache_size"])
+
+    def test_appels_concurrents_sans_verrou(self):
+        # Base fichier dans un sous-processus : la base de test en mémoire
+        # partagée ne reproduit pas le verrouillage de SQLite entre connexions
+        with tempfile.TemporaryDirectory() as dossier:
+            env = {**os.environ, "DATABASE_URL": f"sqlite:///{dossier}/stress.sqlite3"}
+
+            def manage(*arguments):
+                return subprocess.run(
+                    [sys.executable, "manage.py", *arguments], cwd=settings.BASE_DIR, env=env,
+                    capture_output=True, text=True,
+                )
+
+            manage("migrate", "-v", "0")
+            manage(
+                "generate_fake_school", "--classes", "1", "--etudiants-par-classe", "20",
+                "--cours-par-classe", "1", "--seances-par-cours", "2", "--graine", "1",
+            )
+            resultat = manage("stress_appel", "--threads", "6", "--appels", "5", "--graine", "1")
+
+        self.assertEqual(resultat.returncode, 0, resultat.stderr)
+        rapport = json.loads(resultat.stdout)
+        self.assertEqual(rapport["pragmas"]["journal_mode"], "wal")
+        self.assertEqual(rapport["statuts_http"], {"302": 30})
+
+
+class RoutageLectureTests(PresenceDataMixin, TestCase):
+
+    # Réplique introuvable : toute lecture qui lui serait envoyée échouerait
+    replica = mock.patch.dict(settings.DATABASES, {
+        ALIAS_REPLICA: {**settings.DATABASES["default"], "NAME": "/inexistant/replica.sqlite3"},
+    })
+
+    @staticmethod
+    def lecture(etat, rapport=True):
+        vue = lambda request: RouteurLecture().db_for_read(Presence)
+        if rapport:
+            vue = vue_rapport(vue)
+        jeton = etat.activer()
+        try:
+            return vue(None)
+        finally:
+            EtatRoutage.desactiver(jeton)
+
+    def test_decisions_du_routeur(self):
+        with self.replica:
+            self.assertEqual(self.lecture(EtatRoutage()), ALIAS_REPLICA)
+            self.assertEqual(self.lecture(EtatRoutage(), rapport=False), "default")
+            self.assertEqual(self.lecture(EtatRoutage(collee=True)), "default")
+            etat = EtatRoutage()
+            etat.ecriture = True
+            self.assertEqual(self.lecture(etat), "default")
+            # Données d'un rapport stocké : primaire, puis retour à la réplique
+            def vue(request):
+                with lecture_primaire():
+                    primaire = RouteurLecture().db_for_read(Presence)
+                return primaire, RouteurLecture().db_for_read(Presence)
+            jeton = EtatRoutage().activer()
+            try:
+                self.assertEqual(vue_rapport(vue)(None), ("default", ALIAS_REPLICA))
+            finally:
+                EtatRoutage.desactiver(jeton)
+        # Sans réplique configurée, tout reste sur le primaire
+        self.assertEqual(self.lecture(EtatRoutage()), "default")
+
+    def test_ecriture_colle_au_primaire(self):
+        self.client.force_login(self.enseignant)
+        with self.replica:
+            reponse = self.client.post(
+                reverse("core:appel_presence", args=[self.seances[0].pk]),
+                {"presences_data": json.dumps({self.etudiants[0].pk: "retard"})},
+            )
+            self.assertIn(COOKIE_PRIMAIRE, reponse.cookies)
+            # Le cookie renvoyé garde les lectures du rapport sur le primaire
+            reponse = self.client.get(reverse("core:statistiques"))
+            self.assertEqual(reponse.status_code, 200)
+            self.assertNotIn(COOKIE_PRIMAIRE, reponse.cookies)
+
+
+class ReponsesConditionnellesTests(MediasTemporairesMixin, PresenceDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(self.enseignant)
+
+    def revalider(self, url, reponse):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=reponse["ETag"])
+
+    def test_api_304_tant_que_rien_ne_change(self):
+        url = reverse("core:api_presences_seance", args=[self.seances[0].pk])
+        reponse = self.client.get(url)
+        self.assertIn("Last-Modified", reponse)
+        self.assertEqual(self.revalider(url, reponse).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enregistrer_appel(self.seances[0], {self.etudiants[0].pk: "absent"})
+        nouvelle = self.revalider(url, reponse)
+        self.assertEqual(nouvelle.status_code, 200)
+        self.assertNotEqual(nouvelle["ETag"], reponse["ETag"])
+
+        # Le renommage d'un étudiant change aussi la réponse
+        self.etudiants[1].nom = "Renommé"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.etudiants[1].save()
+        self.assertEqual(self.revalider(url, nouvelle).status_code, 200)
+
+    def test_stats_304_en_une_requete_et_cours_voisin_intact(self):
+        url = reverse("core:api_stats_cours", args=[self.cours.pk])
+        url_bis = reverse("core:api_stats_cours", args=[self.cours_bis.pk])
+        reponse, reponse_bis = self.client.get(url), self.client.get(url_bis)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.revalider(url, reponse).status_code, 304)
+        # Session, utilisateur et version du cours
+        self.assertLessEqual(len(ctx.captured_queries), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enregistrer_appel(self.seances[0], {self.etudiants[0].pk: "absent"})
+        self.assertEqual(self.revalider(url, reponse).status_code, 200)
+        self.assertEqual(self.revalider(url_bis, reponse_bis).status_code, 304)
+
+    def test_ecriture_d_un_autre_processus(self):
+        # Écritures sans rappel on_commit dans ce processus : autre worker,
+        # runjobs ou commande, dont le cache local n'est pas prévenu
+        url = reverse("core:api_presences_seance", args=[self.seances[0].pk])
+        reponse = self.client.get(url)
+        Presence.objects.filter(seance=self.seances[0], etudiant=self.etudiants[0]).update(
+            statut="motif", updated_at=timezone.now()
+        )
+        modifiee = self.revalider(url, reponse)
+        self.assertEqual(modifiee.status_code, 200)
+        # Une suppression change aussi la version (nombre de lignes)
+        Presence.objects.filter(seance=self.seances[1], etudiant=self.etudiants[0]).delete()
+        self.assertEqual(self.revalider(url, modifiee).status_code, 200)
+
+        url_stats = reverse("core:api_stats_cours", args=[self.cours.pk])
+        reponse = self.client.get(url_stats)
+        self.client.force_login(User.objects.create_user(username="autre", password="secret", role="enseignant"))
+        self.assertEqual(self.revalider(url_stats, reponse).status_code, 404)
+
+    def test_seance_d_un_autre_enseignant(self):
+        autre = User.objects.create_user(username="autre", password="secret", role="enseignant")
+        url = reverse("core:api_presences_seance", args=[self.seances[0].pk])
+        reponse = self.client.get(url)
+        self.client.force_login(autre)
+        self.assertEqual(self.revalider(url, reponse).status_code, 404)
+
+    def test_export_stocke_puis_regenere(self):
+        url = reverse("core:export_excel", args=[self.cours.pk])
+        reponse = self.client.get(url)
+        premier = b"".join(reponse.streaming_content)
+        self.assertEqual(self.revalider(url, reponse).status_code, 304)
+        self.assertEqual(len(os.listdir(os.path.join(self.media, "rapports"))), 1)
+
+        # Nouveau téléchargement sans validateur : classeur stocké, sans recalcul
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(b"".join(self.client.get(url).streaming_content), premier)
+        self.assertFalse(any('"core_presence"."statut"' in q["sql"] for q in ctx.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enregistrer_appel(self.seances[0], {self.etudiants[0].pk: "motif"})
+        self.assertNotEqual(b"".join(self.client.get(url).streaming_content), premier)
+        # L'ancienne version est remplacée
+        self.assertEqual(len(os.listdir(os.path.join(self.media, "rapports"))), 1)
+
+    def test_export_stocke_depuis_une_matrice_fraiche(self):
+        url = reverse("core:export_excel", args=[self.cours.pk])
+        perimee = MatricePresences.charger(self.cours)
+        with self.captureOnCommitCallbacks(execute=True):
+            enregistrer_appel(self.seances[0], {self.etudiants[0].pk: "motif"})
+        # Matrice périmée servie par le cache pendant son recalcul
+        with mock.patch("core.exports_excel.matrice_cours", return_value=perimee):
+            contenu = b"".join(self.client.get(url).streaming_content)
+        ws = openpyxl.load_workbook(io.BytesIO(contenu)).active
+        self.assertEqual(next(ws.iter_rows(min_row=2, values_only=True))[3], "motif")
+
+    def test_premiers_telechargements_simultanes(self):
+        nom = "rapports/essai_2-3.txt"
+        default_storage.save("rapports/essai_1-1.txt", ContentFile(b"ancien"))
+
+        def generer():
+            # Une requête concurrente stocke la même version pendant la génération
+            default_storage.save(nom, ContentFile(b"rapport"))
+            return ContentFile(b"rapport")
+
+        with rapport_stocke("essai", "2-3", ".txt", generer) as fichier:
+            self.assertEqual(fichier.read(), b"rapport")
+        self.assertEqual(os.listdir(os.path.join(self.media, "rapports")), ["essai_2-3.txt"])
+        with rapport_stocke("essai", "2-3", ".txt", None) as fichier:
+            self.assertEqual(fichier.read(), b"rapport")
+
+
+class SynchronisationTests(PresenceDataMixin, TestCase):
+
+    def setUp(self):
+        self.seance = self.seances[0]
+        self.horodatage = timezone.now().isoformat()
+
+    def mutation(self, id, etudiant, statut, **autres):
+        return {"id": id, "type": "statut", "seance": self.seance.pk, "etudiant": etudiant,
+                "statut": statut, "horodatage": self.horodatage, **autres}
+
+    def test_lot_applique_puis_rejoue_sans_effet(self):
+        mutations = [
+            {"id": "e1", "type": "etudiant", "seance": self.seance.pk, "ref": "nouveau",
+             "matricule": "NEW001", "nom": "Nouveau", "prenom": "N"},
+            self.mutation("m1", self.etudiants[0].pk, "retard", heure_arrivee="08:12"),
+            self.mutation("m2", "nouveau", "present"),
+            self.mutation("m3", self.etudiants[1].pk, "inconnu"),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            reponse = synchroniser(self.enseignant, mutations)
+        self.assertEqual([r["etat"] for r in reponse["resultats"]], ["appliquee"] * 3 + ["rejetee"])
+        nouveau = Etudiant.objects.get(matricule="NEW001")
+        presence = Presence.objects.get(seance=self.seance, etudiant=self.etudiants[0])
+        self.assertEqual((presence.statut, presence.heure_arrivee), ("retard", datetime.time(8, 12)))
+        self.assertTrue(Presence.objects.filter(seance=self.seance, etudiant=nouveau, statut="present").exists())
+        self.assertEqual(ecarts_resumes(), [])
+        # Premier jeton : tout l'appel de la séance est renvoyé
+        self.assertEqual(len(reponse["presences"]), len(self.etudiants) + 1)
+
+        rejoue = synchroniser(self.enseignant, mutations, reponse["jeton"])
+        self.assertEqual([r["etat"] for r in rejoue["resultats"]], ["appliquee", "ignoree", "ignoree", "rejetee"])
+        self.assertEqual(Etudiant.objects.filter(matricule="NEW001").count(), 1)
+
+    def test_dernier_ecrivain_gagnant(self):
+        avant = (timezone.now() - datetime.timedelta(minutes=5)).isoformat()
+        enregistrer_appel(self.seance, {self.etudiants[0].pk: "present"})
+        self.horodatage = timezone.now().isoformat()
+        reponse = synchroniser(self.enseignant, [
+            # Hors ligne avant l'appel enregistré en ligne : perd
+            {**self.mutation("ancien", self.etudiants[0].pk, "absent"), "horodatage": avant},
+            # Deux changements du même étudiant dans le lot : le plus récent gagne
+            self.mutation("a", self.etudiants[1].pk, "absent"),
+            {**self.mutation("b", self.etudiants[1].pk, "motif"), "horodatage": avant},
+        ])
+        self.assertEqual([r["etat"] for r in reponse["resultats"]], ["ignoree", "appliquee", "ignoree"])
+        self.assertEqual(Presence.objects.get(seance=self.seance, etudiant=self.etudiants[0]).statut, "present")
+        self.assertEqual(Presence.objects.get(seance=self.seance, etudiant=self.etudiants[1]).statut, "absent")
+
+    def test_appareils_compares_a_l_heure_de_leur_changement(self):
+        maintenant = timezone.now()
+        a = (maintenant - datetime.timedelta(minutes=55)).isoformat()
+        b = (maintenant - datetime.timedelta(minutes=30)).isoformat()
+        etudiant = self.etudiants[0].pk
+        Presence.objects.filter(seance=self.seance, etudiant_id=etudiant).update(
+            updated_at=maintenant - datetime.timedelta(hours=2)
+        )
+        # Appareil A : changement à 09:05, synchronisé à 09:50
+        synchroniser(self.enseignant, [{**self.mutation("a", etudiant, "absent"), "horodatage": a}])
+        # Appareil B : changement à 09:30, synchronisé ensuite (après updated_at)
+        reponse = synchroniser(self.enseignant, [{**self.mutation("b", etudiant, "motif"), "horodatage": b}])
+        self.assertEqual(reponse["resultats"][0]["etat"], "appliquee")
+        presence = Presence.objects.get(seance=self.seance, etudiant_id=etudiant)
+        self.assertEqual(presence.statut, "motif")
+        # A renvoie son lot : plus ancien que B, sans effet
+        rejoue = synchroniser(self.enseignant, [{**self.mutation("a", etudiant, "absent"), "horodatage": a}])
+        self.assertEqual(rejoue["resultats"][0]["etat"], "ignoree")
+
+        # Un appel enregistré en ligne est daté par le serveur
+        enregistrer_appel(self.seance, {etudiant: "present"})
+        self.assertIsNone(Presence.objects.get(pk=presence.pk).horodatage_client)
+        reponse = synchroniser(self.enseignant, [{**self.mutation("c", etudiant, "absent"), "horodatage": b}])
+        self.assertEqual(reponse["resultats"][0]["etat"], "ignoree")
+
+    def test_valeurs_non_textuelles_rejetees(self):
+        reponse = synchroniser(self.enseignant, [
+            {**self.mutation("epoch", self.etudiants[0].pk, "absent"), "horodatage": 1735725600},
+            self.mutation("arrivee", self.etudiants[1].pk, "retard", heure_arrivee=812),
+            {"id": "etu", "type": "etudiant", "seance": self.seance.pk, "matricule": ["X"], "nom": "N"},
+            self.mutation("ok", self.etudiants[2].pk, "motif"),
+        ])
+        self.assertEqual(
+            [(r["id"], r["etat"]) for r in reponse["resultats"]],
+            [("epoch", "rejetee"), ("arrivee", "rejetee"), ("etu", "rejetee"), ("ok", "appliquee")],
+        )
+        self.assertEqual(reponse["resultats"][0]["erreur"], "horodatage manquant ou invalide")
+
+    @override_settings(CHEVAUCHEMENT_INCREMENTAL=0)
+    def test_delta_depuis_le_jeton(self):
+        jeton = synchroniser(self.enseignant, [], seance_ids=[self.seance.pk])["jeton"]
+        presence = Presence.objects.get(seance=self.seance, etudiant=self.etudiants[2])
+        presence.statut = "motif"
+        presence.save()
+        reponse = synchroniser(self.enseignant, [], jeton, [self.seance.pk])
+        self.assertEqual(
+            [(p["etudiant_id"], p["statut"]) for p in reponse["presences"]],
+            [(self.etudiants[2].pk, "motif")],
+        )
+        self.assertEqual(reponse["etudiants"], [])
+
+    def test_api(self):
+        url = reverse("core:api_sync_appel")
+        autre = User.objects.create_user(username="autre", password="secret", role="enseignant")
+        self.client.force_login(autre)
+        reponse = self.client.post(url, {"mutations": [self.mutation("m", self.etudiants[0].pk, "absent")]},
+                                   content_type="application/json")
+        self.assertEqual(reponse.json()["resultats"][0]["erreur"], "Séance introuvable")
+
+        self.client.force_login(self.enseignant)
+        self.assertEqual(self.client.post(url, "{", content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.post(url, {"jeton": "hier"}, content_type="application/json").status_code, 400)
+        with CaptureQueriesContext(connection) as ctx:
+            reponse = self.client.post(url, {"mutations": [
+                self.mutation(f"m{i}", etudiant.pk, "absent") for i, etudiant in enumerate(self.etudiants)
+            ]}, content_type="application/json")
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual({r["etat"] for r in reponse.json()["resultats"]}, {"appliquee"})
+        # Nombre de requêtes indépendant du nombre de mutations
+        self.assertLessEqual(len(ctx.captured_queries), 16)
+
+
+class DemarrageTests(PresenceDataMixin, TestCase):
+    def test_bibliotheques_lourdes_non_chargees_au_demarrage(self):
+        mesure = mesurer_imports()
+        self.assertEqual(mesure["modules_lourds"], [])
+        # Budget large : machines de CI lentes
+        self.assertLess(mesure["cumules"]["core.urls"], BUDGET_MS * 4)
+
+    def test_modele_import_telechargeable(self):
+        self.client.force_login(self.enseignant)
+        reponse = self.client.get(reverse("core:telecharger_modele_import"))
+        self.assertEqual(reponse.status_code, 200)
+        wb = openpyxl.load_workbook(io.BytesIO(reponse.content))
+        self.assertEqual(next(wb.active.iter_rows(values_only=True)), ("Matricule", "Nom", "Prénom"))
+
+
+class SelecteursTests(PresenceDataMixin, TestCase):
+    def setUp(self):
+        jeton = MemoSelecteurs().activer()
+        self.addCleanup(MemoSelecteurs.desactiver, jeton)
+
+    def test_une_requete_par_selecteur_et_par_requete_http(self):
+        for selecteur, attendu in ((cours_enseignant, 2), (classes_enseignant, 1)):
+            with self.subTest(selecteur=selecteur.__name__), self.assertNumQueries(1):
+                self.assertEqual(len(selecteur(self.enseignant)), attendu)
+                # Deuxième appel, tranche et total : même QuerySet, déjà évalué
+                self.assertEqual(len(selecteur(self.enseignant)[:5]), attendu)
+                self.assertEqual(selecteur(self.enseignant).count(), attendu)
+
+    def test_tableau_de_bord_sans_selecteur_rejoue(self):
+        self.client.force_login(self.enseignant)
+        cache.clear()
+        # Session, utilisateur, cours (une fois : tranche et totaux en Python),
+        # séances récentes, séances du jour
+        with self.assertNumQueries(5):
+            reponse = self.client.get(reverse("core:dashboard"))
+        self.assertEqual(len(reponse.context["cours"]), 2)
+        self.assertEqual(reponse.context["stats"]["total_cours"], 2)
+        self.assertEqual(reponse.context["stats"]["total_seances"], 8)
+        self.assertEqual(reponse.context["stats"]["seances_aujourdhui"], 0)
+
+    def test_relations_chargees_sans_requete_supplementaire(self):
+        with self.assertNumQueries(1):
+            for cours in cours_enseignant(self.enseignant):
+                self.assertEqual((cours.classe.nom, cours.seances_count()), ("L1 Info", 4))
+        with self.assertNumQueries(1):
+            for seance in seances_enseignant(self.enseignant):
+                self.assertEqual(seance.cours.classe.nom, "L1 Info")
+        with self.assertNumQueries(1):
+            self.assertEqual({e.classe.nom for e in etudiants_enseignant(self.enseignant, self.classe.pk)}, {"L1 Info"})
+
+    def test_classes_sans_doublon(self):
+        # Deux cours dans la même classe : une seule entrée
+        self.assertEqual(list(classes_enseignant(self.enseignant)), [self.classe])
+
+    def test_memo_vide_apres_une_ecriture(self):
+        self.assertEqual(len(cours_enseignant(self.enseignant)), 2)
+        Cours.objects.create(nom="Systèmes", classe=self.classe, enseignant=self.enseignant)
+        self.assertEqual(len(cours_enseignant(self.enseignant)), 3)
+
+    def test_synthese_sans_requete_par_classe(self):
+        self.client.force_login(self.enseignant)
+        url = reverse("core:synthese_enseignant")
+        with CaptureQueriesContext(connection) as une_classe:
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            autre = Classe.objects.create(nom="L2 Info", niveau="L2")
+            Cours.objects.create(nom="Compilation", classe=autre, enseignant=self.enseignant)
+        with CaptureQueriesContext(connection) as deux_classes:
+            reponse = self.client.get(url)
+        self.assertEqual(reponse.context["stats"]["total_classes"], 2)
+        self.assertEqual(len(deux_classes), len(une_classe))
+
+
+@override_settings(CHEVAUCHEMENT_INCREMENTAL=0)
+class AlertesAbsenceTests(PresenceDataMixin, TestCase):
+    # Jeu commun : chaque étudiant a 2 présences sur 4 séances par cours (50 %)
+
+    def marquer(self, etudiant, statuts, cours=None):
+        seances = Seance.objects.filter(cours=cours or self.cours).order_by('date')
+        for seance, statut in zip(seances, statuts):
+            presence = Presence.objects.get(etudiant=etudiant, seance=seance)
+            presence.statut = statut
+            presence.save()
+
+    def test_premiere_analyse_complete(self):
+        compte_rendu = analyser_absences()
+        self.assertEqual(compte_rendu["cours_analyses"], 2)
+        self.assertEqual(AlerteAbsence.objects.count(), 24)
+        alerte = AlerteAbsence.objects.get(cours=self.cours, etudiant=self.etudiants[0])
+        self.assertEqual((alerte.taux_presence, alerte.seances_appelees, alerte.taux_insuffisant), (50.0, 4, True))
+
+    @override_settings(ALERTES_SEUIL_TAUX=40)
+    def test_serie_et_reprise_incrementale(self):
+        analyser_absences()
+        self.assertEqual(AlerteAbsence.objects.count(), 0)
+
+        self.marquer(self.etudiants[1], ["present", "absent", "absent", "absent"])
+        compte_rendu = analyser_absences()
+        # Seul le cours modifié depuis le point de reprise est réanalysé
+        self.assertEqual(compte_rendu["cours_analyses"], 1)
+        alerte = AlerteAbsence.objects.get()
+        self.assertEqual((alerte.cours, alerte.etudiant), (self.cours, self.etudiants[1]))
+        self.assertEqual((alerte.absences_consecutives, alerte.serie_absences, alerte.taux_insuffisant), (3, True, True))
+
+        self.marquer(self.etudiants[1], ["present", "absent", "absent", "present"])
+        self.assertEqual(analyser_absences()["alertes"], 0)
+
+    def test_rien_a_reanalyser(self):
+        analyser_absences()
+        with self.assertNumQueries(8):
+            self.assertEqual(analyser_absences()["cours_analyses"], 0)
+
+    def test_changement_de_classe(self):
+        analyser_absences()
+        etudiant = self.etudiants[0]
+        etudiant.classe = Classe.objects.create(nom="L2 Info", niveau="L2")
+        etudiant.save()
+        analyser_absences()
+        self.assertFalse(AlerteAbsence.objects.filter(etudiant=etudiant).exists())
+
+    def test_api_et_tableau_de_bord(self):
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="x", role="admin")
+        self.marquer(self.etudiants[1], ["present", "absent", "absent", "absent"])
+        call_command("analyser_absences", "--complet", stdout=io.StringIO())
+
+        self.client.force_login(self.enseignant)
+        self.assertEqual(self.client.get(reverse("core:api_alertes")).status_code, 302)
+
+        self.client.force_login(admin)
+        with self.assertNumQueries(4):  # session, utilisateur, page, point de reprise
+            donnees = self.client.get(reverse("core:api_alertes")).json()
+        self.assertEqual(len(donnees["results"]), 24)
+        self.assertEqual(donnees["results"][0]["taux_presence"], 25.0)
+        self.assertIsNotNone(donnees["derniere_analyse"])
+
+        donnees = self.client.get(reverse("core:api_alertes"), {"type": "serie"}).json()
+        self.assertEqual([r["etudiant"]["id"] for r in donnees["results"]], [self.etudiants[1].pk])
+        self.assertEqual(self.client.get(reverse("core:api_alertes"), {"type": "x"}).status_code, 400)
+
+        reponse = self.client.get(reverse("core:admin_dashboard"))
+        self.assertContains(reponse, "Étudiants à risque")
+        self.assertEqual(reponse.context["total_alertes"], 24)
+
+
+class ChronologieEtudiantTests(PresenceDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_resumes_par_etudiant_en_cache(self):
+        ids = [e.pk for e in self.etudiants]
+        with self.assertNumQueries(1):
+            resumes = resumes_etudiants(ids)
+        with self.assertNumQueries(0):
+            self.assertEqual(resumes_etudiants(ids[:3]), {pk: resumes[pk] for pk in ids[:3]})
+        resume = resumes[ids[0]]
+        self.assertEqual([c["nom"] for c in resume["cours"]], ["Algo", "Réseaux"])
+        self.assertEqual((resume["total"], resume["taux_global"]), (8, 50.0))
+
+    def test_chronologie_la_plus_recente_d_abord(self):
+        self.client.force_login(self.enseignant)
+        url = reverse("core:api_presences_etudiant", args=[self.etudiants[0].pk])
+        with self.assertNumQueries(5):  # session, utilisateur, étudiant, page, résumé
+            donnees = self.client.get(url).json()
+        dates = [p["date"] for p in donnees["presences"]]
+        self.assertEqual(len(dates), 8)
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(donnees["taux_global"], 50.0)
+        self.assertEqual({c["taux_presence"] for c in donnees["cours"]}, {50.0})
+
+        donnees = self.client.get(url, {"cours": self.cours_bis.pk}).json()
+        self.assertEqual({p["cours"]["nom"] for p in donnees["presences"]}, {"Réseaux"})
+        self.assertFalse(donnees["pagination"]["more"])
+
+    def test_acces_limite_aux_enseignants_de_la_classe(self):
+        autre = User.objects.create_user(username="autre", email="autre@example.com", password="x", role="enseignant")
+        self.client.force_login(autre)
+        url = reverse("core:api_presences_etudiant", args=[self.etudiants[0].pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="x", role="admin")
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class VignettesTests(MediasTemporairesMixin, PresenceDataMixin, TestCase):
+    @staticmethod
+    def photo(couleur="red", nom="photo.jpg"):
+        from PIL import Image
+
+        tampon = io.BytesIO()
+        Image.new("RGB", (600, 400), couleur).save(tampon, "JPEG")
+        return SimpleUploadedFile(nom, tampon.getvalue(), content_type="image/jpeg")
+
+    def test_vignettes_generees_a_l_envoi(self):
+        from PIL import Image
+
+        etudiant = self.etudiants[0]
+        etudiant.photo = self.photo()
+        etudiant.save()
+        self.assertTrue(default_storage.exists(etudiant.photo.name))
+        for taille in (40, 80):
+            with default_storage.open(nom_vignette(etudiant.photo_empreinte, taille)) as fichier:
+                image = Image.open(fichier)
+                self.assertEqual((image.format, image.size), ("WEBP", (taille, taille)))
+
+        # Même contenu : mêmes vignettes, rien de plus sur le disque
+        autre = self.etudiants[1]
+        autre.photo = self.photo(nom="copie.jpg")
+        autre.save()
+        self.assertEqual(autre.photo_empreinte, etudiant.photo_empreinte)
+        _, fichiers = default_storage.listdir(nom_vignette(etudiant.photo_empreinte, 40).rsplit("/", 1)[0])
+        self.assertEqual(len(fichiers), 2)
+
+        etudiant.photo = None
+        etudiant.save()
+        self.assertEqual(etudiant.photo_empreinte, "")
+
+    def test_balise_et_page_d_appel(self):
+        etudiant = self.etudiants[0]
+        self.assertIn("img/avatar.png", vignette_etudiant(etudiant))
+        etudiant.photo = self.photo()
+        etudiant.save()
+        balise = vignette_etudiant(etudiant, 40)
+        self.assertIn(f'src="{default_storage.url(nom_vignette(etudiant.photo_empreinte, 40))}"', balise)
+        self.assertIn(f"{nom_vignette(etudiant.photo_empreinte, 80)} 2x", balise)
+
+        self.client.force_login(self.enseignant)
+        reponse = self.client.get(reverse("core:appel_presence", args=[self.seances[0].pk]))
+        self.assertContains(reponse, nom_vignette(etudiant.photo_empreinte, 40))
+
+    def test_rattrapage_des_photos_existantes(self):
+        chemin = default_storage.save("etudiants/ancienne.jpg", self.photo())
+        illisible = default_storage.save("etudiants/illisible.jpg", SimpleUploadedFile("x.jpg", b"pas une image"))
+        Etudiant.objects.filter(pk=self.etudiants[0].pk).update(photo=chemin)
+        Etudiant.objects.filter(pk=self.etudiants[1].pk).update(photo=illisible)
+
+        sortie = io.StringIO()
+        call_command("generer_vignettes", "--workers", "0", stdout=sortie)
+        self.assertIn("1/2 photo(s)", sortie.getvalue())
+        etudiant = Etudiant.objects.get(pk=self.etudiants[0].pk)
+        self.assertTrue(default_storage.exists(nom_vignette(etudiant.photo_empreinte, 80)))
+        self.assertEqual(Etudiant.objects.get(pk=self.etudiants[1].pk).photo_empreinte, "")
@@ -59,9 +59,17 @@ urlpatterns = [
     # -------------------------------
     path('api/stats/cours/<int:cours_id>/', views.api_stats_cours, name="api_stats_cours"),
     path('api/presences/seance/<int:seance_id>/', views.api_presences_seance, name="api_presences_seance"),
+    path('api/etudiants/<int:etudiant_id>/presences/', views.api_presences_etudiant, name="api_presences_etudiant"),
+    path('api/sync/appel/', views.api_sync_appel, name="api_sync_appel"),
+    path('api/export/presences/', views.api_export_presences, name="api_export_presences"),
     path('api/recherche/etudiants/', views.api_recherche_etudiants, name="api_recherche_etudiants"),
     path('api/recherche/cours/', views.api_recherche_cours, name="api_recherche_cours"),
     
+    path('api/taches/<int:pk>/', views.tache_statut, name="tache_statut"),
+    path('api/instrumentation/', views.api_instrumentation, name="api_instrumentation"),
+    path('api/alertes/', views.api_alertes, name="api_alertes"),
+    path('taches/<int:pk>/telecharger/', views.tache_telecharger, name="tache_telecharger"),
+    
     path('seances/<int:seance_id>/ajouter-etudiant/', views.ajouter_etudiant_rapide, name="ajouter_etudiant_rapide"),
     path('api/stats/cours/<int:cours_id>/', views.api_stats_cours, name="api_stats_cours"),
     
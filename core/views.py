@@ -1,25 +1,22 @@
 # core/views.py
 
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.conf import settings
+from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.http import HttpResponse, JsonResponse
-from django.template.loader import render_to_string
-from django.db.models import Count, Q
+from django.http import HttpResponse, JsonResponse, FileResponse, Http404, StreamingHttpResponse
+from django.db.models import Count, F, Q, Sum
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.core.paginator import Paginator
+from asgiref.sync import sync_to_async
 
-import openpyxl
-from openpyxl.styles import Font
-from io import BytesIO
 import json
-import openpyxl
-from xhtml2pdf import pisa
+import os
 from django.core.serializers.json import DjangoJSONEncoder
-import csv
-import io
 
 # Import des formulaires
 from .forms import (
@@ -30,8 +27,29 @@ from .forms import (
 # Import des modèles
 from .models import (
     Cours, Seance, Classe, User,
-    Presence, Etudiant
+    Presence, Etudiant, Tache
 )
+from .alertes import ORDRE_ALERTES, alertes, derniere_analyse
+from .cache import cache_stats
+from .stats import STATUTS, chronologie_etudiant, resume_etudiant, resumes_etudiants, stats_cours, stats_par_cours
+from .services import enregistrer_appel
+from .synchronisation import synchroniser
+from .taches import enfiler
+from .recherche import rechercher_cours, rechercher_etudiants
+from .pagination import paginer
+from .selectors import classes_enseignant, cours_enseignant, etudiants_enseignant, seances_enseignant
+from .instrumentation import statistiques_vues
+from .routage import vue_rapport
+from .conditionnel import avalidateurs_cours, conditionnel, validateurs_cours, version_cours
+from .imports import importer_etudiants as importer_etudiants_fichier
+from .exports import EXCEL_CONTENT_TYPE, export_excel_presences, export_modele_import, flux_csv, flux_ndjson, presences_dump, rapport_stocke
+from .exports import export_pdf_statistiques as export_pdf_statistiques_cours
+
+
+# Ordres de pagination par curseur : uniques (terminés par l'id) et non nuls
+ORDRE_ETUDIANTS = ('classe__nom', 'nom', 'prenom', 'id')
+ORDRE_SEANCES = ('-date', '-heure_debut', 'id')
+ORDRE_CHRONOLOGIE = ('-seance__date', '-seance__heure_debut', '-id')
 
 
 # -------------------
@@ -46,6 +64,41 @@ def enseignant_required(user):
     """Vérifie si l'utilisateur est enseignant"""
     return user.is_authenticated and user.role == "enseignant"
 
+def importer_ou_enfiler(request, fichier, classe, mode):
+    """Import direct des petits fichiers, mise en file de tâches des gros"""
+    if fichier.size > settings.TACHES_SEUIL_IMPORT:
+        tache = enfiler('import_etudiants', request.user, fichier_source=fichier, classe_id=classe.id, mode=mode)
+        messages.info(request, f"Import lancé en arrière-plan (tâche n°{tache.pk})")
+    else:
+        rapport = importer_etudiants_fichier(fichier, classe, mode)
+        message_import(request, rapport, mode)
+
+def tache_json(tache, status=200):
+    """Représentation JSON d'une tâche pour le suivi côté client"""
+    data = {
+        'id': tache.pk,
+        'type': tache.type_tache,
+        'statut': tache.statut,
+        'url_statut': reverse('core:tache_statut', args=[tache.pk]),
+        'resultat': tache.resultat,
+    }
+    if tache.statut == 'terminee' and tache.fichier:
+        data['url_telechargement'] = reverse('core:tache_telecharger', args=[tache.pk])
+    return JsonResponse(data, status=status)
+
+def message_import(request, rapport, mode):
+    """Affiche le bilan d'un import d'étudiants"""
+    if rapport["erreurs"]:
+        details = "; ".join(
+            f"Ligne {e['ligne']}: {e['message']}" for e in rapport["erreurs"][:5]
+        )
+        messages.warning(request, f"Import terminé avec {len(rapport['erreurs'])} erreurs ({details})")
+    else:
+        msg = f"{rapport['crees']} étudiants importés"
+        if mode == 'update':
+            msg += f", {rapport['modifies']} modifiés"
+        messages.success(request, msg)
+
 # -------------------
 # AUTHENTIFICATION
 # -------------------
@@ -105,13 +158,16 @@ def home(request):
             return redirect('core:admin_dashboard')
         return redirect('core:dashboard')
 
-    # Statistiques réelles
-    stats = {
-        'total_appels': Presence.objects.count(),
-        'total_etudiants': Etudiant.objects.count(),
-        'total_cours': Cours.objects.count(),
-        'total_heures_gagnees': (Presence.objects.count() // 60)  # 1 minute par appel manuel → heures gagnées
-    }
+    # Statistiques réelles (mises en cache : page publique très sollicitée)
+    def calcul():
+        total_appels = Presence.objects.count()
+        return {
+            'total_appels': total_appels,
+            'total_etudiants': Etudiant.objects.count(),
+            'total_cours': Cours.objects.count(),
+            'total_heures_gagnees': (total_appels // 60)  # 1 minute par appel manuel → heures gagnées
+        }
+    stats = cache_stats("public:home", calcul)
 
     return render(request, 'core/home.html', {'stats': stats})
 @login_required
@@ -120,30 +176,26 @@ def dashboard(request):
     if request.user.role == "admin":
         return redirect('core:admin_dashboard')
     
-    # Dashboard enseignant
-    cours = request.user.cours_enseignant.all().order_by('-created_at')[:5]
-    seances_recentes = Seance.objects.filter(
-        cours__enseignant=request.user
-    ).order_by('-date', '-heure_debut')[:5]
+    # Dashboard enseignant : cours chargés une fois (tranche et totaux en Python)
+    cours = cours_enseignant(request.user)
+    seances_recentes = seances_enseignant(request.user).with_presence_stats().order_by('-date', '-heure_debut')[:5]
     
     # Statistiques rapides
-    stats = {
-        'total_cours': request.user.cours_enseignant.count(),
-        'total_seances': Seance.objects.filter(cours__enseignant=request.user).count(),
-        'seances_aujourdhui': Seance.objects.filter(
-            cours__enseignant=request.user,
-            date=timezone.now().date()
-        ).count()
-    }
+    stats = cache_stats(f"enseignant:{request.user.id}:dashboard", lambda: {
+        'total_cours': len(cours),
+        'total_seances': sum(c.nb_seances for c in cours),
+        'seances_aujourdhui': seances_enseignant(request.user).filter(date=timezone.now().date()).count()
+    })
     
     return render(request, "core/dashboard.html", {
-        "cours": cours,
+        "cours": cours[:5],
         "seances_recentes": seances_recentes,
         "stats": stats
     })
 
 @login_required
 @user_passes_test(admin_required)
+@vue_rapport
 def admin_dashboard(request):
     """Dashboard administrateur"""
     enseignants = User.objects.filter(role="enseignant")
@@ -151,7 +203,7 @@ def admin_dashboard(request):
     etudiants = Etudiant.objects.all()
     cours = Cours.objects.all()
     
-    stats = {
+    stats = cache_stats("admin:dashboard", lambda: {
         'total_enseignants': enseignants.count(),
         'total_classes': classes.count(),
         'total_etudiants': etudiants.count(),
@@ -159,14 +211,18 @@ def admin_dashboard(request):
         'presences_aujourdhui': Presence.objects.filter(
             seance__date=timezone.now().date()
         ).count()
-    }
+    })
     
+    # Étudiants à risque : précalculés par la commande analyser_absences
     return render(request, "core/admin_dashboard.html", {
         "enseignants": enseignants,
         "classes": classes,
         "etudiants": etudiants,
         "cours": cours,
-        "stats": stats
+        "stats": stats,
+        "alertes": alertes().order_by(*ORDRE_ALERTES)[:10],
+        "total_alertes": alertes().count(),
+        "derniere_analyse": derniere_analyse(),
     })
 
 # -------------------
@@ -177,7 +233,7 @@ def admin_dashboard(request):
 @user_passes_test(enseignant_required)
 def mes_cours(request):
     """Liste des cours de l'enseignant"""
-    cours_list = request.user.cours_enseignant.all().order_by('-created_at')
+    cours_list = cours_enseignant(request.user)
     
     # Pagination
     paginator = Paginator(cours_list, 10)
@@ -190,34 +246,45 @@ def mes_cours(request):
 @user_passes_test(enseignant_required)
 def cours_detail(request, pk):
     """Détail d'un cours avec statistiques"""
-    cours = get_object_or_404(Cours, pk=pk, enseignant=request.user)
-    seances = cours.seances.all().order_by('-date')
-    etudiants = cours.classe.etudiants.all()
+    cours = get_object_or_404(Cours.objects.select_related('classe', 'enseignant'), pk=pk, enseignant=request.user)
+    seances = cours.seances.with_presence_stats().order_by('-date')
+    
+    # Statistiques détaillées (calculées sur la matrice de présences du cours ;
+    # numpy n'est chargé qu'à la première consultation)
+    from .matrice import matrice_cours
+    matrice = matrice_cours(cours)
+    etudiants = cours.classe.etudiants.order_by().in_bulk()
+    totaux = matrice.totaux_par_etudiant()
+    taux = matrice.taux_par_etudiant()
+    serie_en_cours, plus_longue_serie = matrice.series_absences()
+    
+    # Taux tous cours confondus : résumés par étudiant en cache (une requête
+    # pour les seuls étudiants absents du cache)
+    resumes = resumes_etudiants(matrice.etudiant_ids)
     
-    # Statistiques détaillées
     stats = {
-        'total_seances': seances.count(),
-        'total_etudiants': etudiants.count(),
+        'total_seances': len(matrice.seance_ids),
+        'total_etudiants': len(matrice.etudiant_ids),
+        'taux_global': matrice.taux_global(),
         'presences_par_etudiant': [],
-        'stats_globales': {
-            'present': Presence.objects.filter(seance__cours=cours, statut='present').count(),
-            'absent': Presence.objects.filter(seance__cours=cours, statut='absent').count(),
-            'retard': Presence.objects.filter(seance__cours=cours, statut='retard').count(),
-            'motif': Presence.objects.filter(seance__cours=cours, statut='motif').count(),
-        }
+        'stats_globales': matrice.totaux(),
     }
     
-    for etu in etudiants:
-        presences = etu.presences.filter(seance__cours=cours)
-        total_presences = presences.count()
-        
+    for i, etudiant_id in enumerate(matrice.etudiant_ids):
+        if etudiant_id not in etudiants:
+            # Matrice en cache antérieure à la suppression ou au changement de classe
+            continue
+        present, retard, absent, motif = totaux[i].tolist()
         stats['presences_par_etudiant'].append({
-            'etudiant': etu,
-            'present': presences.filter(statut='present').count(),
-            'retard': presences.filter(statut='retard').count(),
-            'absent': presences.filter(statut='absent').count(),
-            'motif': presences.filter(statut='motif').count(),
-            'taux_presence': (presences.filter(statut__in=['present', 'retard']).count() / total_presences * 100) if total_presences > 0 else 0
+            'etudiant': etudiants[etudiant_id],
+            'present': present,
+            'retard': retard,
+            'absent': absent,
+            'motif': motif,
+            'taux_presence': float(taux[i]),
+            'serie_absences': int(serie_en_cours[i]),
+            'plus_longue_serie': int(plus_longue_serie[i]),
+            'taux_global': resumes[etudiant_id]['taux_global'],
         })
     
     return render(request, "core/cours_detail.html", {
@@ -290,7 +357,7 @@ def cours_delete(request, pk):
 @user_passes_test(enseignant_required)
 def seance_list(request):
     """Liste des séances de l'enseignant"""
-    seances_list = Seance.objects.filter(cours__enseignant=request.user).order_by('-date', '-heure_debut')
+    seances_list = seances_enseignant(request.user).with_presence_stats()
     
     # Filtrage par cours si spécifié
     cours_id = request.GET.get('cours')
@@ -298,11 +365,9 @@ def seance_list(request):
         seances_list = seances_list.filter(cours_id=cours_id)
     
     # Pagination
-    paginator = Paginator(seances_list, 10)
-    page_number = request.GET.get('page')
-    seances = paginator.get_page(page_number)
+    seances = paginer(seances_list, ORDRE_SEANCES, 10, request.GET.get('curseur'))
     
-    cours_options = request.user.cours_enseignant.all()
+    cours_options = cours_enseignant(request.user)
     
     return render(request, "core/seance_list.html", {
         "seances": seances,
@@ -368,7 +433,7 @@ def seance_delete(request, pk):
 @user_passes_test(enseignant_required)
 def appel_presence(request, seance_id):
     """Appel de présence pour une séance"""
-    seance = get_object_or_404(Seance, pk=seance_id, cours__enseignant=request.user)
+    seance = get_object_or_404(Seance.objects.select_related('cours', 'cours__classe'), pk=seance_id, cours__enseignant=request.user)
     etudiants = Etudiant.objects.filter(classe=seance.cours.classe).order_by('nom', 'prenom')
     
     # Récupérer les présences existantes
@@ -395,15 +460,17 @@ def appel_presence(request, seance_id):
         # Traitement de l'appel - version avec données JSON
         presences_data = json.loads(request.POST.get('presences_data', '{}'))
         
-        for etu in etudiants:
-            statut = presences_data.get(str(etu.id), "absent")
-            Presence.objects.update_or_create(
-                etudiant=etu,
-                seance=seance,
-                defaults={"statut": statut}
-            )
+        try:
+            bilan = enregistrer_appel(seance, presences_data)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect("core:appel_presence", seance_id=seance.id)
         
-        messages.success(request, f"Appel de présence enregistré pour la séance du {seance.date} !")
+        messages.success(
+            request,
+            f"Appel de présence enregistré pour la séance du {seance.date} ! "
+            f"({bilan['crees']} ajoutées, {bilan['modifies']} modifiées, {bilan['inchanges']} inchangées)"
+        )
         return redirect("core:seance_list")
     
     return render(request, "core/appel_presence.html", {
@@ -416,9 +483,10 @@ def appel_presence(request, seance_id):
 
 @login_required
 @user_passes_test(enseignant_required)
-def ajouter_etudiant_rapide(request, seance_id):
+async def ajouter_etudiant_rapide(request, seance_id):
     """Ajouter rapidement un étudiant depuis l'appel de présence"""
-    seance = get_object_or_404(Seance, pk=seance_id, cours__enseignant=request.user)
+    user = await request.auser()
+    seance = await aget_object_or_404(Seance.objects.select_related('cours__classe'), pk=seance_id, cours__enseignant=user)
     
     if request.method == "POST":
         matricule = request.POST.get('matricule')
@@ -430,7 +498,7 @@ def ajouter_etudiant_rapide(request, seance_id):
         
         try:
             # Vérifier si l'étudiant existe déjà
-            etudiant, created = Etudiant.objects.get_or_create(
+            etudiant, created = await Etudiant.objects.aget_or_create(
                 matricule=matricule,
                 defaults={
                     'nom': nom,
@@ -441,9 +509,9 @@ def ajouter_etudiant_rapide(request, seance_id):
             
             if not created:
                 # Si l'étudiant existe mais dans une autre classe, on le déplace
-                if etudiant.classe != seance.cours.classe:
+                if etudiant.classe_id != seance.cours.classe_id:
                     etudiant.classe = seance.cours.classe
-                    etudiant.save()
+                    await etudiant.asave()
             
             return JsonResponse({
                 'success': True,
@@ -468,182 +536,84 @@ def ajouter_etudiant_rapide(request, seance_id):
 
 @login_required
 @user_passes_test(enseignant_required)
+@vue_rapport
 def statistiques(request):
     """Statistiques des présences"""
-    cours_list = request.user.cours_enseignant.all()
+    cours_list = request.user.cours_enseignant.select_related('classe')
     cours_id = request.GET.get('cours')
     
     if cours_id:
-        cours_selected = get_object_or_404(Cours, id=cours_id, enseignant=request.user)
+        cours_selected = get_object_or_404(cours_list, id=cours_id)
         cours_list = [cours_selected]
     else:
         cours_selected = None
     
-    stats_globales = []
-    
-    for cours in cours_list:
-        total_seances = cours.seances.count()
-        etudiants = cours.classe.etudiants.all()
-        
-        stats_cours = {
-            "cours": cours,
-            "total_seances": total_seances,
-            "global": {
-                "present": 0,
-                "absent": 0,
-                "retard": 0,
-                "motif": 0,
-            },
-            "etudiants_stats": []
-        }
-        
-        for etu in etudiants:
-            present = etu.presences.filter(seance__cours=cours, statut="present").count()
-            absent = etu.presences.filter(seance__cours=cours, statut="absent").count()
-            retard = etu.presences.filter(seance__cours=cours, statut="retard").count()
-            motif = etu.presences.filter(seance__cours=cours, statut="motif").count()
-            
-            stats_cours["global"]["present"] += present
-            stats_cours["global"]["absent"] += absent
-            stats_cours["global"]["retard"] += retard
-            stats_cours["global"]["motif"] += motif
-            
-            stats_cours["etudiants_stats"].append({
-                "etudiant": etu,
-                "present": present,
-                "absent": absent,
-                "retard": retard,
-                "motif": motif,
-                "taux_presence": (present + retard) / total_seances * 100 if total_seances > 0 else 0
-            })
-        
-        stats_globales.append(stats_cours)
+    stats_globales = stats_par_cours(cours_list)
     
     return render(request, "core/statistiques.html", {
         "stats": stats_globales,
         "cours_selected": cours_selected,
-        "cours_options": request.user.cours_enseignant.all(),
-        "stats_json": json.dumps([{
-            'cours': s['cours'].nom,
-            'classe': s['cours'].classe.nom,
-            'total_seances': s['total_seances'],
-            'global': s['global'],
-            'etudiants_stats': [{
-                'etudiant': f"{es['etudiant'].nom} {es['etudiant'].prenom or ''}",
-                'present': es['present'],
-                'absent': es['absent'],
-                'retard': es['retard'],
-                'motif': es['motif'],
-                'taux_presence': es['taux_presence']
-            } for es in s['etudiants_stats']]
-        } for s in stats_globales], cls=DjangoJSONEncoder)
+        "cours_options": request.user.cours_enseignant.select_related('classe'),
+        "stats_json": json.dumps([s.as_dict() for s in stats_globales], cls=DjangoJSONEncoder)
     })
 
+def validateurs_export(nature):
+    """Validateurs des exports d'un cours ; aucun pour l'export en arrière-plan (?async=1)"""
+    def calcul(request, cours_id):
+        if request.GET.get('async'):
+            return None
+        return validateurs_cours(nature, cours_id, request.user)
+    return calcul
+
 @login_required
 @user_passes_test(enseignant_required)
+@vue_rapport
+@conditionnel(validateurs_export('excel'))
 def export_excel(request, cours_id):
     """Export Excel des présences"""
-    cours = get_object_or_404(Cours, id=cours_id, enseignant=request.user)
-    etudiants = cours.classe.etudiants.all().order_by('nom', 'prenom')
-    seances = cours.seances.all().order_by("date")
-    
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"Présences {cours.nom}"
-    
-    # En-têtes
-    headers = ["Matricule", "Nom", "Prénom"] + [s.date.strftime("%d/%m/%Y") for s in seances] + ["Total Présent", "Total Absent", "Taux Présence"]
-    ws.append(headers)
-    
-    # Données des étudiants
-    for etu in etudiants:
-        row = [etu.matricule, etu.nom, etu.prenom or ""]
-        total_present = 0
-        
-        for s in seances:
-            presence = Presence.objects.filter(etudiant=etu, seance=s).first()
-            statut = presence.statut if presence else "absent"
-            row.append(statut)
-            if statut in ["present", "retard"]:
-                total_present += 1
-        
-        total_absences = seances.count() - total_present
-        taux_presence = (total_present / seances.count() * 100) if seances.count() > 0 else 0
-        
-        row.extend([total_present, total_absences, f"{taux_presence:.1f}%"])
-        ws.append(row)
-    
-    # Formatage
-    for col in range(1, len(headers) + 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 15
-    
-    # Export HTTP
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="presences_{cours.nom}_{timezone.now().date()}.xlsx"'
-    wb.save(response)
-    return response
+    cours = get_object_or_404(Cours.objects.select_related('classe'), id=cours_id, enseignant=request.user)
+    
+    # Export en arrière-plan sur demande (?async=1) : retourne l'identifiant de la tâche
+    if request.GET.get('async'):
+        return tache_json(enfiler('export_excel', request.user, cours_id=cours.id), status=202)
+    
+    # Classeur régénéré seulement si les données du cours ont changé, depuis
+    # une matrice fraîche : il est stocké sous la version courante
+    version, _ = version_cours(cours.id)
+    fichier = rapport_stocke(f"presences_{cours.id}", version, ".xlsx", lambda: export_excel_presences(cours, fraiche=True))
+    
+    # Export HTTP (streamé depuis le fichier temporaire)
+    return FileResponse(
+        fichier,
+        as_attachment=True,
+        filename=f"presences_{cours.nom}_{timezone.now().date()}.xlsx",
+        content_type=EXCEL_CONTENT_TYPE
+    )
 
 @login_required
 @user_passes_test(enseignant_required)
+@vue_rapport
+@conditionnel(validateurs_export('pdf'))
 def export_pdf_statistiques(request, cours_id):
     """Export PDF des statistiques"""
-    cours = get_object_or_404(Cours, id=cours_id, enseignant=request.user)
-    etudiants = cours.classe.etudiants.all().order_by('nom', 'prenom')
-    seances = cours.seances.all().order_by("date")
-    
-    etudiants_stats = []
-    total_present = total_absent = total_retard = total_motif = 0
-    
-    for etu in etudiants:
-        present = etu.presences.filter(seance__cours=cours, statut="present").count()
-        absent = etu.presences.filter(seance__cours=cours, statut="absent").count()
-        retard = etu.presences.filter(seance__cours=cours, statut="retard").count()
-        motif = etu.presences.filter(seance__cours=cours, statut="motif").count()
-        
-        total_present += present
-        total_absent += absent
-        total_retard += retard
-        total_motif += motif
-        
-        taux_presence = (present + retard) / seances.count() * 100 if seances.count() > 0 else 0
-        
-        etudiants_stats.append({
-            "etudiant": etu,
-            "present": present,
-            "absent": absent,
-            "retard": retard,
-            "motif": motif,
-            "taux_presence": taux_presence
-        })
+    cours = get_object_or_404(Cours.objects.select_related('classe'), id=cours_id, enseignant=request.user)
     
-    stats = {
-        "cours": cours,
-        "total_seances": seances.count(),
-        "global": {
-            "present": total_present,
-            "absent": total_absent,
-            "retard": total_retard,
-            "motif": total_motif,
-        },
-        "etudiants_stats": etudiants_stats,
-        "date_generation": timezone.now()  # ✅ Maintenant avec heure
-    }
-    
-    html_string = render_to_string("core/statistiques_pdf.html", {"stats": stats})
+    if request.GET.get('async'):
+        return tache_json(enfiler('export_pdf', request.user, cours_id=cours.id), status=202)
     
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="statistiques_{cours.nom}_{timezone.now().date()}.pdf"'
-    
-    pisa_status = pisa.CreatePDF(
-        src=html_string, 
-        dest=response,
-        encoding='UTF-8'
+    version, _ = version_cours(cours.id)
+    fichier = rapport_stocke(
+        f"statistiques_{cours.id}", version, ".pdf",
+        lambda: export_pdf_statistiques_cours(stats_cours(cours), timezone.localtime()),
     )
     
-    if pisa_status.err:
-        return HttpResponse("Erreur lors de la génération du PDF")
-    
-    return response
+    return FileResponse(
+        fichier,
+        as_attachment=True,
+        filename=f"statistiques_{cours.nom}_{timezone.now().date()}.pdf",
+        content_type='application/pdf'
+    )
+
     # -------------------
 # GESTION DES ÉTUDIANTS
 # -------------------
@@ -651,29 +621,27 @@ def export_pdf_statistiques(request, cours_id):
 @user_passes_test(enseignant_required)
 def mes_etudiants(request):
     """Liste des étudiants des classes de l'enseignant"""
-    classes_enseignant = Classe.objects.filter(cours__enseignant=request.user).distinct()
+    classes = classes_enseignant(request.user)
     classe_id = request.GET.get('classe')
     
     if classe_id:
-        etudiants = Etudiant.objects.filter(classe_id=classe_id, classe__in=classes_enseignant)
-        # Récupérer le nom de la classe sélectionnée
+        # Classe sélectionnée : parmi celles de l'enseignant (liste déjà chargée)
         classe_selected = int(classe_id)
-        classe_nom = Classe.objects.get(id=classe_id).nom
+        classe = next((c for c in classes if c.pk == classe_selected), None)
+        if classe is None:
+            raise Http404("Classe introuvable")
+        classe_nom = classe.nom
     else:
-        etudiants = Etudiant.objects.filter(classe__in=classes_enseignant)
         classe_selected = None
         classe_nom = "Toutes les classes"
-    
-    etudiants = etudiants.order_by('classe__nom', 'nom', 'prenom')
+    etudiants = etudiants_enseignant(request.user, classe_selected)
     
     # Pagination
-    paginator = Paginator(etudiants, 20)
-    page_number = request.GET.get('page')
-    etudiants_page = paginator.get_page(page_number)
+    etudiants_page = paginer(etudiants, ORDRE_ETUDIANTS, 20, request.GET.get('curseur'))
     
     return render(request, "core/mes_etudiants.html", {
         "etudiants": etudiants_page,
-        "classes": classes_enseignant,
+        "classes": classes,
         "classe_selected": classe_selected,
         "classe_nom": classe_nom  
     })
@@ -682,11 +650,11 @@ def mes_etudiants(request):
 @user_passes_test(enseignant_required)
 def importer_etudiants(request):
     """Import d'étudiants via fichier Excel/CSV"""
-    classes_enseignant = Classe.objects.filter(cours__enseignant=request.user)
+    classes = classes_enseignant(request.user)
     
     if request.method == "POST":
         form = ImportEtudiantsForm(request.POST, request.FILES)
-        form.fields['classe'].queryset = classes_enseignant
+        form.fields['classe'].queryset = classes
         
         if form.is_valid():
             fichier = request.FILES['fichier']
@@ -694,68 +662,18 @@ def importer_etudiants(request):
             mode = form.cleaned_data.get('mode', 'create')
             
             try:
-                if fichier.name.endswith('.xlsx'):
-                    # Traitement Excel
-                    wb = openpyxl.load_workbook(fichier)
-                    ws = wb.active
-                    lignes = list(ws.iter_rows(values_only=True))
-                else:
-                    # Traitement CSV
-                    data = fichier.read().decode('utf-8')
-                    io_string = io.StringIO(data)
-                    lignes = list(csv.reader(io_string))
-                
-                etudiants_importes = 0
-                etudiants_modifies = 0
-                errors = []
-                
-                for i, row in enumerate(lignes[1:], start=2):  # Skip header
-                    try:
-                        if len(row) >= 2 and row[0] and row[1]:
-                            matricule = str(row[0]).strip()
-                            nom = str(row[1]).strip()
-                            prenom = str(row[2]).strip() if len(row) > 2 else ""
-                            
-                            if mode == 'create':
-                                etudiant, created = Etudiant.objects.get_or_create(
-                                    matricule=matricule,
-                                    defaults={'nom': nom, 'prenom': prenom, 'classe': classe}
-                                )
-                                if created:
-                                    etudiants_importes += 1
-                            else:
-                                # Mode update
-                                etudiant, created = Etudiant.objects.update_or_create(
-                                    matricule=matricule,
-                                    defaults={'nom': nom, 'prenom': prenom, 'classe': classe}
-                                )
-                                if created:
-                                    etudiants_importes += 1
-                                else:
-                                    etudiants_modifies += 1
-                    except Exception as e:
-                        errors.append(f"Ligne {i}: {str(e)}")
-                
-                if errors:
-                    messages.warning(request, f"Import terminé avec {len(errors)} erreurs")
-                else:
-                    messages.success(request, 
-                        f"{etudiants_importes} étudiants importés, {etudiants_modifies} modifiés" 
-                        if mode == 'update' else f"{etudiants_importes} étudiants importés"
-                    )
-                
+                importer_ou_enfiler(request, fichier, classe, mode)
                 return redirect("core:mes_etudiants")
                 
             except Exception as e:
                 messages.error(request, f"Erreur lors de la lecture du fichier: {str(e)}")
     else:
         form = ImportEtudiantsForm()
-        form.fields['classe'].queryset = classes_enseignant
+        form.fields['classe'].queryset = classes
     
     return render(request, "core/importer_etudiants.html", {"form": form})
 
 from django.http import HttpResponse
-from openpyxl import Workbook
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 
@@ -763,37 +681,11 @@ from django.views.decorators.http import require_http_methods
 @require_http_methods(["GET"])
 def telecharger_modele_import(request):
     """Télécharger un modèle Excel pré-rempli pour l'import"""
-    # Créer un classeur Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Modèle Import"
-
-    # En-têtes
-    ws.append(["Matricule", "Nom", "Prénom"])
-
-    # Exemple avec votre nom
-    ws.append(["RK001", "KULE", "Robert"])
-
-    # Style basique
-    for cell in ws[1]:
-        cell.font = openpyxl.styles.Font(bold=True)
-
-    # Ajuster la largeur des colonnes
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 20
-    ws.column_dimensions['C'].width = 20
-
-    # Sauvegarder en mémoire
-    from io import BytesIO
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    with export_modele_import() as fichier:
+        contenu = fichier.read()
 
     # Créer la réponse HTTP
-    response = HttpResponse(
-        buffer.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    response = HttpResponse(contenu, content_type=EXCEL_CONTENT_TYPE)
     response['Content-Disposition'] = 'attachment; filename="modele_import_etudiants.xlsx"'
     return response
 # -------------------
@@ -804,42 +696,52 @@ def telecharger_modele_import(request):
 @user_passes_test(enseignant_required)
 def synthese_enseignant(request):
     """Vue synthèse pour l'enseignant"""
-    cours = request.user.cours_enseignant.all()
-    classes = Classe.objects.filter(cours__enseignant=request.user).distinct()
+    cours = cours_enseignant(request.user)
+    classes = classes_enseignant(request.user)
     
     # Statistiques globales
-    stats = {
-        'total_cours': cours.count(),
-        'total_classes': classes.count(),
-        'total_etudiants': Etudiant.objects.filter(classe__in=classes).count(),
-        'total_seances': Seance.objects.filter(cours__enseignant=request.user).count(),
-        'presences_aujourdhui': Presence.objects.filter(
-            seance__cours__enseignant=request.user,
-            seance__date=timezone.now().date(),
-            statut__in=['present', 'retard']
-        ).count(),
-        'cours_par_classe': []
-    }
+    def calcul():
+        # Cours (avec nb_seances) et effectifs chargés une fois, regroupés par classe
+        etudiants_par_classe = dict(
+            etudiants_enseignant(request.user).order_by().values_list('classe_id').annotate(n=Count('id'))
+        )
+        cours_par_classe = {}
+        for c in cours:
+            cours_par_classe.setdefault(c.classe_id, []).append(c)
+        stats = {
+            'total_cours': len(cours),
+            'total_classes': len(classes),
+            'total_etudiants': sum(etudiants_par_classe.values()),
+            'total_seances': sum(c.nb_seances for c in cours),
+            'presences_aujourdhui': Presence.objects.filter(
+                seance__cours__enseignant=request.user,
+                seance__date=timezone.now().date(),
+                statut__in=['present', 'retard']
+            ).count(),
+            'cours_par_classe': []
+        }
+        
+        for classe in classes:
+            cours_classe = cours_par_classe.get(classe.pk, [])
+            stats['cours_par_classe'].append({
+                'classe': classe,
+                'nombre_cours': len(cours_classe),
+                'nombre_etudiants': etudiants_par_classe.get(classe.pk, 0),
+                'nombre_seances': sum(c.nb_seances for c in cours_classe)
+            })
+        return stats
     
-    for classe in classes:
-        cours_classe = cours.filter(classe=classe)
-        stats['cours_par_classe'].append({
-            'classe': classe,
-            'nombre_cours': cours_classe.count(),
-            'nombre_etudiants': classe.etudiants.count(),
-            'nombre_seances': Seance.objects.filter(cours__in=cours_classe).count()
-        })
+    stats = cache_stats(f"enseignant:{request.user.id}:synthese", calcul)
     
     # Dernières séances
-    dernieres_seances = Seance.objects.filter(
-        cours__enseignant=request.user
-    ).order_by('-date', '-heure_debut')[:10]
+    dernieres_seances = seances_enseignant(request.user).with_presence_stats().order_by('-date', '-heure_debut')[:10]
     
     # Prochaines séances (aujourd'hui et après)
-    prochaines_seances = Seance.objects.filter(
-        cours__enseignant=request.user,
-        date__gte=timezone.now().date()
-    ).order_by('date', 'heure_debut')[:5]
+    prochaines_seances = (
+        seances_enseignant(request.user)
+        .filter(date__gte=timezone.now().date())
+        .order_by('date', 'heure_debut')[:5]
+    )
     
     return render(request, "core/synthese_enseignant.html", {
         "stats": stats,
@@ -909,17 +811,55 @@ def enseignant_delete(request, pk):
 # -------------------
 # API & DONNÉES
 # -------------------
+
+async def validateurs_presences_seance(request, seance_id):
+    """Validateurs de l'appel d'une séance, si elle appartient à l'enseignant"""
+    user = await request.auser()
+    cours_id = await Seance.objects.filter(pk=seance_id, cours__enseignant=user).values_list('cours_id', flat=True).afirst()
+    if cours_id is None:
+        return None
+    return await avalidateurs_cours(f"seance-{seance_id}", cours_id)
+
+async def validateurs_stats_cours(request, cours_id):
+    """Validateurs des statistiques d'un cours, pour son enseignant seulement (404 sinon)"""
+    return await avalidateurs_cours("stats", cours_id, await request.auser())
+
 @login_required
-def api_stats_cours(request, cours_id):
+@user_passes_test(enseignant_required)
+def api_sync_appel(request):
+    """
+    Synchronisation de l'appel hors ligne : un lot de mutations horodatées
+    (statuts, heures d'arrivée, étudiants ajoutés) appliqué en une
+    transaction, et le delta du serveur depuis le jeton du client.
+    Voir ``core.synchronisation.synchroniser``.
+    """
+    if request.method != "POST":
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+    try:
+        donnees = json.loads(request.body)
+        if not isinstance(donnees, dict):
+            raise ValueError("Objet JSON attendu")
+        reponse = synchroniser(
+            request.user, donnees.get('mutations', []), donnees.get('jeton'), donnees.get('seances'),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(reponse)
+
+@login_required
+@conditionnel(validateurs_stats_cours)
+async def api_stats_cours(request, cours_id):
     """API pour les statistiques d'un cours (JSON)"""
-    cours = get_object_or_404(Cours, id=cours_id, enseignant=request.user)
+    user = await request.auser()
+    cours = await aget_object_or_404(Cours.objects.select_related('classe'), id=cours_id, enseignant=user)
     
-    # Calculer le taux de présence
-    total_seances = cours.seances.count()
-    if total_seances > 0:
-        total_presences = Presence.objects.filter(seance__cours=cours).count()
-        presentes = Presence.objects.filter(seance__cours=cours, statut__in=['present', 'retard']).count()
-        taux_presence = (presentes / total_presences) * 100 if total_presences > 0 else 0
+    # Calculer le taux de présence depuis les résumés
+    totaux = await cours.resumes.aaggregate(
+        total=Sum('total'),
+        presentes=Sum(F('present') + F('retard'))
+    )
+    if totaux['total']:
+        taux_presence = (totaux['presentes'] / totaux['total']) * 100
     else:
         taux_presence = 0
     
@@ -932,9 +872,11 @@ def api_stats_cours(request, cours_id):
     return JsonResponse(data)
 
 @login_required
-def api_presences_seance(request, seance_id):
+@conditionnel(validateurs_presences_seance)
+async def api_presences_seance(request, seance_id):
     """API pour les présences d'une séance"""
-    seance = get_object_or_404(Seance, id=seance_id, cours__enseignant=request.user)
+    user = await request.auser()
+    seance = await aget_object_or_404(Seance.objects.select_related('cours'), id=seance_id, cours__enseignant=user)
     presences = Presence.objects.filter(seance=seance).select_related('etudiant')
     
     data = {
@@ -951,12 +893,183 @@ def api_presences_seance(request, seance_id):
                     'prenom': p.etudiant.prenom
                 },
                 'statut': p.statut
-            } for p in presences
+            } async for p in presences
         ]
     }
     
     return JsonResponse(data)
 
+@login_required
+@vue_rapport
+def api_presences_etudiant(request, etudiant_id):
+    """
+    Chronologie des présences d'un étudiant tous cours confondus, la plus
+    récente d'abord, par pages de 50 (``curseur``, filtre ``cours``), avec
+    son résumé par cours. Accessible à l'administrateur et aux enseignants
+    de sa classe.
+    """
+    if request.user.role == "admin":
+        etudiants = Etudiant.objects.select_related('classe')
+    else:
+        etudiants = etudiants_enseignant(request.user)
+    etudiant = get_object_or_404(etudiants, pk=etudiant_id)
+
+    presences = chronologie_etudiant(etudiant.pk)
+    if request.GET.get('cours'):
+        if not request.GET['cours'].isdigit():
+            return JsonResponse({'error': "cours : identifiant numérique attendu"}, status=400)
+        presences = presences.filter(seance__cours_id=int(request.GET['cours']))
+    page = paginer(presences, ORDRE_CHRONOLOGIE, 50, request.GET.get('curseur'))
+
+    resume = resume_etudiant(etudiant.pk)
+    return JsonResponse({
+        'etudiant': {
+            'id': etudiant.pk,
+            'matricule': etudiant.matricule,
+            'nom': etudiant.nom,
+            'prenom': etudiant.prenom,
+            'classe': etudiant.classe.nom,
+        },
+        'taux_global': round(resume['taux_global'], 1),
+        'cours': [{**c, 'taux_presence': round(c['taux_presence'], 1)} for c in resume['cours']],
+        'presences': [
+            {
+                'seance': p.seance_id,
+                'date': p.seance.date,
+                'heure_debut': p.seance.heure_debut,
+                'heure_fin': p.seance.heure_fin,
+                'annulee': p.seance.is_annulee,
+                'cours': {'id': p.seance.cours_id, 'nom': p.seance.cours.nom},
+                'statut': p.statut,
+                'heure_arrivee': p.heure_arrivee,
+            }
+            for p in page
+        ],
+        'pagination': page.as_dict(),
+    })
+
+@login_required
+@user_passes_test(admin_required)
+def api_export_presences(request):
+    """
+    Dump des présences en flux NDJSON (défaut) ou CSV (``?format=csv``) pour
+    l'entrepôt de données. Filtres : ``du`` / ``au`` (dates de séance),
+    ``classe``, ``cours`` et ``depuis`` (updated_at, avec chevauchement)
+    pour les dumps incrémentaux.
+    """
+    format_dump = request.GET.get('format', 'ndjson')
+    if format_dump not in ('ndjson', 'csv'):
+        return JsonResponse({'error': "format doit valoir 'ndjson' ou 'csv'"}, status=400)
+
+    filtres = {}
+    for param in ('du', 'au'):
+        if request.GET.get(param):
+            try:
+                filtres[param] = parse_date(request.GET[param])
+            except ValueError:
+                # Format valide mais date inexistante (2025-02-30)
+                filtres[param] = None
+            if filtres[param] is None:
+                return JsonResponse({'error': f"{param} : date AAAA-MM-JJ attendue"}, status=400)
+    for param, filtre in (('classe', 'classe_id'), ('cours', 'cours_id')):
+        if request.GET.get(param):
+            if not request.GET[param].isdigit():
+                return JsonResponse({'error': f"{param} : identifiant numérique attendu"}, status=400)
+            filtres[filtre] = int(request.GET[param])
+    if request.GET.get('depuis'):
+        try:
+            depuis = parse_datetime(request.GET['depuis'])
+        except ValueError:
+            depuis = None
+        if depuis is None:
+            return JsonResponse({'error': "depuis : date-heure ISO 8601 attendue"}, status=400)
+        if timezone.is_naive(depuis):
+            depuis = timezone.make_aware(depuis)
+        filtres['depuis'] = depuis
+
+    lignes = presences_dump(**filtres)
+    if format_dump == 'csv':
+        response = StreamingHttpResponse(flux_csv(lignes), content_type='text/csv; charset=utf-8')
+    else:
+        response = StreamingHttpResponse(flux_ndjson(lignes), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="presences_{timezone.now():%Y%m%d_%H%M%S}.{format_dump}"'
+    return response
+
+@login_required
+def tache_statut(request, pk):
+    """API de suivi d'une tâche en arrière-plan"""
+    tache = get_object_or_404(Tache, pk=pk, utilisateur=request.user)
+    return tache_json(tache)
+
+@login_required
+def tache_telecharger(request, pk):
+    """Téléchargement du fichier produit par une tâche terminée"""
+    tache = get_object_or_404(Tache, pk=pk, utilisateur=request.user, statut='terminee')
+    if not tache.fichier:
+        raise Http404("Aucun fichier pour cette tâche")
+    return FileResponse(tache.fichier.open('rb'), as_attachment=True, filename=os.path.basename(tache.fichier.name))
+
+@login_required
+@user_passes_test(admin_required)
+def api_instrumentation(request):
+    """Durées et requêtes SQL par vue sur la fenêtre glissante (admin)"""
+    return JsonResponse({
+        'fenetre': settings.INSTRUMENTATION_FENETRE,
+        'vues': statistiques_vues(),
+    })
+
+@login_required
+@user_passes_test(admin_required)
+@vue_rapport
+def api_alertes(request):
+    """
+    Étudiants à risque (admin), lus dans la table des alertes : taux le plus
+    bas d'abord, par pages de 50 (``curseur``). Filtres : ``cours``,
+    ``classe`` et ``type`` (``taux`` ou ``serie``).
+    """
+    queryset = alertes()
+    for param, filtre in (('classe', 'etudiant__classe_id'), ('cours', 'cours_id')):
+        if request.GET.get(param):
+            if not request.GET[param].isdigit():
+                return JsonResponse({'error': f"{param} : identifiant numérique attendu"}, status=400)
+            queryset = queryset.filter(**{filtre: int(request.GET[param])})
+    type_alerte = request.GET.get('type')
+    if type_alerte:
+        champs = {'taux': 'taux_insuffisant', 'serie': 'serie_absences'}
+        if type_alerte not in champs:
+            return JsonResponse({'error': "type doit valoir 'taux' ou 'serie'"}, status=400)
+        queryset = queryset.filter(**{champs[type_alerte]: True})
+
+    page = paginer(queryset, ORDRE_ALERTES, 50, request.GET.get('curseur'))
+    analyse = derniere_analyse()
+    return JsonResponse({
+        'derniere_analyse': analyse.isoformat() if analyse else None,
+        'results': [
+            {
+                'etudiant': {
+                    'id': alerte.etudiant_id,
+                    'matricule': alerte.etudiant.matricule,
+                    'nom': alerte.etudiant.nom,
+                    'prenom': alerte.etudiant.prenom,
+                    'classe': alerte.etudiant.classe.nom,
+                },
+                'cours': {
+                    'id': alerte.cours_id,
+                    'nom': alerte.cours.nom,
+                    'enseignant': alerte.cours.enseignant.username,
+                },
+                'taux_presence': alerte.taux_presence,
+                'seances_appelees': alerte.seances_appelees,
+                'absences_consecutives': alerte.absences_consecutives,
+                'taux_insuffisant': alerte.taux_insuffisant,
+                'serie_absences': alerte.serie_absences,
+                'depuis': alerte.created_at.isoformat(),
+            }
+            for alerte in page
+        ],
+        'pagination': page.as_dict(),
+    })
+
 # -------------------------------
 # ADMIN CRUD - LISTES
 # -------------------------------
@@ -965,7 +1078,7 @@ def api_presences_seance(request, seance_id):
 @user_passes_test(admin_required)
 def enseignant_list(request):
     """Liste des enseignants (admin)"""
-    enseignants = User.objects.filter(role="enseignant").order_by('username')
+    enseignants = User.objects.filter(role="enseignant")
     
     # Recherche
     query = request.GET.get('q')
@@ -977,9 +1090,7 @@ def enseignant_list(request):
             Q(email__icontains=query)
         )
     
-    paginator = Paginator(enseignants, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginer(enseignants, ('username', 'id'), 20, request.GET.get('curseur'))
     
     return render(request, "core/admin/enseignant_list.html", {
         "enseignants": page_obj,
@@ -1020,7 +1131,7 @@ def classe_list(request):
 @user_passes_test(admin_required)
 def etudiant_list(request):
     """Liste des étudiants (admin)"""
-    etudiants = Etudiant.objects.all().select_related('classe').order_by('classe__nom', 'nom', 'prenom')
+    etudiants = Etudiant.objects.all().select_related('classe')
     
     # Filtres
     classe_id = request.GET.get('classe')
@@ -1037,9 +1148,7 @@ def etudiant_list(request):
             Q(classe__nom__icontains=query)
         )
     
-    paginator = Paginator(etudiants, 30)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginer(etudiants, ORDRE_ETUDIANTS, 30, request.GET.get('curseur'))
     
     classes = Classe.objects.all()
     
@@ -1055,7 +1164,7 @@ def etudiant_list(request):
 @user_passes_test(admin_required)
 def admin_cours_list(request):
     """Liste des cours (admin)"""
-    cours = Cours.objects.all().select_related('enseignant', 'classe').order_by('-created_at')
+    cours = Cours.objects.all().select_related('enseignant', 'classe')
     
     # Filtres
     enseignant_id = request.GET.get('enseignant')
@@ -1075,16 +1184,14 @@ def admin_cours_list(request):
             Q(classe__nom__icontains=query)
         )
     
-    paginator = Paginator(cours, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginer(cours, ('-created_at', '-id'), 20, request.GET.get('curseur'))
     
     enseignants = User.objects.filter(role="enseignant")
     classes = Classe.objects.all()
     # Ajouter ces statistiques
     cours_actifs = Cours.objects.filter(seances__isnull=False).distinct().count()
     total_seances = Seance.objects.count()
-    enseignants_distincts = User.objects.filter(role="enseignant", cours__isnull=False).distinct().count()
+    enseignants_distincts = User.objects.filter(role="enseignant", cours_enseignant__isnull=False).distinct().count()
     
     return render(request, "core/admin/cours_list.html", {
         "cours": page_obj,
@@ -1172,53 +1279,7 @@ def admin_importer_etudiants(request):
             mode = form.cleaned_data.get('mode', 'create')
             
             try:
-                if fichier.name.endswith('.xlsx'):
-                    wb = openpyxl.load_workbook(fichier)
-                    ws = wb.active
-                    lignes = list(ws.iter_rows(values_only=True))
-                else:
-                    data = fichier.read().decode('utf-8')
-                    io_string = io.StringIO(data)
-                    lignes = list(csv.reader(io_string))
-                
-                etudiants_importes = 0
-                etudiants_modifies = 0
-                errors = []
-                
-                for i, row in enumerate(lignes[1:], start=2):
-                    try:
-                        if len(row) >= 2 and row[0] and row[1]:
-                            matricule = str(row[0]).strip()
-                            nom = str(row[1]).strip()
-                            prenom = str(row[2]).strip() if len(row) > 2 else ""
-                            
-                            if mode == 'create':
-                                etudiant, created = Etudiant.objects.get_or_create(
-                                    matricule=matricule,
-                                    defaults={'nom': nom, 'prenom': prenom, 'classe': classe}
-                                )
-                                if created:
-                                    etudiants_importes += 1
-                            else:
-                                etudiant, created = Etudiant.objects.update_or_create(
-                                    matricule=matricule,
-                                    defaults={'nom': nom, 'prenom': prenom, 'classe': classe}
-                                )
-                                if created:
-                                    etudiants_importes += 1
-                                else:
-                                    etudiants_modifies += 1
-                    except Exception as e:
-                        errors.append(f"Ligne {i}: {str(e)}")
-                
-                if errors:
-                    messages.warning(request, f"Import terminé avec {len(errors)} erreurs")
-                else:
-                    msg = f"{etudiants_importes} étudiants importés"
-                    if mode == 'update':
-                        msg += f", {etudiants_modifies} modifiés"
-                    messages.success(request, msg)
-                
+                importer_ou_enfiler(request, fichier, classe, mode)
                 return redirect("core:etudiant_list")
                 
             except Exception as e:
@@ -1239,12 +1300,7 @@ def recherche_etudiants(request):
     results = []
     
     if query:
-        results = Etudiant.objects.filter(
-            Q(nom__icontains=query) |
-            Q(prenom__icontains=query) |
-            Q(matricule__icontains=query) |
-            Q(classe__nom__icontains=query)
-        ).select_related('classe')[:10]
+        results = rechercher_etudiants(Etudiant.objects.select_related('classe'), query)
     
     return render(request, "core/recherche_etudiants.html", {
         "results": results,
@@ -1263,11 +1319,7 @@ def recherche_cours(request):
         queryset = request.user.cours_enseignant.all()
     
     if query:
-        results = queryset.filter(
-            Q(nom__icontains=query) |
-            Q(classe__nom__icontains=query) |
-            Q(enseignant__username__icontains=query)
-        ).select_related('enseignant', 'classe')[:10]
+        results = rechercher_cours(queryset.select_related('enseignant', 'classe'), query)
     
     return render(request, "core/recherche_cours.html", {
         "results": results,
@@ -1282,7 +1334,7 @@ def recherche_seances(request):
     date_fin = request.GET.get('date_fin')
     results = []
     
-    queryset = Seance.objects.filter(cours__enseignant=request.user)
+    queryset = seances_enseignant(request.user)
     
     if query:
         queryset = queryset.filter(
@@ -1296,7 +1348,7 @@ def recherche_seances(request):
     if date_fin:
         queryset = queryset.filter(date__lte=date_fin)
     
-    results = queryset.select_related('cours', 'cours__classe').order_by('-date')[:20]
+    results = queryset.order_by('-date')[:20]
     
     return render(request, "core/recherche_seances.html", {
         "results": results,
@@ -1310,26 +1362,30 @@ def recherche_seances(request):
 # -------------------------------
 
 @login_required
-def api_recherche_etudiants(request):
+@vue_rapport
+async def api_recherche_etudiants(request):
     """API pour autocomplétion étudiants"""
+    user = await request.auser()
     query = request.GET.get('q', '')
     classe_id = request.GET.get('classe')
     
-    queryset = Etudiant.objects.all()
-    
-    if request.user.role == "enseignant":
-        classes_enseignant = Classe.objects.filter(cours__enseignant=request.user).distinct()
-        queryset = queryset.filter(classe__in=classes_enseignant)
+    if user.role == "enseignant":
+        queryset = etudiants_enseignant(user)
+    else:
+        queryset = Etudiant.objects.select_related('classe')
     
     if classe_id:
         queryset = queryset.filter(classe_id=classe_id)
     
+    # Recherche et pagination enchaînent plusieurs requêtes : exécutées en
+    # un seul passage dans le thread de l'ORM plutôt qu'un par requête
+    pagination = None
     if query:
-        queryset = queryset.filter(
-            Q(nom__icontains=query) |
-            Q(prenom__icontains=query) |
-            Q(matricule__icontains=query)
-        )[:10]
+        queryset = await sync_to_async(rechercher_etudiants)(queryset, query)
+    else:
+        # Sans recherche : liste complète, parcourue page par page
+        queryset = await sync_to_async(paginer)(queryset, ORDRE_ETUDIANTS, 20, request.GET.get('curseur'))
+        pagination = queryset.as_dict()
     
     results = [
         {
@@ -1343,23 +1399,28 @@ def api_recherche_etudiants(request):
         for etu in queryset
     ]
     
-    return JsonResponse({'results': results})
+    data = {'results': results}
+    if pagination:
+        data['pagination'] = pagination
+    return JsonResponse(data)
 
 @login_required
-def api_recherche_cours(request):
+@vue_rapport
+async def api_recherche_cours(request):
     """API pour autocomplétion cours"""
+    user = await request.auser()
     query = request.GET.get('q', '')
     
-    if request.user.role == "admin":
+    if user.role == "admin":
         queryset = Cours.objects.all()
     else:
-        queryset = request.user.cours_enseignant.all()
+        queryset = user.cours_enseignant.all()
     
+    queryset = queryset.select_related('classe', 'enseignant')
     if query:
-        queryset = queryset.filter(
-            Q(nom__icontains=query) |
-            Q(classe__nom__icontains=query)
-        )[:10]
+        cours_list = await sync_to_async(rechercher_cours)(queryset, query)
+    else:
+        cours_list = [cours async for cours in queryset]
     
     results = [
         {
@@ -1369,7 +1430,7 @@ def api_recherche_cours(request):
             'classe': cours.classe.nom,
             'enseignant': cours.enseignant.username
         }
-        for cours in queryset.select_related('classe', 'enseignant')
+        for cours in cours_list
     ]
     
     return JsonResponse({'results': results})
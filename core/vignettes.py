@@ -0,0 +1,97 @@
+# core/vignettes.py
+
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .models import Etudiant
+
+
+# Pillow n'est importé qu'à la génération (voir benchmark_imports)
+
+QUALITE_WEBP = 80
+
+
+def tailles():
+    """Côtés (px) des vignettes carrées générées pour chaque photo"""
+    return sorted(getattr(settings, "VIGNETTES_TAILLES", (40, 80)))
+
+
+def nom_vignette(empreinte, taille):
+    """
+    Chemin d'une vignette sous ``MEDIA_ROOT``. Le nom dérive du contenu de
+    la photo : il change avec elle, et peut donc être servi avec un cache
+    « immutable » d'un an (``VIGNETTES_DOSSIER``).
+    """
+    dossier = getattr(settings, "VIGNETTES_DOSSIER", "vignettes")
+    return f"{dossier}/{empreinte[:2]}/{empreinte}-{taille}.webp"
+
+
+def url_vignette(empreinte, taille):
+    return default_storage.url(nom_vignette(empreinte, taille))
+
+
+def empreinte_fichier(fichier):
+    """SHA-256 (tronqué) du contenu, lu par blocs"""
+    condensat = hashlib.sha256()
+    for bloc in fichier.chunks():
+        condensat.update(bloc)
+    return condensat.hexdigest()[:32]
+
+
+def generer_vignettes(fichier):
+    """
+    Génère les vignettes WebP d'une photo ouverte (fichier envoyé ou déjà
+    stocké) et retourne son empreinte. Les vignettes déjà présentes (même
+    contenu) ne sont pas recalculées. Lève ValueError pour un fichier qui
+    n'est pas une image. Le fichier est rembobiné, pas fermé : un envoi
+    reste à enregistrer par le FileField.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        empreinte = empreinte_fichier(fichier)
+        a_generer = [t for t in tailles() if not default_storage.exists(nom_vignette(empreinte, t))]
+        if not a_generer:
+            return empreinte
+
+        fichier.seek(0)
+        try:
+            image = Image.open(fichier)
+            image.draft("RGB", (a_generer[-1], a_generer[-1]))  # JPEG : décodage réduit
+            image = ImageOps.exif_transpose(image)
+        except (UnidentifiedImageError, OSError) as e:
+            raise ValueError(f"Photo illisible : {e}") from e
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+        for taille in a_generer:
+            vignette = ImageOps.fit(image, (taille, taille), Image.Resampling.LANCZOS)
+            tampon = io.BytesIO()
+            vignette.save(tampon, "WEBP", quality=QUALITE_WEBP, method=6)
+            default_storage.save(nom_vignette(empreinte, taille), ContentFile(tampon.getvalue()))
+    finally:
+        fichier.seek(0)
+    return empreinte
+
+
+def vignettes_etudiant(etudiant_id):
+    """
+    Génère les vignettes de la photo déjà stockée d'un étudiant et
+    enregistre son empreinte (sans signaux ni ``updated_at`` : rien
+    d'autre ne change). Retourne l'empreinte, ou None si la photo est
+    absente ou illisible.
+    """
+    etudiant = Etudiant.objects.only('photo').get(pk=etudiant_id)
+    if not etudiant.photo:
+        return None
+    try:
+        with etudiant.photo.open('rb') as fichier:
+            empreinte = generer_vignettes(fichier)
+    except (ValueError, OSError):
+        return None
+    Etudiant.objects.filter(pk=etudiant_id).update(photo_empreinte=empreinte)
+    return empreinte
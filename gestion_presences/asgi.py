@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestion_presences.settings')
+# Sous ASGI chaque requête s'exécute dans son propre thread : des connexions
+# persistantes (par thread) ne seraient jamais réutilisées ni fermées
+os.environ.setdefault('CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
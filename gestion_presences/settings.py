@@ -36,21 +36,23 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  
+    'core.middleware.StaticFilesMiddleware',  # WhiteNoise, compatible ASGI
+    'core.middleware.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.RoutageLectureMiddleware',
+    'core.middleware.SelecteursMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'core.middleware.EnseignantRestrictionMiddleware',
 ]
 
 ROOT_URLCONF = 'gestion_presences.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.instrumentation.DjangoTemplatesMesures',  # DjangoTemplates + durée de rendu
         'DIRS': [BASE_DIR / "templates"],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -71,12 +73,130 @@ WSGI_APPLICATION = 'gestion_presences.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(
         default=config("DATABASE_URL", default=f"sqlite:///{BASE_DIR}/dbpresence.sqlite3"),
-        conn_max_age=600,
+        conn_max_age=config("CONN_MAX_AGE", default=600, cast=int),  # 0 sous ASGI (voir asgi.py)
+        conn_health_checks=True,
         ssl_require=False
     ),
-    'OPTIONS': {
-            'timeout': 20,  # secondes
+}
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # IMMEDIATE : une transaction prend le verrou d'écriture dès BEGIN et
+    # attend son tour (busy_timeout) au lieu d'échouer en "database is
+    # locked" quand deux appels lisent puis écrivent en même temps
+    DATABASES['default']['OPTIONS'] = {
+        'transaction_mode': config("SQLITE_TRANSACTION_MODE", default="IMMEDIATE"),
+    }
+
+# Pragmas appliqués à chaque connexion SQLite (voir core/base_donnees.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': config("SQLITE_JOURNAL_MODE", default="WAL"),  # lectures concurrentes d'une écriture
+    'synchronous': config("SQLITE_SYNCHRONOUS", default="NORMAL"),  # sûr en WAL, sans fsync par commit
+    'busy_timeout': config("SQLITE_BUSY_TIMEOUT", default=20000, cast=int),  # millisecondes
+    'mmap_size': config("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024, cast=int),  # octets
+    'cache_size': config("SQLITE_CACHE_SIZE", default=-64000, cast=int),  # négatif : en Kio
+    'temp_store': "MEMORY",
+}
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    # Lookups trigram_similar de la recherche (extension pg_trgm)
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+    # Pool de connexions de Django (psycopg 3 et psycopg_pool requis) ;
+    # incompatible avec les connexions persistantes
+    if config("DB_POOL", default=False, cast=bool):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': config("DB_POOL_MIN", default=2, cast=int),
+            'max_size': config("DB_POOL_MAX", default=10, cast=int),
+            'timeout': config("DB_POOL_TIMEOUT", default=10, cast=int),  # secondes d'attente d'une connexion
+        }
+
+    # Curseurs côté serveur pour .iterator() (exports en flux, matrice) ;
+    # à désactiver derrière PgBouncer en mode transaction
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = config(
+        "DB_DISABLE_SERVER_SIDE_CURSORS", default=False, cast=bool
+    )
+
+# Réplique en lecture optionnelle pour les vues de rapport (core/routage.py).
+# En local : copie du fichier SQLite, ou seconde base PostgreSQL répliquée
+REPLICA_DATABASE_URL = config("REPLICA_DATABASE_URL", default="")
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        REPLICA_DATABASE_URL,
+        conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+        conn_health_checks=True,
+    )
+    if DATABASES['replica']['ENGINE'] == DATABASES['default']['ENGINE']:
+        # Même profil que le primaire (pool, curseurs côté serveur...)
+        for cle in ('OPTIONS', 'DISABLE_SERVER_SIDE_CURSORS'):
+            if cle in DATABASES['default']:
+                DATABASES['replica'][cle] = DATABASES['default'][cle]
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.routage.RouteurLecture']
+REPLICA_COLLAGE = config("REPLICA_COLLAGE", default=10, cast=int)  # secondes sur le primaire après une écriture
+
+# ---------------------------
+# Cache
+# ---------------------------
+# "locmem" : un cache par processus (développement, worker unique)
+# "file"   : cache partagé entre les workers gunicorn d'une même machine
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem")
+
+if CACHE_BACKEND == "file":
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config("CACHE_LOCATION", default=str(BASE_DIR / "cache")),
         }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'presences',
+        }
+    }
+
+# Statistiques des tableaux de bord (voir core/cache.py)
+STATS_CACHE_TIMEOUT = config("STATS_CACHE_TIMEOUT", default=60, cast=int)  # secondes
+STATS_CACHE_GRACE = config("STATS_CACHE_GRACE", default=300, cast=int)  # valeur périmée servie pendant le recalcul
+
+# ---------------------------
+# Tâches en arrière-plan (commande runjobs)
+# ---------------------------
+TACHES_WORKERS = config("TACHES_WORKERS", default=2, cast=int)
+# Tâche en_cours depuis plus longtemps (secondes) : processus tué, passée en échec
+TACHES_DELAI_MAX = config("TACHES_DELAI_MAX", default=3600, cast=int)
+# Les imports plus gros que ce seuil (octets) passent par la file de tâches
+TACHES_SEUIL_IMPORT = config("TACHES_SEUIL_IMPORT", default=256 * 1024, cast=int)
+
+# ---------------------------
+# Lectures incrémentales sur updated_at (appel hors ligne, dump des
+# présences, alertes d'absentéisme)
+# ---------------------------
+# Secondes relues avant le point de reprise : updated_at est fixé à
+# l'écriture, la transaction peut être validée après la lecture précédente
+CHEVAUCHEMENT_INCREMENTAL = config("CHEVAUCHEMENT_INCREMENTAL", default=5, cast=int)
+
+# ---------------------------
+# Alertes d'absentéisme (commande analyser_absences, core/alertes.py)
+# ---------------------------
+ALERTES_SEUIL_TAUX = config("ALERTES_SEUIL_TAUX", default=75, cast=float)  # % de présence
+ALERTES_ABSENCES_CONSECUTIVES = config("ALERTES_ABSENCES_CONSECUTIVES", default=3, cast=int)
+ALERTES_FENETRE = config("ALERTES_FENETRE", default=0, cast=int)  # dernières séances appelées (0 : toutes)
+ALERTES_SEANCES_MIN = config("ALERTES_SEANCES_MIN", default=3, cast=int)  # avant de juger un taux
+
+# ---------------------------
+# Instrumentation (core/middleware.py, endpoint api/instrumentation/)
+# ---------------------------
+INSTRUMENTATION_SERVER_TIMING = config("INSTRUMENTATION_SERVER_TIMING", default=True, cast=bool)
+INSTRUMENTATION_FENETRE = 15 * 60  # secondes d'historique par vue
+# Au-delà, la requête est journalisée (logger "core.instrumentation")
+INSTRUMENTATION_BUDGETS = {"requetes": 50, "sql_ms": 300, "total_ms": 1000}
+INSTRUMENTATION_BUDGETS_VUES = {
+    "core:statistiques": {"requetes": 10},
+    "core:cours_detail": {"requetes": 15},
 }
 
 # ---------------------------
@@ -109,6 +229,12 @@ STATIC_ROOT = BASE_DIR / "staticfiles"    # dossier où collectstatic copie tout
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Vignettes WebP des photos d'étudiants (core/vignettes.py, commande generer_vignettes).
+# Noms dérivés du contenu : MEDIA_URL + VIGNETTES_DOSSIER peut être servi avec
+# « Cache-Control: public, max-age=31536000, immutable ».
+VIGNETTES_DOSSIER = "vignettes"
+VIGNETTES_TAILLES = (40, 80)  # px : avatars de 40 px et leur version 2x
+
 # Stockage des fichiers statiques en production
 if not DEBUG:  
     STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"